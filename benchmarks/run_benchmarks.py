@@ -0,0 +1,254 @@
+"""
+Time the core rename and folder operations on seeded synthetic trees.
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # default sizes, writes benchmarks/results.json
+    python benchmarks/run_benchmarks.py --quick              # smallest sizes only
+    python benchmarks/run_benchmarks.py --save-baseline      # also store the run as the baseline
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+
+Each case builds a fresh tree in a temporary folder, times only the
+operation itself and keeps the best of ``--repeat`` runs. Results are written
+as JSON so runs can be compared against a saved baseline.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.file_operations import rename_files
+from src.rename_engine import RenameEngine
+from src.plan_executor import execute_moves, execute_moves_parallel
+from src.rename_utils import find_longest_common_prefix, remove_prefix_and_order
+from src.prefix_analysis import analyze_names
+from src.name_cleaner import NameCleaner
+from src.folder_operations import (identify_redundant_folders, collapse_redundant_folders,
+                                   uncollapse_folder)
+from benchmarks.synthetic_tree import (make_names, make_flat_tree, make_chains, make_underscore_folders,
+                                      make_deep_tree)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS = os.path.join(BENCH_DIR, 'results.json')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# A case is reported as a regression when it is this much slower than the baseline
+DEFAULT_THRESHOLD = 1.25
+
+def _bench_rename_files(work_dir, size, seed):
+    paths = make_flat_tree(work_dir, size, seed)
+    return lambda: rename_files(paths, 'Bench_', use_order=True)
+
+def _bench_common_prefix(work_dir, size, seed):
+    names = ['IMG_' + name for name in make_names(size, seed)]
+    return lambda: find_longest_common_prefix(names)
+
+def _bench_prefix_clusters(work_dir, size, seed):
+    names = make_names(size, seed)
+    return lambda: analyze_names(names)
+
+def _bench_remove_prefix(work_dir, size, seed):
+    names = make_names(size, seed)
+    return lambda: [remove_prefix_and_order(name, 'IMG_') for name in names]
+
+def _bench_clean_names(work_dir, size, seed):
+    # Batch counterpart of remove_prefix_and_order, same names and prefix
+    names = make_names(size, seed)
+    cleaner = NameCleaner()
+    return lambda: cleaner.clean_names(names, 'IMG_')
+
+def _bench_identify_redundant(work_dir, size, seed):
+    make_chains(work_dir, size, seed=seed)
+    return lambda: identify_redundant_folders(work_dir)
+
+def _bench_collapse(work_dir, size, seed):
+    make_chains(work_dir, size, seed=seed)
+    return lambda: collapse_redundant_folders(work_dir)
+
+def _bench_uncollapse(work_dir, size, seed):
+    folders = make_underscore_folders(work_dir, size, seed=seed)
+    return lambda: [uncollapse_folder(folder) for folder in folders]
+
+def _deep_moves(work_dir, size, seed, depth=24, files_per_folder=100):
+    paths = make_deep_tree(work_dir, size, depth, files_per_folder, seed=seed)
+    return [(path, os.path.join(os.path.dirname(path), 'Bench_' + os.path.basename(path))) for path in paths]
+
+def _rename_all(moves, use_dir_fd):
+    def operation():
+        with RenameEngine(use_dir_fd=use_dir_fd) as engine:
+            for src, dst in moves:
+                engine.rename(src, dst)
+    return operation
+
+def _bench_deep_paths(work_dir, size, seed):
+    return _rename_all(_deep_moves(work_dir, size, seed), False)
+
+def _bench_deep_dir_fd(work_dir, size, seed):
+    # Same as deep_rename_paths where dir_fd is unsupported
+    return _rename_all(_deep_moves(work_dir, size, seed), True)
+
+# Paths of about 3000 characters, where resolving every component on each call dominates
+def _bench_very_deep_paths(work_dir, size, seed):
+    return _rename_all(_deep_moves(work_dir, size, seed, depth=200, files_per_folder=1000), False)
+
+def _bench_very_deep_dir_fd(work_dir, size, seed):
+    return _rename_all(_deep_moves(work_dir, size, seed, depth=200, files_per_folder=1000), True)
+
+def _bench_apply_sequential(work_dir, size, seed):
+    moves = _deep_moves(work_dir, size, seed)
+    return lambda: execute_moves(moves)
+
+def _bench_apply_parallel(work_dir, size, seed):
+    moves = _deep_moves(work_dir, size, seed)
+    return lambda: execute_moves_parallel(moves, max_workers=8)
+
+# name -> (setup, sizes, quick sizes); setup returns the callable to time
+BENCHMARKS = {
+    'rename_files': (_bench_rename_files, [100, 1000, 10000], [100]),
+    'find_longest_common_prefix': (_bench_common_prefix, [1000, 100000, 1000000], [1000]),
+    'analyze_names': (_bench_prefix_clusters, [1000, 100000, 1000000], [1000]),
+    'remove_prefix_and_order': (_bench_remove_prefix, [1000, 10000, 100000], [1000]),
+    'clean_names': (_bench_clean_names, [1000, 10000, 100000], [1000]),
+    'identify_redundant_folders': (_bench_identify_redundant, [10, 100, 1000], [10]),
+    'collapse_redundant_folders': (_bench_collapse, [10, 100, 1000], [10]),
+    'uncollapse_folder': (_bench_uncollapse, [10, 100, 1000], [10]),
+    'deep_rename_paths': (_bench_deep_paths, [1000, 10000], [1000]),
+    'deep_rename_dir_fd': (_bench_deep_dir_fd, [1000, 10000], [1000]),
+    'very_deep_rename_paths': (_bench_very_deep_paths, [1000, 10000], [1000]),
+    'very_deep_rename_dir_fd': (_bench_very_deep_dir_fd, [1000, 10000], [1000]),
+    'apply_sequential': (_bench_apply_sequential, [1000, 10000], [1000]),
+    'apply_parallel': (_bench_apply_parallel, [1000, 10000], [1000]),
+}
+
+def run_case(setup, size, seed, repeat):
+    """
+    Time one benchmark case.
+
+    Every run gets a freshly generated tree because most operations change
+    the tree they work on.
+
+    Returns:
+        list: Wall-clock seconds of each run
+    """
+    timings = []
+    for _ in range(repeat):
+        work_dir = tempfile.mkdtemp(prefix='renamer_bench_')
+        try:
+            operation = setup(work_dir, size, seed)
+            # The operations report warnings with print; keep them out of the benchmark output
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                operation()
+                timings.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return timings
+
+def run_benchmarks(names=None, sizes=None, quick=False, repeat=3, seed=42, log=print):
+    """
+    Run the selected benchmarks.
+
+    Args:
+        names (list): Benchmark names to run (all if omitted)
+        sizes (list): Override the sizes of every benchmark
+        quick (bool): Use only the small sizes
+        repeat (int): Runs per case; the best one is reported
+        seed (int): Seed for the synthetic trees
+        log (callable): Progress output (None for silent)
+
+    Returns:
+        dict: Results document with "meta" and "results" sections
+    """
+    results = {}
+    for name in names or list(BENCHMARKS):
+        setup, default_sizes, quick_sizes = BENCHMARKS[name]
+        for size in sizes or (quick_sizes if quick else default_sizes):
+            timings = run_case(setup, size, seed, repeat)
+            key = f"{name}[{size}]"
+            results[key] = {"benchmark": name, "size": size, "best": min(timings), "runs": timings}
+            if log:
+                log(f"{key:<40} {min(timings) * 1000:10.2f} ms")
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare a run against a baseline.
+
+    Args:
+        current (dict): Results document of this run
+        baseline (dict): Results document to compare against
+        threshold (float): Slowdown ratio that counts as a regression
+
+    Returns:
+        list: (key, baseline_seconds, current_seconds, ratio, regressed) for every shared case
+    """
+    rows = []
+    base_results = baseline.get("results", {})
+    for key, result in current.get("results", {}).items():
+        if key not in base_results:
+            continue
+        before = base_results[key]["best"]
+        after = result["best"]
+        ratio = after / before if before else float('inf')
+        rows.append((key, before, after, ratio, ratio > threshold))
+    return rows
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the core File Renamer operations.")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument('--sizes', nargs='+', type=int, help="Override the sizes of every benchmark")
+    parser.add_argument('--quick', action='store_true', help="Run only the smallest size of each benchmark")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case (best is kept)")
+    parser.add_argument('--seed', type=int, default=42, help="Seed for the synthetic trees")
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help="Where to write the results JSON")
+    parser.add_argument('--compare', metavar='BASELINE', help="Compare against a saved results file")
+    parser.add_argument('--save-baseline', action='store_true', help=f"Also save this run as {DEFAULT_BASELINE}")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, args.sizes, args.quick, args.repeat, args.seed)
+    save_results(results, args.output)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        save_results(results, DEFAULT_BASELINE)
+        print(f"Baseline saved to {DEFAULT_BASELINE}")
+
+    if args.compare:
+        rows = compare_results(results, load_results(args.compare), args.threshold)
+        print(f"\n{'case':<40} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+        for key, before, after, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{key:<40} {before * 1000:12.2f} {after * 1000:12.2f} {ratio:7.2f}{flag}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import os
+import random
+
+_WORDS = ['holiday', 'report', 'scan', 'draft', 'final', 'photo', 'invoice', 'notes', 'backup', 'export']
+_EXTENSIONS = ['.jpg', '.png', '.txt', '.pdf', '.docx']
+_PREFIXES = ['IMG_', 'img_', 'DOC_', 'file_', '2024_', '']
+
+def random_name(rng, index):
+    """
+    Build a realistic file name: optional common prefix, order number, words and an extension.
+
+    Args:
+        rng (random.Random): Seeded generator
+        index (int): Position of the file, used to keep names unique
+
+    Returns:
+        str: A file name
+    """
+    prefix = rng.choice(_PREFIXES)
+    words = '_'.join(rng.sample(_WORDS, rng.randint(1, 3)))
+    return f"{prefix}{index:06d}_{words}{rng.choice(_EXTENSIONS)}"
+
+def make_names(count, seed=0):
+    """Generate ``count`` unique file names without touching the disk."""
+    rng = random.Random(seed)
+    return [random_name(rng, i) for i in range(count)]
+
+def _touch(path, size=0):
+    with open(path, 'wb') as f:
+        if size:
+            f.write(b'\0' * size)
+
+def make_flat_tree(root, count, seed=0, max_size=64):
+    """
+    Create one folder holding ``count`` files.
+
+    Args:
+        root (str): Folder to fill (created if missing)
+        count (int): Number of files
+        seed (int): Seed for names and sizes
+        max_size (int): Largest file size in bytes
+
+    Returns:
+        list: The created file paths, in creation order
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(root, random_name(rng, i))
+        _touch(path, rng.randint(0, max_size))
+        paths.append(path)
+    return paths
+
+def make_chains(root, count, depth=8, seed=0):
+    """
+    Create ``count`` single-child folder chains of ``depth`` levels, each ending in one file.
+
+    These are the structures ``identify_redundant_folders`` and
+    ``collapse_redundant_folders`` look for.
+
+    Returns:
+        list: The top folder of every chain
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    tops = []
+    for i in range(count):
+        top = os.path.join(root, f"chain{i:05d}")
+        path = top
+        for level in range(1, depth):
+            path = os.path.join(path, f"{rng.choice(_WORDS)[:4]}{level}")
+        os.makedirs(path)
+        _touch(os.path.join(path, random_name(rng, i)))
+        tops.append(top)
+    return tops
+
+def make_underscore_folders(root, count, parts=3, files_per_folder=2, seed=0):
+    """
+    Create ``count`` sibling folders with underscore-separated names, each holding a few files.
+
+    These are the folders ``uncollapse_folders`` splits into nested levels.
+    The first name part is unique per folder so no two folders merge.
+
+    Returns:
+        list: The created folder paths
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    folders = []
+    for i in range(count):
+        name_parts = [f"grp{i:05d}"] + [rng.choice(_WORDS) for _ in range(parts - 1)]
+        folder = os.path.join(root, '_'.join(name_parts))
+        os.makedirs(folder)
+        for j in range(files_per_folder):
+            _touch(os.path.join(folder, random_name(rng, j)))
+        folders.append(folder)
+    return folders
+
+def make_deep_tree(root, count, depth=24, files_per_folder=100, seed=0):
+    """
+    Create ``count`` files spread over leaf folders ``depth`` levels below ``root``.
+
+    Long paths make per-component path resolution visible, which is what
+    the directory-handle rename engine avoids.
+
+    Returns:
+        list: The created file paths, grouped by folder
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    paths = []
+    folder = None
+    for i in range(count):
+        if i % files_per_folder == 0:
+            folder = os.path.join(root, f"leaf{i // files_per_folder:05d}",
+                                  *[f"level{level:02d}_{rng.choice(_WORDS)}" for level in range(1, depth)])
+            os.makedirs(folder)
+        path = os.path.join(folder, random_name(rng, i))
+        _touch(path)
+        paths.append(path)
+    return paths
@@ -1,6 +1,13 @@
 import requests
 import json
 import os
+import logging
+try:
+    from src.progress import ProgressReporter, CancellationToken
+except ImportError:
+    from progress import ProgressReporter, CancellationToken
+
+logger = logging.getLogger(__name__)
 
 class AIRenamer:
     AVAILABLE_MODELS = {
@@ -107,7 +114,7 @@ class AIRenamer:
         )
         return system_instruction, full_prompt
 
-    def get_rename_suggestions(self, files, user_prompt, provider, model=None):
+    def get_rename_suggestions(self, files, user_prompt, provider, model=None, progress=None, cancel=None):
         """
         Get rename suggestions from AI.
         
@@ -116,26 +123,42 @@ class AIRenamer:
             user_prompt (str): User's instruction for renaming.
             provider (str): 'gemini' or 'openai'.
             model (str, optional): Specific model to use.
+            progress (ProgressReporter, optional): Advanced by every item once the suggestions arrive.
+            cancel (CancellationToken, optional): Checked before the request and before the answer is used
+                (a request already sent is not aborted).
             
         Returns:
             list: List of tuples (old_name, new_name).
+
+        Raises:
+            OperationCancelled: If cancellation was requested.
         """
+        if progress is None:
+            progress = ProgressReporter()
+        if cancel is None:
+            cancel = CancellationToken()
         api_key = self.config_manager.get_api_key(provider)
         if not api_key:
             raise ValueError(f"API Key for {provider} is missing.")
 
         system_instruction, full_prompt = self.construct_prompt(files, user_prompt)
 
+        progress.start(len(files))
+        cancel.raise_if_cancelled()
         try:
             if provider == 'gemini':
-                return self._call_gemini(api_key, system_instruction, full_prompt, files, model)
+                suggestions = self._call_gemini(api_key, system_instruction, full_prompt, files, model)
             elif provider == 'openai':
-                return self._call_openai(api_key, system_instruction, full_prompt, files, model)
+                suggestions = self._call_openai(api_key, system_instruction, full_prompt, files, model)
             else:
                 raise ValueError(f"Unsupported provider: {provider}")
         except Exception as e:
             print(f"AI Error: {e}")
             raise e
+        cancel.raise_if_cancelled()
+        progress.advance(len(files))
+        progress.finish()
+        return suggestions
 
     def _call_gemini(self, api_key, system_instruction, user_message, files, model=None):
         model = model or "gemini-1.5-flash"
@@ -218,6 +241,6 @@ class AIRenamer:
             else:
                 # Handle case where AI might have slightly altered the old name or it's missing
                 # For now just skip or log warning
-                print(f"Warning: AI returned unknown file '{old_name}'")
+                logger.warning("AI returned unknown file '%s'", old_name)
                 
         return suggestions
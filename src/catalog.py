@@ -0,0 +1,268 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+try:
+    from src.scanner import ScanEntry, compile_dir_excludes
+    from src.config_manager import CATALOG_FILE
+except ImportError:
+    from scanner import ScanEntry, compile_dir_excludes
+    from config_manager import CATALOG_FILE
+
+# A folder changed this close to the moment it was listed may change again
+# within the same timestamp tick, so such listings are never reused
+MTIME_SAFETY_NS = 2 * 1000 * 1000 * 1000
+
+KIND_DIR = 'd'
+KIND_FILE = 'f'
+KIND_OTHER = 'o'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    scanned_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    dir_path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    is_symlink INTEGER NOT NULL,
+    PRIMARY KEY (dir_path, name)
+) WITHOUT ROWID;
+"""
+
+def _read_listing(directory_path):
+    """List a folder with os.scandir and classify each entry."""
+    rows = []
+    with os.scandir(directory_path) as iterator:
+        for dir_entry in iterator:
+            try:
+                if dir_entry.is_dir():
+                    kind = KIND_DIR
+                elif dir_entry.is_file():
+                    kind = KIND_FILE
+                else:
+                    kind = KIND_OTHER
+            except OSError:
+                kind = KIND_OTHER
+            try:
+                is_symlink = dir_entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            rows.append((dir_entry.name, kind, int(is_symlink)))
+    rows.sort()
+    return rows
+
+class DirectoryCatalog:
+    """
+    Persistent record of folder listings, stored in SQLite.
+
+    Each listed folder is saved together with its modification time. Later
+    lookups only stat the folder and reuse the stored listing when the mtime
+    is unchanged, so repeated previews of large trees avoid relisting folders
+    that have not been touched.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or CATALOG_FILE
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _listing(self, directory_path):
+        """
+        Get the classified listing of one folder, relisting it only if it changed.
+
+        Returns:
+            list: Sorted list of (name, kind, is_symlink) tuples (empty if the folder is missing)
+        """
+        key = os.path.abspath(directory_path)
+        try:
+            mtime_ns = os.stat(key).st_mtime_ns
+        except OSError:
+            self.invalidate(key)
+            return []
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, scanned_ns FROM directories WHERE path = ?", (key,)).fetchone()
+            if row and row[0] == mtime_ns and row[1] - mtime_ns >= MTIME_SAFETY_NS:
+                self.hits += 1
+                return self._conn.execute(
+                    "SELECT name, kind, is_symlink FROM entries WHERE dir_path = ? ORDER BY name",
+                    (key,)).fetchall()
+
+        try:
+            rows = _read_listing(key)
+        except (FileNotFoundError, NotADirectoryError):
+            self.invalidate(key)
+            return []
+        scanned_ns = time.time_ns()
+
+        with self._lock:
+            self.misses += 1
+            with self._conn:
+                if row:
+                    # Forget subfolders that disappeared since the last listing
+                    old_dirs = set(name for (name,) in self._conn.execute(
+                        "SELECT name FROM entries WHERE dir_path = ? AND kind = ?", (key, KIND_DIR)))
+                    new_dirs = set(name for name, kind, _ in rows if kind == KIND_DIR)
+                    self._conn.executemany("DELETE FROM directories WHERE path = ?",
+                                           [(os.path.join(key, name),) for name in old_dirs - new_dirs])
+                self._conn.execute("DELETE FROM entries WHERE dir_path = ?", (key,))
+                self._conn.executemany(
+                    "INSERT INTO entries (dir_path, name, kind, is_symlink) VALUES (?, ?, ?, ?)",
+                    [(key, name, kind, is_symlink) for name, kind, is_symlink in rows])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO directories (path, mtime_ns, scanned_ns) VALUES (?, ?, ?)",
+                    (key, mtime_ns, scanned_ns))
+        return rows
+
+    def invalidate(self, directory_path):
+        """
+        Drop the stored listing of a folder so the next lookup relists it.
+
+        Args:
+            directory_path (str): Folder to forget
+        """
+        key = os.path.abspath(directory_path)
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM directories WHERE path = ?", (key,))
+                self._conn.execute("DELETE FROM entries WHERE dir_path = ?", (key,))
+
+    def clear(self):
+        """Forget every stored listing."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM directories")
+                self._conn.execute("DELETE FROM entries")
+
+    def scan_directory(self, directory_path, include_files=True, include_folders=False, entry_filter=None):
+        """
+        List the immediate children of a folder, reusing the stored listing when possible.
+
+        Args:
+            directory_path (str): Folder to list
+            include_files (bool): Whether to include regular files
+            include_folders (bool): Whether to include folders
+            entry_filter (callable): Predicate applied to each entry before it is kept
+
+        Returns:
+            list: List of ScanEntry records sorted by name
+        """
+        entries = []
+        for name, kind, _ in self._listing(directory_path):
+            if kind == KIND_DIR:
+                if not include_folders:
+                    continue
+            elif not (include_files and kind == KIND_FILE):
+                continue
+            entry = ScanEntry(name, os.path.join(directory_path, name), kind == KIND_DIR)
+            if entry_filter is None or entry_filter(entry):
+                entries.append(entry)
+        return entries
+
+    def list_item_paths(self, directory_path, include_folders=False, recursive=False, entry_filter=None):
+        """
+        Get the paths of the files (and optionally folders) inside a folder.
+
+        Args:
+            directory_path (str): Folder to list
+            include_folders (bool): Whether to include folders
+            recursive (bool): Whether to include the contents of subfolders
+            entry_filter (callable): Predicate applied to each entry before it is kept
+
+        Returns:
+            list: List of full paths
+        """
+        if recursive:
+            entries = self.scan_tree(directory_path, include_folders=include_folders, entry_filter=entry_filter)
+        else:
+            entries = self.scan_directory(directory_path, include_folders=include_folders,
+                                          entry_filter=entry_filter)
+        return [entry.path for entry in entries]
+
+    def list_subfolders(self, directory_path):
+        """
+        Get the immediate subfolders of a folder.
+
+        Returns:
+            list: List of ScanEntry records for folders only
+        """
+        return self.scan_directory(directory_path, include_files=False, include_folders=True)
+
+    def _walk(self, root, max_depth, exclude_dirs, include_files=True, include_folders=True, entry_filter=None):
+        """
+        Breadth-first walk yielding (dir_path, dirs, files, others) from stored listings.
+
+        Entries rejected by the include flags or ``entry_filter`` are dropped while
+        each listing is read and never kept; rejected folders are still descended into.
+        """
+        if max_depth is not None and max_depth < 1:
+            return
+        is_excluded = compile_dir_excludes(exclude_dirs)
+        root_len = len(os.path.join(root, ''))
+        queue = deque([(root, 0)])
+
+        while queue:
+            dir_path, depth = queue.popleft()
+            dirs, files, others = [], [], []
+            for name, kind, is_symlink in self._listing(dir_path):
+                path = os.path.join(dir_path, name)
+                if kind == KIND_DIR:
+                    if is_excluded is not None and is_excluded(name, path[root_len:].replace(os.sep, '/')):
+                        continue
+                    if not is_symlink and (max_depth is None or depth + 1 < max_depth):
+                        queue.append((path, depth + 1))
+                    if not include_folders:
+                        continue
+                    kept = dirs
+                elif not include_files:
+                    continue
+                else:
+                    kept = files if kind == KIND_FILE else others
+                entry = ScanEntry(name, path, kind == KIND_DIR)
+                if entry_filter is None or entry_filter(entry):
+                    kept.append(entry)
+            yield dir_path, dirs, files, others
+
+    def walk(self, root, max_depth=None, exclude_dirs=None, include_files=True, include_folders=True,
+             entry_filter=None):
+        """
+        Walk a tree breadth-first, relisting only folders whose mtime changed.
+
+        Accepts the same arguments as ``scanner.walk_tree`` and yields the same
+        (dir_path, dirs, files) tuples, always in sorted order.
+        """
+        for dir_path, dirs, files, others in self._walk(root, max_depth, exclude_dirs, include_files,
+                                                        include_folders, entry_filter):
+            yield dir_path, dirs, files + others if others else files
+
+    def scan_tree(self, root, include_files=True, include_folders=False, max_depth=None, exclude_dirs=None,
+                  entry_filter=None):
+        """
+        Recursively yield entries below a folder using stored listings where valid.
+
+        Yields:
+            ScanEntry: One record per matching entry, in sorted breadth-first order
+        """
+        for _, dirs, files, _ in self._walk(root, max_depth, exclude_dirs, include_files, include_folders,
+                                            entry_filter):
+            for entry in dirs:
+                yield entry
+            for entry in files:
+                yield entry
@@ -1,11 +1,27 @@
 import os
 import json
+import shutil
 from pathlib import Path
 
+# Application folder (the one holding src/); its config/ folder keeps the bundled
+# defaults and the per-user state (settings, catalog, journal) side by side
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(APP_DIR, 'config')
+CATALOG_FILE = os.path.join(CONFIG_DIR, 'catalog.sqlite3')
+JOURNAL_FILE = os.path.join(CONFIG_DIR, 'journal.jsonl')
+
+# Bundled defaults shipped with the application (config/default_config.json)
+DEFAULT_OPTIONS_FILE = os.path.join(CONFIG_DIR, 'default_config.json')
+
+# Earlier versions kept settings.json one folder above the application
+_LEGACY_SETTINGS_FILE = os.path.join(os.path.dirname(APP_DIR), 'config', 'settings.json')
+
 class ConfigManager:
     def __init__(self):
-        self.config_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'config')
+        self.config_dir = CONFIG_DIR
         self.config_file = os.path.join(self.config_dir, 'settings.json')
+        self.catalog_file = CATALOG_FILE
+        self.journal_file = JOURNAL_FILE
         self.ensure_config_exists()
 
     def ensure_config_exists(self):
@@ -13,6 +29,10 @@ class ConfigManager:
         if not os.path.exists(self.config_dir):
             os.makedirs(self.config_dir)
         
+        if not os.path.exists(self.config_file) and os.path.isfile(_LEGACY_SETTINGS_FILE):
+            # Keep the API keys and choices saved where earlier versions put them
+            shutil.copy2(_LEGACY_SETTINGS_FILE, self.config_file)
+        
         if not os.path.exists(self.config_file):
             default_settings = {
                 "api_keys": {
@@ -47,6 +67,23 @@ class ConfigManager:
             print(f"Error saving config: {e}")
             return False
 
+    def load_defaults(self):
+        """Load the bundled default options, or an empty dict if they are unavailable."""
+        if not hasattr(self, '_defaults'):
+            try:
+                with open(DEFAULT_OPTIONS_FILE, 'r') as f:
+                    self._defaults = json.load(f)
+            except (OSError, ValueError):
+                self._defaults = {}
+        return self._defaults
+
+    def get_option(self, key, default=None):
+        """Get an option from the user settings, falling back to the bundled defaults."""
+        config = self.load_config()
+        if key in config:
+            return config[key]
+        return self.load_defaults().get(key, default)
+
     def get_api_key(self, provider):
         """Get API key for a specific provider."""
         config = self.load_config()
@@ -72,3 +109,11 @@ class ConfigManager:
             config["selected_models"] = {}
         config["selected_models"][provider] = model
         return self.save_config(config)
+
+    def get_catalog_path(self):
+        """Get the path of the directory catalog database."""
+        return self.catalog_file
+
+    def get_journal_path(self):
+        """Get the path of the rename journal used for undo and crash recovery."""
+        return self.journal_file
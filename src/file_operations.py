@@ -1,49 +1,80 @@
 import os
 import shutil
-from src.rename_utils import generate_new_name
+import logging
+from src.rename_utils import generate_new_names
+from src.stat_cache import StatCache
+from src.plan_executor import execute_moves, SKIP_CANCELLED
+from src.plan_validator import validate_moves
+from src.outcomes import Outcome, OutcomeSummary, OUTCOME_SKIPPED, OUTCOME_CONFLICT, log_outcome
 
-def rename_files(file_paths, prefix_format, use_order=False):
+logger = logging.getLogger(__name__)
+
+def rename_files(file_paths, prefix_format, use_order=False, stat_cache=None, batch=None, progress=None,
+                 cancel=None, summary=None):
     """
     Rename files or folders using the specified prefix format.
     
+    The renames are ordered so that chains and swaps (e.g. renumbering
+    1 → 2, 2 → 3) succeed in one pass instead of hitting names that are
+    about to be freed. The whole set is validated first; items whose new
+    name clashes, is too long or is invalid are skipped before anything is
+    renamed, as apply_plan does with ``skip_conflicts``.
+    
     Args:
         file_paths (list): List of file or folder paths to rename
         prefix_format (str): Format string for the new names
-        use_order (bool): Whether to include order numbers
+        use_order (bool): Whether to include order numbers (zero-padded to one width)
+        stat_cache (StatCache): Metadata cache for this operation (a fresh one is used if omitted)
+        batch (JournalBatch): Journal batch the renames are recorded in (not journaled if omitted)
+        progress (ProgressReporter): Receives one step per renamed item
+        cancel (CancellationToken): Stops before the next rename when set; items not reached keep their path
+        summary (OutcomeSummary): Receives an Outcome per item (if omitted, problems are
+            logged as one summary warning)
         
     Returns:
         list: List of new file paths
     """
-    new_paths = []
+    new_paths = list(file_paths)  # Items that are not renamed keep their original path
+    if stat_cache is None:
+        stat_cache = StatCache()
+    own_summary = summary is None
+    if own_summary:
+        summary = OutcomeSummary()
     
+    # All names are built in one batch so the order numbers share one width
+    new_names = generate_new_names([os.path.basename(path) for path in file_paths], prefix_format, use_order)
+    moves = []
+    move_items = []
     for i, path in enumerate(file_paths):
-        if not os.path.exists(path):
-            print(f"Warning: Path does not exist: {path}")
-            new_paths.append(path)  # Keep original path in result
-            continue
-            
-        directory = os.path.dirname(path)
-        filename = os.path.basename(path)
-        
-        # Generate new name with or without order number
-        order_value = i + 1 if use_order else None
-        new_name = generate_new_name(filename, prefix_format, order_value)
-        
-        # Create the new path
-        new_path = os.path.join(directory, new_name)
-        
-        # Handle name collision
-        if os.path.exists(new_path) and new_path != path:
-            print(f"Warning: '{new_name}' already exists. Skipping rename for '{filename}'")
-            new_paths.append(path)  # Keep original path in result
+        if not stat_cache.exists(path):
+            outcome = Outcome(OUTCOME_SKIPPED, 'rename', path, reason='path does not exist')
+            log_outcome(logger, outcome)
+            summary.add(outcome)
             continue
             
-        try:
-            os.rename(path, new_path)
-            new_paths.append(new_path)
-        except Exception as e:
-            print(f"Error renaming '{filename}' to '{new_name}': {str(e)}")
-            new_paths.append(path)  # Keep original path in result
+        moves.append((path, os.path.join(os.path.dirname(path), new_names[i])))
+        move_items.append(i)
+    
+    report = validate_moves(moves)
+    if report.has_conflicts:
+        for conflict in report.conflicts:
+            summary.add(Outcome(OUTCOME_CONFLICT, 'rename', conflict.path, conflict.target, conflict.kind))
+        conflicting = report.conflicting_indexes()
+        kept = [move for move in range(len(moves)) if move not in conflicting]
+        moves = [moves[move] for move in kept]
+        move_items = [move_items[move] for move in kept]
+    
+    report = execute_moves(moves, stat_cache, batch, progress=progress, cancel=cancel)
+    
+    for move, i in enumerate(move_items):
+        if move in report.renamed:
+            new_paths[i] = report.renamed[move]
+        if report.skipped.get(move) != SKIP_CANCELLED:
+            outcome = report.outcome(moves, move)
+            log_outcome(logger, outcome)
+            summary.add(outcome)
+    if own_summary:
+        summary.log(logger)
             
     return new_paths
 
@@ -10,14 +10,39 @@ Date: 2025-02-27 01:10:48
 '''
 
 import os
-import shutil
+import uuid
+import logging
+try:
+    from src.scanner import list_subfolders, scan_directory, walk_tree
+    from src.stat_cache import StatCache
+    from src.journal import JournalBatch
+    from src.progress import ProgressReporter, CancellationToken
+    from src.outcomes import (Outcome, OutcomeSummary, OUTCOME_OK, OUTCOME_SKIPPED, OUTCOME_CONFLICT,
+                              log_outcome)
+except ImportError:
+    from scanner import list_subfolders, scan_directory, walk_tree
+    from stat_cache import StatCache
+    from journal import JournalBatch
+    from progress import ProgressReporter, CancellationToken
+    from outcomes import Outcome, OutcomeSummary, OUTCOME_OK, OUTCOME_SKIPPED, OUTCOME_CONFLICT, log_outcome
 
-def identify_redundant_folders(directory_path):
+logger = logging.getLogger(__name__)
+
+def _record(summary, outcome):
+    log_outcome(logger, outcome)
+    if summary is not None:
+        summary.add(outcome)
+    elif not outcome.ok:
+        # A standalone call has no summary to report to
+        logger.warning("%s", outcome)
+
+def identify_redundant_folders(directory_path, catalog=None):
     """
     Identify folders that contain exactly one subfolder and no files.
     
     Args:
         directory_path (str): Path to the directory to scan
+        catalog (DirectoryCatalog): Optional catalog used to reuse unchanged folder listings
         
     Returns:
         list: List of tuples (parent_folder_path, child_folder_path)
@@ -27,8 +52,12 @@ def identify_redundant_folders(directory_path):
     if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
         return redundant_folders
         
-    # Walk through all folders in the directory
-    for root, dirs, files in os.walk(directory_path):
+    # Walk through all folders in the directory (parents before children)
+    if catalog is not None:
+        walker = catalog.walk(directory_path)
+    else:
+        walker = walk_tree(directory_path, ordered=True)
+    for root, dirs, files in walker:
         # Skip if this is the root directory itself
         if root == directory_path:
             continue
@@ -36,114 +65,175 @@ def identify_redundant_folders(directory_path):
         # Check if this folder contains exactly one subfolder and no files
         if len(dirs) == 1 and len(files) == 0:
             parent_folder = root
-            child_folder = os.path.join(root, dirs[0])
+            child_folder = dirs[0].path
             redundant_folders.append((parent_folder, child_folder))
             
     return redundant_folders
 
-def collapse_folder(parent_folder, child_folder):
+def collapse_folder(parent_folder, child_folder, stat_cache=None, batch=None, new_name=None, summary=None):
     """
     Collapse a redundant folder structure by moving the contents of the child folder
     to the parent folder and renaming the parent folder.
     
+    Everything is done with renames, so nothing is copied or deleted: the
+    contents keep their identity and the batch can be undone.
+    
     Args:
         parent_folder (str): Path to the parent folder
         child_folder (str): Path to the child folder
+        stat_cache (StatCache): Metadata cache shared by the surrounding operation
+        batch (JournalBatch): Journal batch the changes are recorded in
+        new_name (str): Name for the collapsed folder from a saved plan; it must be free
+        summary (OutcomeSummary): Receives the Outcome (if omitted, a problem is logged as a warning)
         
     Returns:
         str: Path to the renamed parent folder if successful, None otherwise
     """
+    if stat_cache is None:
+        stat_cache = StatCache()
+    if batch is None:
+        batch = JournalBatch()
     try:
         parent_name = os.path.basename(parent_folder)
         child_name = os.path.basename(child_folder)
         
+        # Refuse rather than overwrite if the parent gained other items since it was scanned
+        siblings = set(entry.name for entry in scan_directory(parent_folder, include_folders=True))
+        siblings.discard(child_name)
+        clashes = [entry.name for entry in scan_directory(child_folder, include_folders=True)
+                   if entry.name in siblings]
+        if clashes:
+            _record(summary, Outcome(OUTCOME_CONFLICT, 'collapse', parent_folder, child_folder,
+                                     'would overwrite existing items', detail=', '.join(clashes)))
+            return None
+        
         # Create the new folder name by concatenating parent and child names
-        new_name = f"{parent_name}_{child_name}"
+        planned = new_name is not None
+        if not planned:
+            new_name = f"{parent_name}_{child_name}"
         parent_dir = os.path.dirname(parent_folder)
         new_path = os.path.join(parent_dir, new_name)
         
         # Check if the new path already exists
-        if os.path.exists(new_path):
+        if planned and stat_cache.exists(new_path):
+            _record(summary, Outcome(OUTCOME_CONFLICT, 'collapse', parent_folder, new_path, 'target exists'))
+            return None
+        if stat_cache.exists(new_path):
             # Generate a unique name by adding a suffix
             counter = 1
-            while os.path.exists(f"{new_path}_{counter}"):
+            while stat_cache.exists(f"{new_path}_{counter}"):
                 counter += 1
             new_path = f"{new_path}_{counter}"
         
         # First, rename the parent folder
-        os.rename(parent_folder, new_path)
+        batch.rename(parent_folder, new_path)
+        stat_cache.record_rename(parent_folder, new_path)
         
         # Get the updated child folder path after parent was renamed
         updated_child_path = os.path.join(new_path, child_name)
         
+        # An item inside the child may share the child's name; move the child
+        # aside first so that item can take its place
+        holder = updated_child_path
+        if stat_cache.exists(os.path.join(updated_child_path, child_name)):
+            holder = os.path.join(new_path, f".renamer_tmp_{uuid.uuid4().hex[:12]}")
+            batch.rename(updated_child_path, holder)
+            stat_cache.record_rename(updated_child_path, holder)
+        
         # Move all contents from the child folder to the renamed parent folder
-        for item in os.listdir(updated_child_path):
-            item_path = os.path.join(updated_child_path, item)
-            dest_path = os.path.join(new_path, item)
-            
-            # If the destination already exists, handle it
-            if os.path.exists(dest_path):
-                if os.path.isfile(dest_path):
-                    os.remove(dest_path)
-                elif os.path.isdir(dest_path):
-                    shutil.rmtree(dest_path)
-                    
-            # Move the item
-            shutil.move(item_path, new_path)
+        for entry in scan_directory(holder, include_folders=True):
+            dest_path = os.path.join(new_path, entry.name)
+            batch.rename(entry.path, dest_path)
+            stat_cache.record_rename(entry.path, dest_path)
         
-        # Remove the empty child folder
-        shutil.rmtree(updated_child_path)
+        # Remove the now empty child folder
+        batch.rmdir(holder)
+        stat_cache.record_removal(holder)
         
+        _record(summary, Outcome(OUTCOME_OK, 'collapse', parent_folder, new_path))
         return new_path
     except Exception as e:
-        print(f"Error collapsing folder: {e}")
+        _record(summary, Outcome.from_error('collapse', parent_folder, None, e))
         return None
 
-def collapse_redundant_folders(directory_path, recursive=True):
+def collapse_redundant_folders(directory_path, recursive=True, batch=None, progress=None, cancel=None,
+                               summary=None):
     """
     Identify and collapse all redundant folders in a directory.
     
     Args:
         directory_path (str): Path to the directory to process
         recursive (bool): Whether to recursively process collapsed folders again
+        batch (JournalBatch): Journal batch the changes are recorded in
+        progress (ProgressReporter): Receives one step per folder; the total grows with each pass
+        cancel (CancellationToken): Stops before the next folder when set
+        summary (OutcomeSummary): Receives an Outcome per folder (if omitted, problems are
+            logged as one summary warning)
         
     Returns:
-        list: List of collapsed folder paths
+        list: List of collapsed folder paths (those done before a cancellation)
     """
     collapsed_folders = []
+    stat_cache = StatCache()
+    own_summary = summary is None
+    if own_summary:
+        summary = OutcomeSummary()
+    if progress is None:
+        progress = ProgressReporter()
+    if cancel is None:
+        cancel = CancellationToken()
+    progress.start(0)
     
     # Continue processing until no more redundant folders are found
     # or if not recursive, just do one pass
-    while True:
+    while not cancel.cancelled:
         redundant_folders = identify_redundant_folders(directory_path)
         
         if not redundant_folders:
             break
+        progress.add_total(len(redundant_folders))
             
         for parent_folder, child_folder in redundant_folders:
-            new_path = collapse_folder(parent_folder, child_folder)
+            if cancel.cancelled:
+                break
+            new_path = collapse_folder(parent_folder, child_folder, stat_cache, batch, summary=summary)
             if new_path:
                 collapsed_folders.append(new_path)
+            progress.advance()
                 
         if not recursive:
             break
     
+    progress.finish()
+    if own_summary:
+        summary.log(logger)
     return collapsed_folders
 
-def uncollapse_folder(folder_path):
+def uncollapse_folder(folder_path, stat_cache=None, batch=None, summary=None):
     """
     Uncollapse a folder by splitting its name at underscores and creating nested folders.
     
+    The outer levels are created empty and the folder itself is then moved
+    into place as the innermost level, so its contents are never copied.
+    
     Args:
         folder_path (str): Path to the folder to uncollapse
+        stat_cache (StatCache): Metadata cache shared by the surrounding operation
+        batch (JournalBatch): Journal batch the changes are recorded in
+        summary (OutcomeSummary): Receives the Outcome (if omitted, a problem is logged as a warning)
         
     Returns:
         str: Path to the outermost folder if successful, None otherwise
     """
+    if stat_cache is None:
+        stat_cache = StatCache()
+    if batch is None:
+        batch = JournalBatch()
+    created = []
     try:
         # Skip if the path doesn't exist or isn't a directory
-        if not os.path.exists(folder_path) or not os.path.isdir(folder_path):
-            print(f"Cannot uncollapse: {folder_path} is not a valid directory")
+        if not stat_cache.isdir(folder_path):
+            _record(summary, Outcome(OUTCOME_SKIPPED, 'uncollapse', folder_path, reason='not a valid directory'))
             return None
             
         folder_name = os.path.basename(folder_path)
@@ -161,133 +251,93 @@ def uncollapse_folder(folder_path):
         if not name_parts:
             return folder_path
             
-        # Generate unique names for each level to avoid conflicts
+        # Generate a unique name for the outermost level to avoid conflicts
         base_folder_name = name_parts[0]
         unique_base_name = base_folder_name
         counter = 1
-        while os.path.exists(os.path.join(parent_dir, unique_base_name)) and os.path.join(parent_dir, unique_base_name) != folder_path:
+        while stat_cache.exists(os.path.join(parent_dir, unique_base_name)) and os.path.join(parent_dir, unique_base_name) != folder_path:
             unique_base_name = f"{base_folder_name}_{counter}"
             counter += 1
-            
-        # Create a temporary folder for the uncollapsed structure
-        temp_path = os.path.join(parent_dir, f"temp_{os.path.basename(folder_path)}_{os.urandom(4).hex()}")
-        os.makedirs(temp_path, exist_ok=True)
-        
-        # Create the nested structure inside the temp path
-        current_path = temp_path
-        for i, part in enumerate(name_parts):
-            new_folder = os.path.join(current_path, part)
-            os.makedirs(new_folder, exist_ok=True)
-            current_path = new_folder
-            
-        # The innermost folder is where we'll move all content
-        innermost_folder = current_path
-        
-        # Copy all contents from original folder to the innermost folder
-        for item in os.listdir(folder_path):
-            source_path = os.path.join(folder_path, item)
-            dest_path = os.path.join(innermost_folder, item)
-            
-            if os.path.isfile(source_path):
-                shutil.copy2(source_path, dest_path)
-            elif os.path.isdir(source_path):
-                shutil.copytree(source_path, dest_path)
-        
-        # Create the actual base folder with the unique name
         target_base_folder = os.path.join(parent_dir, unique_base_name)
         
-        # If the folder_path is already the base folder name, we need to move contents out first
-        if os.path.basename(folder_path) == unique_base_name:
-            # Create a temporary path to hold the original folder's contents
-            temp_hold = os.path.join(parent_dir, f"temphold_{os.urandom(4).hex()}")
-            os.makedirs(temp_hold, exist_ok=True)
-            
-            # Move contents to temp hold
-            for item in os.listdir(folder_path):
-                shutil.move(os.path.join(folder_path, item), os.path.join(temp_hold, item))
-                
-            # Now remove the original folder and recreate it
-            shutil.rmtree(folder_path)
-            os.makedirs(target_base_folder, exist_ok=True)
-            
-            # Move contents back
-            for item in os.listdir(temp_hold):
-                shutil.move(os.path.join(temp_hold, item), os.path.join(target_base_folder, item))
-                
-            # Remove temp hold
-            shutil.rmtree(temp_hold)
+        if len(name_parts) == 1:
+            # Nothing to nest (e.g. "name_"): the folder just takes the base name
+            innermost_folder = target_base_folder
         else:
-            # Simply remove the original folder and create the new structure
-            shutil.rmtree(folder_path)
-            os.makedirs(target_base_folder, exist_ok=True)
-        
-        # Now copy the structure from temp to the actual location
-        current_source = os.path.join(temp_path, name_parts[0])
-        current_target = target_base_folder
-        
-        # For the remaining parts, create each level
-        for i in range(1, len(name_parts)):
-            next_part = name_parts[i]
-            next_source = os.path.join(current_source, next_part)
-            next_target = os.path.join(current_target, next_part)
-            
-            # Create the directory at the target
-            os.makedirs(next_target, exist_ok=True)
-            
-            # Copy all items from the next_source to next_target
-            if i == len(name_parts) - 1:  # At the innermost folder
-                for item in os.listdir(next_source):
-                    source_item = os.path.join(next_source, item)
-                    target_item = os.path.join(next_target, item)
-                    
-                    if os.path.isfile(source_item):
-                        shutil.copy2(source_item, target_item)
-                    elif os.path.isdir(source_item):
-                        shutil.copytree(source_item, target_item)
-            
-            current_source = next_source
-            current_target = next_target
-            
-        # Finally, remove the temp folder
-        shutil.rmtree(temp_path)
+            # Create the outer levels; the folder itself becomes the innermost one
+            current_path = parent_dir
+            for part in [unique_base_name] + name_parts[1:-1]:
+                current_path = os.path.join(current_path, part)
+                batch.mkdir(current_path)
+                stat_cache.record_creation(current_path, is_dir=True)
+                created.append(current_path)
+            innermost_folder = os.path.join(current_path, name_parts[-1])
+        batch.rename(folder_path, innermost_folder)
+        stat_cache.record_rename(folder_path, innermost_folder)
         
         # Return the path to the newly created structure
+        _record(summary, Outcome(OUTCOME_OK, 'uncollapse', folder_path, innermost_folder))
         return target_base_folder
         
     except Exception as e:
-        print(f"Error uncollapsing folder: {e}")
+        _record(summary, Outcome.from_error('uncollapse', folder_path, None, e))
+        # Don't leave empty half-built levels behind
+        for path in reversed(created):
+            try:
+                batch.rmdir(path)
+                stat_cache.record_removal(path)
+            except OSError:
+                pass
         return None
 
-def uncollapse_folders(directory_path, min_parts=2):
+def uncollapse_folders(directory_path, min_parts=2, batch=None, progress=None, cancel=None, summary=None):
     """
     Find and uncollapse folders in a directory based on underscore separators.
     
     Args:
         directory_path (str): Path to the directory to process
         min_parts (int): Minimum number of parts in the name to consider uncollapsing
+        batch (JournalBatch): Journal batch the changes are recorded in
+        progress (ProgressReporter): Receives one step per folder checked
+        cancel (CancellationToken): Stops before the next folder when set
+        summary (OutcomeSummary): Receives an Outcome per folder (if omitted, problems are
+            logged as one summary warning)
         
     Returns:
         list: List of uncollapsed folder paths (outermost folders)
     """
     uncollapsed_folders = []
+    stat_cache = StatCache()
+    own_summary = summary is None
+    if own_summary:
+        summary = OutcomeSummary()
+    if progress is None:
+        progress = ProgressReporter()
+    if cancel is None:
+        cancel = CancellationToken()
     
     # Skip if the path doesn't exist or isn't a directory
-    if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
+    if not stat_cache.isdir(directory_path):
         return uncollapsed_folders
     
     # Get all immediate subfolders
-    folders = [os.path.join(directory_path, item) 
-              for item in os.listdir(directory_path) 
-              if os.path.isdir(os.path.join(directory_path, item))]
+    folders = [entry.path for entry in list_subfolders(directory_path)]
+    progress.start(len(folders))
     
     # Process each folder
     for folder in folders:
+        if cancel.cancelled:
+            break
         folder_name = os.path.basename(folder)
         
         # Check if the folder name has enough parts to uncollapse
         if len(folder_name.split('_')) >= min_parts:
-            result = uncollapse_folder(folder)
+            result = uncollapse_folder(folder, stat_cache, batch, summary)
             if result:
                 uncollapsed_folders.append(result)
+        progress.advance()
                 
+    progress.finish()
+    if own_summary:
+        summary.log(logger)
     return uncollapsed_folders
@@ -0,0 +1,530 @@
+import os
+import json
+import time
+import uuid
+import threading
+
+try:
+    from src.config_manager import JOURNAL_FILE
+except ImportError:
+    from config_manager import JOURNAL_FILE
+
+OP_MOVE = 'move'
+OP_MKDIR = 'mkdir'
+OP_RMDIR = 'rmdir'
+
+BATCH_OPEN = 'open'
+BATCH_COMMITTED = 'committed'
+BATCH_ROLLED_BACK = 'rolled back'
+
+UNDO = 'undo'
+REDO = 'redo'
+RECOVER = 'recover'
+
+# Records are flushed one by one and fsynced in groups of this size
+DEFAULT_SYNC_EVERY = 64
+
+# Committed operations kept for undo/redo when the journal is compacted
+DEFAULT_HISTORY_LIMIT = 50
+
+def _same_item(path, other):
+    """Whether two paths name the same item (e.g. a case-only rename on a case-insensitive system)."""
+    try:
+        return os.path.samefile(path, other)
+    except OSError:
+        return False
+
+def _list_names(directory_path):
+    try:
+        return set(os.listdir(directory_path or os.curdir))
+    except OSError:
+        return set()
+
+class JournalOp:
+    """
+    One filesystem change recorded in a batch.
+
+    Attributes:
+        seq (int): Position of the change in its batch
+        kind (str): OP_MOVE, OP_MKDIR or OP_RMDIR
+        src (str): Path moved from (the folder created or removed for OP_MKDIR/OP_RMDIR)
+        dst (str): Path moved to (None for folder operations)
+        final (str): For a move to a temporary name, the name the item was headed for
+        failed (str): Error message if the change did not happen
+    """
+    __slots__ = ('seq', 'kind', 'src', 'dst', 'final', 'failed')
+
+    def __init__(self, seq, kind, src, dst=None, final=None):
+        self.seq = seq
+        self.kind = kind
+        self.src = src
+        self.dst = dst
+        self.final = final
+        self.failed = None
+
+    def inverse(self):
+        """Get the change that reverts this one, as (kind, src, dst)."""
+        if self.kind == OP_MOVE:
+            return OP_MOVE, self.dst, self.src
+        if self.kind == OP_MKDIR:
+            return OP_RMDIR, self.src, None
+        return OP_MKDIR, self.src, None
+
+    def is_applied(self):
+        """Check on disk whether this change took effect."""
+        if self.kind == OP_MOVE:
+            if _same_item(self.src, self.dst):
+                # Both names reach the item (a case-only rename on a case-insensitive
+                # system), so the name stored in the folder tells whether it happened
+                names = _list_names(os.path.dirname(self.dst))
+                return os.path.basename(self.dst) in names and os.path.basename(self.src) not in names
+            return os.path.lexists(self.dst) and not os.path.lexists(self.src)
+        if self.kind == OP_MKDIR:
+            return os.path.isdir(self.src)
+        return not os.path.lexists(self.src)
+
+    def __repr__(self):
+        return f"JournalOp({self.seq}, {self.kind}: {self.src!r} -> {self.dst!r})"
+
+class BatchRecord:
+    """
+    A batch as read back from the journal.
+
+    Attributes:
+        id (str): Batch identifier
+        operation (str): What the batch did ("rename", "collapse", UNDO, ...)
+        description (str): Human-readable summary given when the batch began
+        target (str): For UNDO/REDO/RECOVER batches, the batch they replayed
+        started (float): Start time (seconds since the epoch)
+        ops (list): JournalOp records in the order they were issued
+        state (str): BATCH_OPEN, BATCH_COMMITTED or BATCH_ROLLED_BACK
+    """
+
+    def __init__(self, batch_id, operation, description='', target=None, started=0.0):
+        self.id = batch_id
+        self.operation = operation
+        self.description = description
+        self.target = target
+        self.started = started
+        self.ops = []
+        self.state = BATCH_OPEN
+
+    def applied_ops(self):
+        """Get the ops that did not fail, in the order they were issued."""
+        return [op for op in self.ops if op.failed is None]
+
+    def describe(self):
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.started))
+        text = f"{self.operation} ({when}, {len(self.applied_ops())} changes)"
+        if self.description:
+            text += f": {self.description}"
+        return text
+
+class ReplayReport:
+    """
+    Outcome of an undo, redo or recovery.
+
+    Attributes:
+        batch (BatchRecord): The batch that was replayed
+        applied (int): Number of changes carried out
+        problems (list): Messages for changes that could not be carried out
+    """
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.applied = 0
+        self.problems = []
+
+class JournalBatch:
+    """
+    Carries out filesystem changes, recording each one before it happens.
+
+    A batch created without a journal performs the same changes without
+    recording them, so operations can take a batch unconditionally.
+    Use it as a context manager: leaving the block normally commits the
+    batch, while an exception after the first change leaves it open for
+    startup recovery.
+    """
+
+    def __init__(self, journal=None, batch_id=None, operation=None):
+        self.journal = journal
+        self.id = batch_id
+        self.operation = operation
+        self.seq = 0
+        self.closed = False
+        # Shards of a parallel apply share the batch
+        self._lock = threading.Lock()
+
+    def _log(self, record):
+        if self.journal is not None:
+            record['batch'] = self.id
+            self.journal._write(record)
+
+    def _intent(self, kind, src, dst=None, final=None):
+        record = {'type': kind, 'src': src}
+        if dst is not None:
+            record['dst'] = dst
+        if final is not None:
+            record['final'] = final
+        with self._lock:
+            seq = record['seq'] = self.seq
+            self.seq += 1
+            self._log(record)
+        return seq
+
+    def _run(self, seq, action, *args):
+        try:
+            action(*args)
+        except OSError as e:
+            self._log({'type': 'fail', 'seq': seq, 'error': str(e)})
+            raise
+
+    def rename(self, src, dst, final=None, engine=None):
+        """
+        Rename ``src`` to ``dst``.
+
+        Args:
+            src (str): Current path
+            dst (str): New path
+            final (str): When ``dst`` is a temporary name, where the item is headed
+                (lets recovery finish the move)
+            engine (RenameEngine): Engine issuing the rename (plain os.rename if omitted)
+
+        Raises:
+            OSError: If the rename fails (the failure is recorded)
+        """
+        rename = engine.rename if engine is not None else os.rename
+        self._run(self._intent(OP_MOVE, src, dst, final), rename, src, dst)
+
+    def mkdir(self, path):
+        """Create a folder (its parent must exist)."""
+        self._run(self._intent(OP_MKDIR, path), os.mkdir, path)
+
+    def rmdir(self, path):
+        """Remove an empty folder."""
+        self._run(self._intent(OP_RMDIR, path), os.rmdir, path)
+
+    def commit(self):
+        """Mark the batch as finished; its changes can now be undone as a unit."""
+        if not self.closed:
+            self.closed = True
+            self._log({'type': 'commit'})
+            if self.journal is not None:
+                self.journal.sync()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        # A batch that failed before changing anything has nothing to recover
+        if exc_type is None or self.seq == 0:
+            self.commit()
+        elif self.journal is not None:
+            self.journal.sync()
+        return False
+
+class Journal:
+    """
+    Append-only write-ahead log of the renames and folder changes made by the app.
+
+    Every change is written to the journal before it is made. Records are
+    JSON lines flushed to the OS one by one, so a crash of the program loses
+    nothing, while fsync is only called every ``sync_every`` records and when
+    a batch commits; after a power cut at most that many changes may be missing
+    from the journal.
+
+    Each user operation is one batch. Committed batches can be undone and redone
+    (the undo and redo are batches of their own, so they are crash-safe too), and
+    batches that never committed are found by ``incomplete()`` and finished or
+    rolled back with ``recover()``. ``compact()`` drops the batches beyond the
+    last ``history_limit`` undoable operations so the file stays small.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, sync_every=DEFAULT_SYNC_EVERY, history_limit=DEFAULT_HISTORY_LIMIT):
+        self.path = path
+        self.sync_every = max(1, int(sync_every))
+        self.history_limit = max(1, int(history_limit))
+        self._file = None
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            f = self._open()
+            f.write(line)
+            f.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                os.fsync(f.fileno())
+                self._unsynced = 0
+
+    def sync(self):
+        """Force the records written so far to disk."""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def begin(self, operation, description='', target=None):
+        """
+        Start a batch.
+
+        Args:
+            operation (str): What the batch does ("rename", "collapse", ...)
+            description (str): Human-readable summary shown by undo/redo
+            target (str): Batch replayed by an UNDO/REDO/RECOVER batch
+
+        Returns:
+            JournalBatch: The batch to carry out the changes through
+        """
+        batch_id = uuid.uuid4().hex[:12]
+        record = {'type': 'begin', 'batch': batch_id, 'operation': operation,
+                  'description': description, 'time': time.time()}
+        if target is not None:
+            record['target'] = target
+        self._write(record)
+        return JournalBatch(self, batch_id, operation)
+
+    def read(self):
+        """
+        Read every batch in the journal.
+
+        A torn last line (from a crash in the middle of a write) is ignored.
+
+        Returns:
+            list: BatchRecord objects in the order they began
+        """
+        if self._file is not None:
+            self._file.flush()
+        batches = {}
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return []
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    kind = record['type']
+                    batch_id = record['batch']
+                except (ValueError, TypeError, KeyError):
+                    continue
+                if kind == 'begin':
+                    batches[batch_id] = BatchRecord(batch_id, record.get('operation', ''),
+                                                    record.get('description', ''), record.get('target'),
+                                                    record.get('time', 0.0))
+                    continue
+                batch = batches.get(batch_id)
+                if batch is None:
+                    continue
+                if kind in (OP_MOVE, OP_MKDIR, OP_RMDIR):
+                    batch.ops.append(JournalOp(record['seq'], kind, record['src'], record.get('dst'),
+                                               record.get('final')))
+                elif kind == 'fail':
+                    for op in reversed(batch.ops):
+                        if op.seq == record['seq']:
+                            op.failed = record.get('error', '')
+                            break
+                elif kind == 'commit':
+                    batch.state = BATCH_COMMITTED
+                elif kind == 'rollback':
+                    batch.state = BATCH_ROLLED_BACK
+        return list(batches.values())
+
+    def history(self):
+        """
+        Work out what can be undone and redone.
+
+        Returns:
+            tuple: (undo stack, redo stack) of BatchRecord objects, most recent last
+        """
+        return self._stacks(self.read())
+
+    def _stacks(self, batches):
+        by_id = dict((batch.id, batch) for batch in batches)
+        undo_stack, redo_stack = [], []
+        for batch in batches:
+            if batch.state != BATCH_COMMITTED or batch.operation == RECOVER:
+                continue
+            target = by_id.get(batch.target)
+            if batch.operation == UNDO:
+                if target in undo_stack:
+                    undo_stack.remove(target)
+                    redo_stack.append(target)
+            elif batch.operation == REDO:
+                if target in redo_stack:
+                    redo_stack.remove(target)
+                    undo_stack.append(target)
+            elif batch.applied_ops():
+                undo_stack.append(batch)
+                redo_stack = []
+        return undo_stack, redo_stack
+
+    def compact(self):
+        """
+        Rewrite the journal without the batches that can no longer be undone or redone.
+
+        Kept are the batches that never finished (for recovery), the last
+        ``history_limit`` batches on the undo and on the redo stack, and the
+        undo/redo/recovery batches that replayed them, so ``history()`` gives
+        the same result afterwards. The new file replaces the old one in one
+        step, so a crash leaves either of them intact.
+
+        Returns:
+            int: Number of batches dropped
+        """
+        temp_path = self.path + '.tmp'
+        # Held throughout so no record is written between reading and replacing the file
+        with self._lock:
+            batches = self.read()
+            undo_stack, redo_stack = self._stacks(batches)
+            keep = set(batch.id for batch in batches if batch.state == BATCH_OPEN)
+            keep.update(batch.id for batch in undo_stack[-self.history_limit:])
+            keep.update(batch.id for batch in redo_stack[-self.history_limit:])
+            keep.update([batch.id for batch in batches
+                         if batch.operation in (UNDO, REDO, RECOVER) and batch.target in keep])
+            if len(keep) == len(batches):
+                return 0
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._unsynced = 0
+            with open(self.path, 'r', encoding='utf-8') as source, \
+                    open(temp_path, 'w', encoding='utf-8') as target:
+                for line in source:
+                    try:
+                        batch_id = json.loads(line)['batch']
+                    except (ValueError, TypeError, KeyError):
+                        continue
+                    if batch_id in keep:
+                        target.write(line if line.endswith('\n') else line + '\n')
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(temp_path, self.path)
+        return len(batches) - len(keep)
+
+    def incomplete(self):
+        """Get the batches that began but never committed or rolled back."""
+        return [batch for batch in self.read() if batch.state == BATCH_OPEN]
+
+    def undo(self):
+        """
+        Revert the most recent batch that has not been undone.
+
+        Returns:
+            ReplayReport: What was reverted, or None if there is nothing to undo
+        """
+        undo_stack, _ = self.history()
+        if not undo_stack:
+            return None
+        batch = undo_stack[-1]
+        steps = [op.inverse() for op in reversed(batch.applied_ops())]
+        return self._replay(batch, UNDO, steps)
+
+    def redo(self):
+        """
+        Carry out the most recently undone batch again.
+
+        Returns:
+            ReplayReport: What was redone, or None if there is nothing to redo
+        """
+        _, redo_stack = self.history()
+        if not redo_stack:
+            return None
+        batch = redo_stack[-1]
+        steps = [(op.kind, op.src, op.dst) for op in batch.applied_ops()]
+        return self._replay(batch, REDO, steps)
+
+    def recover(self, batch, roll_back=True):
+        """
+        Close a batch that was interrupted by a crash.
+
+        The changes up to the interruption are known from the journal. Changes
+        within a folder are made in order, so only the last recorded change
+        touching each folder may or may not have happened (several folders are
+        worked on at once by a parallel apply); those are checked on disk.
+        Rolling back reverts the changes. Otherwise they are kept, and items left under a
+        temporary name are moved on to the name they were headed for (or back
+        where they came from if that is taken).
+
+        Args:
+            batch (BatchRecord): A batch returned by ``incomplete()``
+            roll_back (bool): Revert the batch instead of keeping its changes
+
+        Returns:
+            ReplayReport: What was done to close the batch
+        """
+        ops = batch.applied_ops()
+        seen = set()
+        interrupted = set()
+        for op in reversed(ops):
+            folders = set([os.path.dirname(op.src), os.path.dirname(op.dst or op.src)])
+            if not folders & seen and not op.is_applied():
+                interrupted.add(op.seq)
+                self._write({'type': 'fail', 'batch': batch.id, 'seq': op.seq, 'error': 'interrupted'})
+            seen |= folders
+        ops = [op for op in ops if op.seq not in interrupted]
+
+        if roll_back:
+            report = self._replay(batch, RECOVER, [op.inverse() for op in reversed(ops)])
+            self._write({'type': 'rollback', 'batch': batch.id})
+            self.sync()
+            return report
+
+        # Temporary names that no later change moved away again
+        parked = {}
+        for op in ops:
+            if op.kind != OP_MOVE:
+                continue
+            parked.pop(op.src, None)
+            if op.final:
+                parked[op.dst] = op
+        steps = [(OP_MOVE, op.dst, op.src if os.path.lexists(op.final) else op.final)
+                 for op in parked.values()]
+
+        # The finishing moves belong to the interrupted batch, so undoing it reverts them too
+        resumed = JournalBatch(self, batch.id, batch.operation)
+        resumed.seq = max(op.seq for op in batch.ops) + 1 if batch.ops else 0
+        report = ReplayReport(batch)
+        with resumed:
+            self._apply_steps(resumed, steps, report)
+        return report
+
+    def _replay(self, batch, operation, steps):
+        report = ReplayReport(batch)
+        with self.begin(operation, batch.description, target=batch.id) as replay:
+            self._apply_steps(replay, steps, report)
+        return report
+
+    def _apply_steps(self, replay, steps, report):
+        for kind, src, dst in steps:
+            try:
+                if kind == OP_MOVE:
+                    if not os.path.lexists(src):
+                        report.problems.append(f"'{src}' no longer exists")
+                        continue
+                    if os.path.lexists(dst) and not _same_item(src, dst):
+                        report.problems.append(f"'{dst}' is in use; '{src}' was left in place")
+                        continue
+                    replay.rename(src, dst)
+                elif kind == OP_MKDIR:
+                    replay.mkdir(src)
+                else:
+                    replay.rmdir(src)
+                report.applied += 1
+            except OSError as e:
+                report.problems.append(f"{kind} '{src}': {e}")
@@ -8,22 +8,139 @@ __version__ = '1.5.0'
 # Add the parent directory to sys.path to enable imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import file operations
+# Import the rename helpers and the scanner
 try:
-    from src.file_operations import rename_files
-    from src.rename_utils import remove_prefix_and_order, generate_new_name, find_longest_common_prefix
+    from src.rename_utils import RegexRule, RegexRuleError
+    from src.scanner import scan_directory, scan_tree, list_subfolders
 except ImportError:
     try:
-        from file_operations import rename_files
-        from rename_utils import remove_prefix_and_order, generate_new_name, find_longest_common_prefix
+        from rename_utils import RegexRule, RegexRuleError
+        from scanner import scan_directory, scan_tree, list_subfolders
     except ImportError:
         # Final fallback for direct imports when running from src directory
-        import file_operations
         import rename_utils
-        rename_files = file_operations.rename_files
-        remove_prefix_and_order = rename_utils.remove_prefix_and_order
-        generate_new_name = rename_utils.generate_new_name
-        find_longest_common_prefix = rename_utils.find_longest_common_prefix
+        import scanner
+        RegexRule = rename_utils.RegexRule
+        RegexRuleError = rename_utils.RegexRuleError
+        scan_directory = scanner.scan_directory
+        scan_tree = scanner.scan_tree
+        list_subfolders = scanner.list_subfolders
+
+# Import the ordering helpers used for sequential numbering
+try:
+    from src.ordering import parse_ordering, sort_items
+except ImportError:
+    try:
+        from ordering import parse_ordering, sort_items
+    except ImportError:
+        import ordering
+        parse_ordering = ordering.parse_ordering
+        sort_items = ordering.sort_items
+
+# Import the streaming rename plan pipeline
+try:
+    from src.rename_plan import (stream_entries, build_plan, export_plan, apply_plan, validate_plan,
+                                 next_order_index, build_suggestion_plan, RenamePlan, STATUS_CONFLICT, STATUS_UNCHANGED,
+                                 STATUS_DONE)
+except ImportError:
+    try:
+        from rename_plan import (stream_entries, build_plan, export_plan, apply_plan, validate_plan,
+                                 next_order_index, build_suggestion_plan, RenamePlan, STATUS_CONFLICT, STATUS_UNCHANGED,
+                                 STATUS_DONE)
+    except ImportError:
+        import rename_plan
+        stream_entries = rename_plan.stream_entries
+        build_plan = rename_plan.build_plan
+        export_plan = rename_plan.export_plan
+        apply_plan = rename_plan.apply_plan
+        validate_plan = rename_plan.validate_plan
+        next_order_index = rename_plan.next_order_index
+        build_suggestion_plan = rename_plan.build_suggestion_plan
+        RenamePlan = rename_plan.RenamePlan
+        STATUS_CONFLICT = rename_plan.STATUS_CONFLICT
+        STATUS_UNCHANGED = rename_plan.STATUS_UNCHANGED
+        STATUS_DONE = rename_plan.STATUS_DONE
+
+# Import saved-plan export/import
+try:
+    from src.plan_io import (rename_items, collapse_items, export_items, import_plan,
+                             apply_imported_plan, PlanFormatError)
+except ImportError:
+    try:
+        from plan_io import (rename_items, collapse_items, export_items, import_plan,
+                             apply_imported_plan, PlanFormatError)
+    except ImportError:
+        import plan_io
+        rename_items = plan_io.rename_items
+        collapse_items = plan_io.collapse_items
+        export_items = plan_io.export_items
+        import_plan = plan_io.import_plan
+        apply_imported_plan = plan_io.apply_imported_plan
+        PlanFormatError = plan_io.PlanFormatError
+
+# Import the prefix cluster analysis used for prefix removal
+try:
+    from src.prefix_analysis import analyze_names
+except ImportError:
+    try:
+        from prefix_analysis import analyze_names
+    except ImportError:
+        import prefix_analysis
+        analyze_names = prefix_analysis.analyze_names
+
+# Import the naming template engine
+try:
+    from src.name_template import NameTemplate, TemplateError
+except ImportError:
+    try:
+        from name_template import NameTemplate, TemplateError
+    except ImportError:
+        import name_template
+        NameTemplate = name_template.NameTemplate
+        TemplateError = name_template.TemplateError
+
+# Import the outcome aggregation used for compact end-of-run reports
+try:
+    from src.outcomes import OutcomeSummary
+except ImportError:
+    try:
+        from outcomes import OutcomeSummary
+    except ImportError:
+        import outcomes
+        OutcomeSummary = outcomes.OutcomeSummary
+
+# Import the hot-folder watcher
+try:
+    from src.watcher import FolderWatcher, DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
+except ImportError:
+    try:
+        from watcher import FolderWatcher, DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
+    except ImportError:
+        import watcher
+        FolderWatcher = watcher.FolderWatcher
+        DEFAULT_DEBOUNCE = watcher.DEFAULT_DEBOUNCE
+        DEFAULT_POLL_INTERVAL = watcher.DEFAULT_POLL_INTERVAL
+
+# Import the persistent directory catalog used to speed up repeated previews
+try:
+    from src.catalog import DirectoryCatalog
+except ImportError:
+    try:
+        from catalog import DirectoryCatalog
+    except ImportError:
+        import catalog
+        DirectoryCatalog = catalog.DirectoryCatalog
+
+# Import the rename journal used for undo/redo and crash recovery
+try:
+    from src.journal import Journal, JournalBatch
+except ImportError:
+    try:
+        from journal import Journal, JournalBatch
+    except ImportError:
+        import journal
+        Journal = journal.Journal
+        JournalBatch = journal.JournalBatch
 
 # Add import for the folder operations
 try:
@@ -39,13 +156,16 @@ except ImportError:
 
 # Import UI components
 try:
-    from src.ui.interface import display_welcome_message as display_welcome, get_user_input, display_results, confirm_action
+    from src.ui.interface import (display_welcome_message as display_welcome, get_user_input, display_results,
+                                  confirm_action, run_with_progress)
 except ImportError:
     try:
-        from ui.interface import display_welcome_message as display_welcome, get_user_input, display_results, confirm_action
+        from ui.interface import (display_welcome_message as display_welcome, get_user_input, display_results,
+                                  confirm_action, run_with_progress)
     except ImportError:
         # Final fallback for direct imports
-        from interface import display_welcome_message as display_welcome, get_user_input, display_results, confirm_action
+        from interface import (display_welcome_message as display_welcome, get_user_input, display_results,
+                               confirm_action, run_with_progress)
 
 def display_version():
     """Display the current version of the application"""
@@ -66,15 +186,144 @@ def ensure_console_visible():
             except Exception as e:
                 print(f"Failed to allocate console: {e}")
 
-def get_items_to_rename(directory_path, include_folders=False):
+_catalog = None
+
+def get_catalog():
+    """Get the shared directory catalog, or None if it can't be opened"""
+    global _catalog
+    if _catalog is None:
+        try:
+            _catalog = DirectoryCatalog()
+        except Exception as e:
+            print(f"Directory catalog unavailable, scanning directly: {e}")
+            _catalog = False
+    return _catalog or None
+
+_journal = None
+
+def get_journal():
+    """Get the shared rename journal, or None if journaling is off or the journal can't be opened"""
+    global _journal
+    if _journal is None:
+        try:
+            from src.config_manager import ConfigManager
+            config_manager = ConfigManager()
+            options = config_manager.get_option("journal", {})
+            if not isinstance(options, dict):
+                options = {}
+            if options.get("enabled", True):
+                _journal = Journal(config_manager.get_journal_path(), options.get("sync_every", 64),
+                                   options.get("history_limit", 50))
+            else:
+                _journal = False
+        except Exception as e:
+            print(f"Rename journal unavailable, changes can't be undone: {e}")
+            _journal = False
+    return _journal or None
+
+def begin_batch(operation, description=''):
+    """Start a journal batch for an operation (an unrecorded batch if journaling is unavailable)"""
+    journal = get_journal()
+    if journal is None:
+        return JournalBatch()
+    return journal.begin(operation, description)
+
+def get_scan_filter(config_manager=None, supported_only=None):
+    """Build the configured scan filter (supported types, hidden files, include/exclude rules)"""
+    try:
+        if config_manager is None:
+            from src.config_manager import ConfigManager
+            config_manager = ConfigManager()
+        from src.scan_filter import load_scan_filter
+        return load_scan_filter(config_manager, supported_only)
+    except Exception as e:
+        print(f"Ignoring invalid scan filter settings: {e}")
+        return None
+
+def get_name_cleaner(config_manager=None):
+    """Build the configured prefix and order-number cleaning rules (the built-in rules if invalid)"""
+    try:
+        if config_manager is None:
+            from src.config_manager import ConfigManager
+            config_manager = ConfigManager()
+        from src.name_cleaner import load_name_cleaner
+        return load_name_cleaner(config_manager)
+    except Exception as e:
+        print(f"Ignoring invalid cleaning settings: {e}")
+        return None
+
+def get_output_format():
+    """Get the configured naming template (output_format), or "" if none is set"""
+    try:
+        from src.config_manager import ConfigManager
+        value = ConfigManager().get_option("output_format", "")
+    except Exception:
+        value = ""
+    return value if isinstance(value, str) else ""
+
+def get_default_ordering():
+    """Get the configured default ordering (e.g. "ascending", "mtime", "size_desc")"""
+    try:
+        from src.config_manager import ConfigManager
+        value = ConfigManager().get_option("default_ordering", "ascending")
+    except Exception:
+        value = "ascending"
+    return value if isinstance(value, str) else "ascending"
+
+def scan_items(directory_path, include_folders=False, recursive=False, entry_filter=None):
+    """Get scan entries for the items to rename, reusing unchanged catalog listings"""
+    catalog = get_catalog()
+    if catalog is not None:
+        if recursive:
+            return list(catalog.scan_tree(directory_path, include_folders=include_folders,
+                                          entry_filter=entry_filter))
+        return catalog.scan_directory(directory_path, include_folders=include_folders, entry_filter=entry_filter)
+    if recursive:
+        return list(scan_tree(directory_path, include_folders=include_folders, ordered=True,
+                              entry_filter=entry_filter))
+    return scan_directory(directory_path, include_folders=include_folders, entry_filter=entry_filter)
+
+def get_items_to_rename(directory_path, include_folders=False, recursive=False, entry_filter=None):
     """Get list of items (files and optionally folders) to rename"""
-    items = []
-    if os.path.exists(directory_path):
-        for item in os.listdir(directory_path):
-            full_path = os.path.join(directory_path, item)
-            if os.path.isfile(full_path) or (include_folders and os.path.isdir(full_path)):
-                items.append(full_path)
-    return items
+    return [entry.path for entry in scan_items(directory_path, include_folders, recursive, entry_filter)]
+
+PREVIEW_PAGE_SIZE = 50
+
+def preview_plan(rows, directory_path, recursive=False, page_size=PREVIEW_PAGE_SIZE):
+    """Print plan rows a page at a time as they are generated; returns how many were shown"""
+    shown = 0
+    conflicts = 0
+    show_all = False
+    for row in rows:
+        if shown == 0:
+            print("\nPreview of changes:")
+        elif not show_all and shown % page_size == 0:
+            answer = get_user_input(f"-- {shown} shown. Enter for more, 'a' for all, 'q' to stop the preview: ")
+            answer = (answer or "").strip().lower()
+            if answer == 'q':
+                print("  ...")
+                return shown
+            show_all = answer == 'a'
+        
+        item_type = "Folder" if row.is_dir else "File"
+        display_name = os.path.relpath(row.path, directory_path) if recursive else row.name
+        note = ""
+        if row.status == STATUS_CONFLICT:
+            conflicts += 1
+            note = " (name currently in use)"
+        print(f"  {item_type}: {display_name} → {row.new_name}{note}")
+        shown += 1
+    
+    if conflicts:
+        print(f"{conflicts} of {shown} items target a name that is in use; "
+              "they are skipped unless the plan itself frees that name.")
+    return shown
+
+def collect_rows(rows, plan):
+    """Yield plan rows unchanged while appending each one to a RenamePlan"""
+    for row in rows:
+        plan.append(row.path, row.new_name, row.is_dir, row.status)
+        yield row
 
 def run_renaming_operation():
     """Run a single renaming operation"""
@@ -100,96 +349,144 @@ def run_renaming_operation():
         if not prefix_format and ordering:
             print("Note: Since no prefix format was specified but ordering is enabled, files will be renamed with just order numbers.")
         
+        # Ask for an optional naming template (e.g. "{prefix}{label}_{index:03d}")
+        template = None
+        output_format = get_output_format()
+        hint = f", 'c' for the configured {output_format}" if output_format else ""
+        template_text = get_user_input(f"Naming template (leave empty for prefix + number{hint}): ")
+        if template_text and template_text.strip().lower() == 'c' and output_format:
+            template_text = output_format
+        if template_text:
+            try:
+                template = NameTemplate(template_text)
+                template.check_numbering(ordering)
+            except TemplateError as e:
+                print(e)
+                return
+        
         # Ask if user wants to remove existing prefixes first
         remove_existing_prefixes = get_user_input("Remove existing prefixes and order numbers? (y/n): ")
         if not remove_existing_prefixes:  # Handle None or empty string
             remove_existing_prefixes = "n"
         remove_existing_prefixes = remove_existing_prefixes.lower() in ['y', 'yes']
         
+        # Ask if items already renamed by an earlier run should be left alone
+        incremental = False
+        # Needs a prefix: without one any name starting with a number would look renamed
+        if prefix_format and template is None:
+            incremental = get_user_input("Skip items already named with this prefix and continue the numbering? (y/n): ")
+            if not incremental:
+                incremental = "n"
+            incremental = incremental.lower() in ['y', 'yes']
+        
         # Ask if user wants to rename folders as well
         include_folders = get_user_input("Include folders in renaming? (y/n): ")
         if not include_folders:
             include_folders = "n"
         include_folders = include_folders.lower() in ['y', 'yes']
         
-        # Get list of items (files and optionally folders) to rename
-        items = get_items_to_rename(directory_path, include_folders)
-            
-        # Show preview of the changes
-        if items:
-            # Find common prefix if removal is requested
-            common_prefix = ""
-            if remove_existing_prefixes and items:
-                # Get list of basenames for prefix detection
-                basenames = [os.path.basename(item) for item in items]
-                common_prefix = find_longest_common_prefix(basenames)
-                if common_prefix:
-                    print(f"Found common prefix: {common_prefix}")
-            
-            print("\nPreview of changes:")
-            renamed_previews = []
-            
-            for index, item in enumerate(items):
-                base_name = os.path.basename(item)
-                item_type = "Folder" if os.path.isdir(item) else "File"
-                
-                # Apply prefix removal if requested
-                if remove_existing_prefixes:
-                    cleaned_name = remove_prefix_and_order(base_name, common_prefix)
-                    intermediate_name = cleaned_name
-                else:
-                    intermediate_name = base_name
-                
-                # Generate the new name
-                order_value = index + 1 if ordering else None
-                new_name = generate_new_name(intermediate_name, prefix_format, order_value)
-                renamed_previews.append((item, new_name))
-                
-                print(f"  {item_type}: {base_name} → {new_name}")
+        # Ask if user wants to rename files inside subfolders too
+        recursive = get_user_input("Include files in subfolders (recursive)? (y/n): ")
+        if not recursive:
+            recursive = "n"
+        recursive = recursive.lower() in ['y', 'yes']
+        if recursive and include_folders:
+            # Renaming a folder would invalidate the paths of the files planned inside it
+            print("Note: Folders are not renamed in recursive mode; only files will be renamed.")
+            include_folders = False
+        
+        # Ask if only the supported file types from the config should be renamed
+        supported_only = get_user_input("Only rename supported file types? (y/n): ")
+        if not supported_only:
+            supported_only = "n"
+        supported_only = supported_only.lower() in ['y', 'yes']
+        entry_filter = get_scan_filter(supported_only=supported_only)
+        
+        # Ask how items should be ordered before numbering
+        sort_by, sort_reverse = 'none', False
+        if ordering:
+            default_ordering = get_default_ordering()
+            sort_choice = get_user_input(
+                f"Sort order (natural/name/mtime/size/exif/none, add _desc to reverse) [{default_ordering}]: ")
+            sort_by, sort_reverse = parse_ordering(sort_choice or default_ordering)
+        
+        # Entries are streamed straight from the scan unless a sort or an analysis pass needs them all;
+        # then one listing serves the analysis and the plan
+        entries = stream_entries(directory_path, include_folders, recursive, entry_filter, get_catalog())
+        if sort_by != 'none':
+            entries = sort_items(list(entries), sort_by, sort_reverse)
+        elif remove_existing_prefixes or (incremental and ordering):
+            entries = list(entries)
+
+        # Find the prefix of each group of similarly named items if removal is requested
+        prefix_clusters = None
+        if remove_existing_prefixes:
+            prefix_clusters = analyze_names(entry.name for entry in entries)
+            if prefix_clusters:
+                found = ", ".join(f"{prefix} ({count})" for prefix, count in prefix_clusters.largest())
+                more = len(prefix_clusters.prefixes) - len(prefix_clusters.largest())
+                print(f"Found common prefixes: {found}" + (f" and {more} more" if more > 0 else ""))
+
+        # An incremental run numbers the new items after the highest number already in use
+        start_index = 1
+        if incremental and ordering:
+            start_index = next_order_index((entry.name for entry in entries), prefix_format)
+            if start_index > 1:
+                print(f"Continuing the numbering at {start_index}")
+
+        # Every final name is computed once; the preview, export and apply all use this plan.
+        # Rows are printed as they are planned and collected into the plan on the way.
+        rows = build_plan(entries, prefix_format, ordering, remove_existing_prefixes,
+                          start_index=start_index, incremental=incremental, prefix_clusters=prefix_clusters,
+                          cleaner=get_name_cleaner() if remove_existing_prefixes else None, template=template)
+        plan = RenamePlan()
+        preview_plan(collect_rows(rows, plan), directory_path, recursive)
+        # Rows past the point where the preview stopped still belong to the plan
+        plan.extend(rows)
+        if incremental and plan.count(STATUS_UNCHANGED):
+            print(f"{plan.count(STATUS_UNCHANGED)} items already follow the naming scheme and are left as they are.")
+
+        if len(plan):
+            export_path = get_user_input("Export the full plan? (.jsonl/.csv to apply later, .tsv for the preview "
+                                         "table; leave empty to skip): ")
+            if export_path:
+                try:
+                    if export_path.lower().endswith('.tsv'):
+                        count = export_plan(plan, export_path)
+                    else:
+                        count = export_items(rename_items(plan), export_path)
+                    print(f"Exported {count} rows to {export_path}")
+                except (OSError, ValueError) as e:
+                    print(f"Could not export the plan: {e}")
+
+            # Check the whole plan for collisions before anything is renamed
+            report = validate_plan(plan)
+            if report.warnings:
+                print(f"Note: {len(report.warnings)} new names differ only in case from other names "
+                      "and would clash on Windows or macOS.")
+            if report.has_conflicts:
+                print(report.summary())
+                if not confirm_action("skip the conflicting items and rename the rest"):
+                    print("Nothing was renamed.")
+                    return
             
             # Ask for confirmation before proceeding
             if confirm_action("proceed with renaming"):
-                # If removing prefixes, rename files to clean names first
-                if remove_existing_prefixes:
-                    temp_items = []
-                    for item in items:
-                        base_name = os.path.basename(item)
-                        dir_name = os.path.dirname(item)
-                        
-                        cleaned_name = remove_prefix_and_order(base_name, common_prefix)
-                        temp_path = os.path.join(dir_name, cleaned_name)
-                        
-                        # Only rename if the name actually changed
-                        if cleaned_name != base_name:
-                            # Ensure we don't overwrite existing items
-                            if os.path.exists(temp_path) and temp_path != item:
-                                if os.path.isfile(temp_path):
-                                    print(f"Warning: '{temp_path}' already exists. Will be overwritten.")
-                                    os.remove(temp_path)
-                                else:
-                                    # Can't easily remove directory, so skip
-                                    print(f"Warning: Can't rename {base_name} to {cleaned_name} (already exists)")
-                                    temp_items.append(item)
-                                    continue
-                            try:
-                                os.rename(item, temp_path)
-                                temp_items.append(temp_path)
-                            except Exception as e:
-                                print(f"Error renaming to clean name: {str(e)}")
-                                temp_items.append(item)
-                        else:
-                            temp_items.append(item)
-                    
-                    # Use the cleaned items for the next step
-                    items = temp_items
-                
-                # Now apply the new prefix format
-                renamed_items = rename_files(items, prefix_format, ordering)
+                # One rename per item, straight to its final name; existing items are never overwritten
+                workers = get_apply_workers(directory_path)
+                summary = OutcomeSummary()
+
+                def apply(progress, cancel):
+                    with begin_batch("rename", directory_path) as batch:
+                        apply_plan(plan, skip_conflicts=True, batch=batch, max_workers=workers,
+                                   progress=progress, cancel=cancel, summary=summary)
+
+                run_with_progress(apply)
+                results = [f"Renamed: {row.name} → {row.new_name}"
+                           for row in plan if row.status == STATUS_DONE]
                 
-                # Display the results of the renaming operation
-                results = [f"Renamed: {os.path.basename(old)} → {os.path.basename(new)}" 
-                          for old, new in zip(items, renamed_items)]
                 display_results(results)
+                print_outcome_summary(summary)
         else:
             print(f"No {'items' if include_folders else 'files'} found in: {directory_path}")
             
@@ -207,12 +504,78 @@ def show_main_menu():
     print("3. Collapse redundant folders")
     print("4. Uncollapse folders by underscore") # New option
     print("5. AI Rename (New)")
-    print("6. Exit application")
+    print("6. Watch folder (auto-rename new files)")
+    print("7. Undo last operation")
+    print("8. Redo last undone operation")
+    print("9. Apply a saved plan")
+    print("10. Exit application")
     print("="*50)
     
-    choice = get_user_input("Enter your choice (1-6): ")
+    choice = get_user_input("Enter your choice (1-10): ")
     return choice
 
+def print_outcome_summary(summary):
+    """Show one compact report of the problems in a run, if there were any"""
+    if summary.problems:
+        print("\n" + summary.format())
+
+def offer_plan_export(items):
+    """Offer to save a plan with its file fingerprints so it can be reviewed and applied later"""
+    export_path = get_user_input("Save this plan to apply later? (enter a .jsonl or .csv path, or leave empty to skip): ")
+    if not export_path:
+        return
+    try:
+        count = export_items(items, export_path)
+        print(f"Exported {count} rows to {export_path}")
+    except (OSError, ValueError) as e:
+        print(f"Could not export the plan: {e}")
+
+def run_saved_plan_operation():
+    """Apply a plan saved earlier, after checking that its files have not changed"""
+    try:
+        plan_path = get_user_input("Enter the plan file (.jsonl or .csv): ")
+        if not plan_path or not os.path.isfile(plan_path):
+            print("Plan file not found.")
+            return
+
+        print("\nChecking the plan against the files on disk...")
+        try:
+            imported = import_plan(plan_path)
+        except (PlanFormatError, ValueError) as e:
+            print(f"Could not read the plan: {e}")
+            return
+        print(imported.summary())
+        if not len(imported.renames) and not imported.collapses:
+            print("Nothing left to apply.")
+            return
+        if imported.stale_count and not confirm_action("skip the out-of-date items and apply the rest"):
+            print("Nothing was changed.")
+            return
+
+        report = validate_plan(imported.renames)
+        if report.has_conflicts:
+            print(report.summary())
+            if not confirm_action("skip the conflicting items and apply the rest"):
+                print("Nothing was changed.")
+                return
+
+        if confirm_action("apply the plan"):
+            directory_path = imported.renames.directory(0) if len(imported.renames) else os.path.dirname(plan_path)
+            workers = get_apply_workers(directory_path)
+            summary = OutcomeSummary()
+
+            def apply(progress, cancel):
+                with begin_batch("apply plan", plan_path) as batch:
+                    return apply_imported_plan(imported, skip_conflicts=True, batch=batch, max_workers=workers,
+                                               progress=progress, cancel=cancel, summary=summary)
+
+            renamed, collapsed = run_with_progress(apply)
+            print(f"Renamed {renamed} item(s) and collapsed {collapsed} folder(s).")
+            print_outcome_summary(summary)
+    except Exception as e:
+        print(f"An unexpected error occurred: {str(e)}")
+        print(traceback.format_exc())
+
 def run_folder_collapse_operation():
     """Run the folder collapse operation"""
     try:
@@ -241,17 +604,25 @@ def run_folder_collapse_operation():
         
         # Import the identify function only when needed
         from src.folder_operations import identify_redundant_folders
-        redundant_folders = identify_redundant_folders(directory_path)
+        redundant_folders = identify_redundant_folders(directory_path, catalog=get_catalog())
         
         if redundant_folders:
             print(f"\nFound {len(redundant_folders)} redundant folder structure(s):")
             for parent, child in redundant_folders:
                 print(f"  {parent} → {child}")
+            offer_plan_export(collapse_items(redundant_folders))
                 
             # Ask for confirmation before proceeding
             if confirm_action("proceed with collapsing folders"):
                 # Perform the collapsing operation
-                collapsed_folders = collapse_redundant_folders(directory_path, recursive)
+                summary = OutcomeSummary()
+
+                def collapse(progress, cancel):
+                    with begin_batch("collapse", directory_path) as batch:
+                        return collapse_redundant_folders(directory_path, recursive, batch, progress, cancel,
+                                                          summary)
+
+                collapsed_folders = run_with_progress(collapse)
                 
                 # Display results
                 if collapsed_folders:
@@ -260,6 +631,7 @@ def run_folder_collapse_operation():
                         print(f"  {folder}")
                 else:
                     print("No folders were collapsed.")
+                print_outcome_summary(summary)
         else:
             print("No redundant folders found.")
             
@@ -296,11 +668,10 @@ def run_folder_uncollapse_operation():
         print("\nScanning for folders to uncollapse...")
         
         # Find folders with names containing underscores
-        potential_folders = []
-        for item in os.listdir(directory_path):
-            full_path = os.path.join(directory_path, item)
-            if os.path.isdir(full_path) and len(item.split('_')) >= min_parts:
-                potential_folders.append(full_path)
+        catalog = get_catalog()
+        subfolders = catalog.list_subfolders(directory_path) if catalog else list_subfolders(directory_path)
+        potential_folders = [entry.path for entry in subfolders
+                             if len(entry.name.split('_')) >= min_parts]
         
         if potential_folders:
             print(f"\nFound {len(potential_folders)} folder(s) to uncollapse:")
@@ -313,7 +684,13 @@ def run_folder_uncollapse_operation():
             # Ask for confirmation before proceeding
             if confirm_action("proceed with uncollapsing folders"):
                 # Perform the uncollapsing operation
-                uncollapsed_folders = uncollapse_folders(directory_path, min_parts)
+                summary = OutcomeSummary()
+
+                def uncollapse(progress, cancel):
+                    with begin_batch("uncollapse", directory_path) as batch:
+                        return uncollapse_folders(directory_path, min_parts, batch, progress, cancel, summary)
+
+                uncollapsed_folders = run_with_progress(uncollapse)
                 
                 # Display results
                 if uncollapsed_folders:
@@ -322,6 +699,7 @@ def run_folder_uncollapse_operation():
                         print(f"  {folder}")
                 else:
                     print("No folders were uncollapsed.")
+                print_outcome_summary(summary)
         else:
             print(f"No folders with {min_parts} or more underscore-separated parts found.")
             
@@ -381,29 +759,47 @@ def run_ai_renaming_operation():
         include_folders = include_folders.lower() in ['y', 'yes']
 
         # Get files and optionally folders
-        items = get_items_to_rename(directory_path, include_folders=include_folders)
+        items = get_items_to_rename(directory_path, include_folders=include_folders,
+                                    entry_filter=get_scan_filter(config_manager))
         if not items:
             print(f"No {'items' if include_folders else 'files'} found.")
             return
             
         print("Generating suggestions... (this may take a moment)")
         try:
-            suggestions = ai_renamer.get_rename_suggestions(items, prompt, provider)
+            suggestions = run_with_progress(
+                lambda progress, cancel: ai_renamer.get_rename_suggestions(items, prompt, provider,
+                                                                           progress=progress, cancel=cancel))
+            if suggestions is None:
+                return
             
-            print("\nPreview:")
-            for old, new in suggestions:
-                print(f"  {os.path.basename(old)} -> {new}")
+            # The suggestions share the compact plan, preview and apply engine of the manual rename
+            plan = build_suggestion_plan(suggestions)
+            if not preview_plan(plan, directory_path):
+                print("The AI returned no suggestions.")
+                return
+            offer_plan_export(rename_items(plan))
                 
             if confirm_action("apply these changes"):
-                for old_path, new_name in suggestions:
-                    dir_path = os.path.dirname(old_path)
-                    new_path = os.path.join(dir_path, new_name)
-                    if old_path != new_path:
-                        try:
-                            os.rename(old_path, new_path)
-                            print(f"Renamed: {os.path.basename(old_path)} -> {new_name}")
-                        except Exception as e:
-                            print(f"Error renaming {os.path.basename(old_path)}: {e}")
+                # Check every suggested name before anything is renamed, as the manual flow does
+                report = validate_plan(plan)
+                if report.has_conflicts:
+                    print(report.summary())
+                    if not confirm_action("skip the conflicting items and rename the rest"):
+                        print("Nothing was renamed.")
+                        return
+                workers = get_apply_workers(directory_path)
+                summary = OutcomeSummary()
+
+                def apply(progress, cancel):
+                    with begin_batch("ai rename", directory_path) as batch:
+                        apply_plan(plan, skip_conflicts=True, batch=batch, max_workers=workers,
+                                   progress=progress, cancel=cancel, summary=summary)
+
+                run_with_progress(apply)
+                display_results([f"Renamed: {row.name} -> {row.new_name}"
+                                 for row in plan if row.status == STATUS_DONE])
+                print_outcome_summary(summary)
         except Exception as e:
             print(f"AI Error: {e}")
             
@@ -411,10 +807,152 @@ def run_ai_renaming_operation():
         print(f"An unexpected error occurred: {str(e)}")
         print(traceback.format_exc())
 
+def get_apply_workers(directory_path):
+    """Get how many folders an apply may rename in at once (apply_workers option)"""
+    try:
+        from src.config_manager import ConfigManager
+        from src.plan_executor import resolve_apply_workers
+        return resolve_apply_workers(ConfigManager().get_option("apply_workers", "auto"), directory_path)
+    except Exception:
+        return 1
+
+def get_watch_settings():
+    """Get the configured watch timings (debounce, poll interval, inotify on/off)"""
+    try:
+        from src.config_manager import ConfigManager
+        options = ConfigManager().get_option("watch", {})
+    except Exception:
+        options = {}
+    if not isinstance(options, dict):
+        options = {}
+    try:
+        debounce = float(options.get("debounce_seconds", DEFAULT_DEBOUNCE))
+        poll_interval = float(options.get("poll_interval_seconds", DEFAULT_POLL_INTERVAL))
+    except (TypeError, ValueError):
+        debounce, poll_interval = DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
+    return debounce, poll_interval, bool(options.get("use_inotify", True))
+
+def run_watch_operation():
+    """Watch a folder and rename files as they arrive, until Ctrl+C is pressed"""
+    try:
+        directory_path = get_user_input("Enter the directory path to watch: ")
+        if not directory_path or not os.path.isdir(directory_path):
+            print("Invalid directory path.")
+            return
+
+        prefix_format = get_user_input("Enter the prefix format: ")
+
+        ordering = get_user_input("Enable ordering? (y/n): ")
+        if not ordering:
+            ordering = "n"
+        ordering = ordering.lower() in ['y', 'yes']
+
+        sort_by, sort_reverse, start_index = 'none', False, 1
+        if ordering:
+            default_ordering = get_default_ordering()
+            sort_choice = get_user_input(
+                f"Sort order within each batch (natural/name/mtime/size/exif/none, add _desc to reverse) [{default_ordering}]: ")
+            sort_by, sort_reverse = parse_ordering(sort_choice or default_ordering)
+            # Files renamed by an earlier run or watch keep their numbers; continue after them
+            default_start = next_order_index(os.listdir(directory_path), prefix_format)
+            start_choice = get_user_input(f"Start numbering at [{default_start}]: ")
+            try:
+                start_index = int(start_choice) if start_choice else default_start
+            except ValueError:
+                print(f"Invalid number, starting at {default_start}.")
+                start_index = default_start
+
+        regex_pattern = get_user_input("Regex pattern to apply first (leave empty to skip): ")
+        regex_replacement = ""
+        if regex_pattern:
+            regex_replacement = get_user_input("Regex replacement: ") or ""
+            try:
+                RegexRule(regex_pattern, regex_replacement)
+            except RegexRuleError as e:
+                print(e)
+                return
+
+        supported_only = get_user_input("Only rename supported file types? (y/n): ")
+        if not supported_only:
+            supported_only = "n"
+        supported_only = supported_only.lower() in ['y', 'yes']
+
+        debounce, poll_interval, use_inotify = get_watch_settings()
+        folder_watcher = FolderWatcher(
+            directory_path, prefix_format, use_order=ordering, sort_by=sort_by, reverse=sort_reverse,
+            regex_pattern=regex_pattern, regex_replacement=regex_replacement, start_index=start_index,
+            entry_filter=get_scan_filter(supported_only=supported_only),
+            debounce=debounce, poll_interval=poll_interval, use_inotify=use_inotify)
+
+        def report_batch(renamed):
+            display_results([f"Renamed: {os.path.basename(old)} → {os.path.basename(new)}"
+                             for old, new in renamed])
+
+        print(f"\nWatching {directory_path} for new files. Existing files are left untouched.")
+        print("Press Ctrl+C to stop.")
+        try:
+            batches = folder_watcher.run(on_batch=report_batch)
+        except KeyboardInterrupt:
+            batches = None
+        print("Stopped watching." if batches is None else f"Stopped watching after {batches} batches.")
+        print_outcome_summary(folder_watcher.summary)
+
+    except Exception as e:
+        print(f"An unexpected error occurred: {str(e)}")
+        print(traceback.format_exc())
+
+def print_replay_report(report, action):
+    """Show the outcome of an undo, redo or recovery"""
+    print(f"{action} {report.applied} change(s).")
+    if report.problems:
+        print(f"{len(report.problems)} change(s) could not be made:")
+        for problem in report.problems[:20]:
+            print(f"  {problem}")
+        if len(report.problems) > 20:
+            print(f"  ... and {len(report.problems) - 20} more")
+
+def run_history_operation(redo=False):
+    """Undo the last operation, or redo the last undone one"""
+    try:
+        journal = get_journal()
+        if journal is None:
+            print("The rename journal is not available, so nothing can be undone or redone.")
+            return
+        undo_stack, redo_stack = journal.history()
+        stack = redo_stack if redo else undo_stack
+        if not stack:
+            print(f"Nothing to {'redo' if redo else 'undo'}.")
+            return
+        print(f"Last {'undone ' if redo else ''}operation: {stack[-1].describe()}")
+        if confirm_action("redo it" if redo else "undo it"):
+            report = journal.redo() if redo else journal.undo()
+            print_replay_report(report, "Redid" if redo else "Reverted")
+    except Exception as e:
+        print(f"An unexpected error occurred: {str(e)}")
+        print(traceback.format_exc())
+
+def recover_interrupted_operations():
+    """Find operations that were cut short (e.g. by a crash) and roll them back or keep them"""
+    try:
+        journal = get_journal()
+        if journal is None:
+            return
+        for batch in journal.incomplete():
+            print(f"\nAn operation did not finish: {batch.describe()}")
+            choice = get_user_input("Roll it back (r) or keep the changes made so far (k)? [r]: ")
+            roll_back = (choice or "r").lower() not in ['k', 'keep']
+            report = journal.recover(batch, roll_back)
+            print_replay_report(report, "Rolled back" if roll_back else "Completed")
+        # Operations beyond the undo history are dropped so later reads stay quick
+        journal.compact()
+    except Exception as e:
+        print(f"Could not recover interrupted operations: {str(e)}")
+
 def main():
     try:
         # Make sure console is visible when running as executable
         ensure_console_visible()
+        recover_interrupted_operations()
         
         while True:
             choice = show_main_menu()
@@ -432,10 +970,18 @@ def main():
             elif choice == "5":
                 run_ai_renaming_operation()
             elif choice == "6":
+                run_watch_operation()
+            elif choice == "7":
+                run_history_operation(redo=False)
+            elif choice == "8":
+                run_history_operation(redo=True)
+            elif choice == "9":
+                run_saved_plan_operation()
+            elif choice == "10":
                 print("Exiting application...")
                 break
             else:
-                print("Invalid choice. Please enter a number between 1 and 6.")
+                print("Invalid choice. Please enter a number between 1 and 10.")
                 
     except Exception as e:
         print(f"An unexpected error occurred: {str(e)}")
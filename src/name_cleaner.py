@@ -0,0 +1,136 @@
+import re
+
+# The built-in cleaning rules, as remove_prefix_and_order has always applied them
+DEFAULT_PREFIXES = ('img', 'doc', 'file', 'photo', 'pic', 'renamed', '2025', '2024')
+DEFAULT_ORDER_PATTERN = r'\d+'
+
+class NameCleaner:
+    """
+    Strips existing prefixes and order numbers from names, compiled once per run.
+
+    The steps, in order, are:
+
+    - a name whose first half repeats (``"abcabc"``) is cut to that half;
+    - the shared or cluster prefix passed in for the name is removed;
+    - one known prefix word followed by an underscore is removed;
+    - every leading order number followed by an underscore is removed;
+    - leading/trailing underscores are trimmed and repeated tokens are dropped.
+
+    The extension is kept throughout.
+
+    Args:
+        prefixes (list): Prefix words removed when followed by an underscore (literal text, case-insensitive)
+        order_pattern (str): Regex for one order number
+        dedupe_tokens (bool): Whether to drop repeated underscore-separated tokens
+        collapse_repeats (bool): Whether to cut names that repeat their first half
+    """
+
+    def __init__(self, prefixes=DEFAULT_PREFIXES, order_pattern=DEFAULT_ORDER_PATTERN, dedupe_tokens=True,
+                 collapse_repeats=True):
+        self.prefixes = tuple(prefixes or ())
+        self.order_pattern = order_pattern
+        self.dedupe_tokens = dedupe_tokens
+        self.collapse_repeats = collapse_repeats
+        # Anchored patterns for the parts cut off the start, in order
+        leading = []
+        if self.prefixes:
+            leading.append(re.compile(r'(?:' + '|'.join(map(re.escape, self.prefixes)) + r')_', re.IGNORECASE).match)
+        if order_pattern:
+            # One match covers any number of leading order numbers
+            leading.append(re.compile(r'(?:(?:' + order_pattern + r')_)+').match)
+        self._leading = tuple(leading)
+
+    @classmethod
+    def from_options(cls, options):
+        """
+        Build a cleaner from a ``cleaning`` config section.
+
+        Args:
+            options (dict): Cleaning options as stored in the config; missing keys keep the defaults
+
+        Returns:
+            NameCleaner: The compiled cleaner
+        """
+        options = options or {}
+        return cls(
+            prefixes=options.get("prefixes", DEFAULT_PREFIXES),
+            order_pattern=options.get("order_pattern", DEFAULT_ORDER_PATTERN),
+            dedupe_tokens=options.get("dedupe_tokens", True),
+            collapse_repeats=options.get("collapse_repeats", True),
+        )
+
+    def clean(self, filename, common_prefix=None):
+        """
+        Clean one name.
+
+        Args:
+            filename (str): File or folder name
+            common_prefix (str): Shared or cluster prefix to remove first
+
+        Returns:
+            str: The cleaned name
+        """
+        return self._clean(filename, common_prefix)
+
+    def clean_names(self, names, common_prefix=None, prefix_clusters=None):
+        """
+        Clean a whole list of names.
+
+        Same steps as ``clean``, with the methods bound once for the whole list.
+
+        Args:
+            names (iterable): File or folder names
+            common_prefix (str): Shared prefix to remove from every name
+            prefix_clusters (PrefixClusters): Remove each name's own cluster prefix instead
+
+        Returns:
+            list: The cleaned names, in order
+        """
+        clean = self._clean
+        if prefix_clusters is None:
+            return [clean(filename, common_prefix) for filename in names]
+        prefix_for = prefix_clusters.prefix_for
+        return [clean(filename, prefix_for(filename)) for filename in names]
+
+    def _clean(self, filename, prefix):
+        # Extract the base name and extension
+        base_name, dot, extension = filename.rpartition('.')
+        if not dot:
+            base_name = extension
+            extension = ''
+
+        if self.collapse_repeats:
+            half_length = len(base_name) // 2
+            if half_length and base_name[:half_length] == base_name[half_length:2 * half_length]:
+                base_name = base_name[:half_length]
+
+        if prefix and base_name.startswith(prefix):
+            base_name = base_name[len(prefix):]
+        for regex in self._leading:
+            match = regex(base_name)
+            if match:
+                base_name = base_name[match.end():]
+
+        base_name = base_name.strip('_')
+        if self.dedupe_tokens:
+            # dict keeps the first occurrence of each token, in order
+            base_name = '_'.join(dict.fromkeys(base_name.split('_')))
+
+        if extension:
+            return f"{base_name}.{extension}"
+        return base_name
+
+def load_name_cleaner(config_manager):
+    """
+    Build the name cleaner described by the application config.
+
+    Args:
+        config_manager (ConfigManager): Source of the ``cleaning`` option
+
+    Returns:
+        NameCleaner: The compiled cleaner (the defaults if the section is missing)
+    """
+    options = config_manager.get_option("cleaning", {})
+    if not isinstance(options, dict):
+        options = {}
+    return NameCleaner.from_options(options)
@@ -0,0 +1,256 @@
+import os
+from datetime import datetime
+from string import Formatter
+
+try:
+    from src.scanner import ScanEntry
+    from src.label_extractor import extract_label_from_name
+    from src.ordering import exif_timestamp
+    from src.rename_utils import split_name, order_width
+except ImportError:
+    from scanner import ScanEntry
+    from label_extractor import extract_label_from_name
+    from ordering import exif_timestamp
+    from rename_utils import split_name, order_width
+
+# Format used for date fields that have no format spec of their own
+DEFAULT_DATE_FORMAT = '%Y%m%d'
+
+class TemplateError(ValueError):
+    """Raised when a naming template is invalid."""
+
+def _stat(item):
+    try:
+        return item.stat()
+    except OSError:
+        return None
+
+def _field_prefix(item, name, split, index, prefix):
+    return prefix
+
+def _field_label(item, name, split, index, prefix):
+    return extract_label_from_name(name)
+
+def _field_index(item, name, split, index, prefix):
+    return index
+
+def _field_stem(item, name, split, index, prefix):
+    return split[0]
+
+def _field_ext(item, name, split, index, prefix):
+    return split[1]
+
+def _field_mtime(item, name, split, index, prefix):
+    st = _stat(item)
+    return datetime.fromtimestamp(st.st_mtime) if st is not None else None
+
+def _field_size(item, name, split, index, prefix):
+    st = _stat(item)
+    return st.st_size if st is not None else None
+
+def _field_parent(item, name, split, index, prefix):
+    return os.path.basename(os.path.dirname(item.path))
+
+def _field_taken(item, name, split, index, prefix):
+    # Capture time from EXIF, or the modification time for files without it
+    timestamp = exif_timestamp(item.path)
+    if timestamp is None:
+        return _field_mtime(item, name, split, index, prefix)
+    return datetime.fromtimestamp(timestamp)
+
+# Field name -> (getter, sample value used to check format specs)
+FIELDS = {
+    'prefix': (_field_prefix, 'Prefix_'),
+    'label': (_field_label, 'label'),
+    'index': (_field_index, 1),
+    'stem': (_field_stem, 'stem'),
+    'ext': (_field_ext, '.ext'),
+    'mtime': (_field_mtime, datetime(2024, 1, 2, 3, 4, 5)),
+    'size': (_field_size, 1024),
+    'parent': (_field_parent, 'folder'),
+    'taken': (_field_taken, datetime(2024, 1, 2, 3, 4, 5)),
+}
+
+_DATE_FIELDS = ('mtime', 'taken')
+
+class NameTemplate:
+    """
+    A naming template such as ``"{prefix}{label}_{index:04d}"``, compiled once.
+
+    The template is parsed when it is created: unknown fields and bad format
+    specs are reported then, and the fields it references are recorded so
+    rendering only does the work those fields need. A template without
+    ``{mtime}``, ``{size}`` or ``{taken}`` never stats a file, and only
+    ``{taken}`` opens it to read EXIF data.
+
+    Fields:
+        prefix: The prefix entered for the run
+        label: Label extracted from the name (see label_extractor)
+        index: Sequence number, padded to the largest number of the run unless it has
+            a spec of its own (e.g. ``{index:04d}``); needs numbering (see check_numbering)
+        stem: The name without its extension
+        ext: The extension with its dot (``.tar.gz`` counts as one); appended automatically when not used
+        mtime: Modification time (e.g. ``{mtime:%Y%m%d}``, the default format)
+        size: File size in bytes
+        parent: Name of the containing folder
+        taken: EXIF capture time, falling back to mtime (``{taken:%Y-%m-%d}``)
+
+    Attributes:
+        template (str): The template text
+        fields (frozenset): The field names the template references
+        appends_extension (bool): Whether the original extension is added after the rendered text
+    """
+
+    def __init__(self, template):
+        """
+        Args:
+            template (str): Template text using the fields above
+
+        Raises:
+            TemplateError: If the template is empty, references an unknown field,
+                has an invalid format spec or would produce a path
+        """
+        if not template:
+            raise TemplateError("The naming template is empty")
+        self.template = template
+        parts = []
+        fields = set()
+        try:
+            parsed = list(Formatter().parse(template))
+        except ValueError as e:
+            raise TemplateError(f"Invalid naming template: {e}")
+        for literal, field, spec, conversion in parsed:
+            if literal:
+                if '/' in literal or os.sep in literal:
+                    raise TemplateError("A naming template cannot contain path separators")
+                parts.append(literal)
+            if field is None:
+                continue
+            if field not in FIELDS:
+                known = ", ".join(FIELDS)
+                raise TemplateError(f"Unknown template field '{{{field}}}' (known fields: {known})")
+            if field in _DATE_FIELDS and not spec:
+                spec = DEFAULT_DATE_FORMAT
+            getter, sample = FIELDS[field]
+            try:
+                rendered = _format_value(sample, spec, conversion)
+            except (ValueError, TypeError) as e:
+                raise TemplateError(f"Invalid format '{spec}' for template field '{{{field}}}': {e}")
+            if '/' in rendered or os.sep in rendered:
+                raise TemplateError(f"The format of template field '{{{field}}}' produces path separators")
+            fields.add(field)
+            parts.append((getter, spec, conversion))
+        self.fields = frozenset(fields)
+        self.appends_extension = 'ext' not in fields
+        self._parts = tuple(parts)
+
+    def check_numbering(self, use_order):
+        """
+        Check that the template can be used with or without numbering.
+
+        Without numbering ``{index}`` has no value, so every item would get
+        the same name.
+
+        Args:
+            use_order (bool): Whether the items are numbered
+
+        Raises:
+            TemplateError: If the template uses ``{index}`` and numbering is off
+        """
+        if not use_order and 'index' in self.fields:
+            raise TemplateError("The naming template uses {index}, which needs ordering to be enabled")
+
+    def render(self, item, name=None, index=None, prefix=''):
+        """
+        Build the new name for one item.
+
+        Args:
+            item (ScanEntry|str): The item being renamed (a path is accepted too)
+            name (str): Name to take the stem, extension and label from
+                (the item's own name if omitted, e.g. after prefix removal)
+            index (int): Sequence number, or None when numbering is off
+            prefix (str): Prefix for the ``{prefix}`` field
+
+        Returns:
+            str: The new name
+        """
+        if isinstance(item, str):
+            item = ScanEntry(os.path.basename(item), item, False)
+        if name is None:
+            name = item.name
+        return self._render(self._parts, item, name, index, prefix)
+
+    def render_names(self, items, names=None, prefix='', use_order=False, start_index=1):
+        """
+        Build the new names for a whole list at once.
+
+        A plain ``{index}`` is zero-padded to the width of the largest number,
+        as generate_new_names does; an index with its own format spec keeps it.
+
+        Args:
+            items (list): The items being renamed, in numbering order
+            names (list): Names to take the stem, extension and label from (the items' own if omitted)
+            prefix (str): Prefix for the ``{prefix}`` field
+            use_order (bool): Whether to number the items
+            start_index (int): Number of the first item
+
+        Returns:
+            list: The new names, in order
+        """
+        if names is None:
+            names = [item.name for item in items]
+        parts = self._parts
+        if use_order:
+            spec = f"0{order_width(len(names), start_index)}d"
+            parts = tuple((part[0], spec, part[2]) if part.__class__ is not str and part[0] is _field_index
+                          and not part[1] and not part[2] else part for part in parts)
+        render = self._render
+        indexes = range(start_index, start_index + len(names)) if use_order else [None] * len(names)
+        return [render(parts, item, name, index, prefix) for item, name, index in zip(items, names, indexes)]
+
+    def _render(self, parts, item, name, index, prefix):
+        split = split_name(name)
+        pieces = []
+        for part in parts:
+            if part.__class__ is str:
+                pieces.append(part)
+                continue
+            getter, spec, conversion = part
+            value = getter(item, name, split, index, prefix)
+            if value is not None:
+                pieces.append(_format_value(value, spec, conversion))
+        if self.appends_extension:
+            pieces.append(split[1])
+        return ''.join(pieces)
+
+    def __repr__(self):
+        return f"NameTemplate({self.template!r})"
+
+def _format_value(value, spec, conversion):
+    if conversion == 's':
+        value = str(value)
+    elif conversion == 'r':
+        value = repr(value)
+    elif conversion == 'a':
+        value = ascii(value)
+    elif conversion:
+        raise ValueError(f"unknown conversion '!{conversion}'")
+    return format(value, spec)
+
+def load_name_template(config_manager):
+    """
+    Build the naming template configured as ``output_format``.
+
+    Args:
+        config_manager (ConfigManager): Source of the ``output_format`` option
+
+    Returns:
+        NameTemplate: The compiled template, or None if none is configured
+
+    Raises:
+        TemplateError: If the configured template is invalid
+    """
+    template = config_manager.get_option("output_format", "")
+    if not template or not isinstance(template, str):
+        return None
+    return NameTemplate(template)
@@ -0,0 +1,136 @@
+import os
+import re
+from datetime import datetime
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; EXIF ordering falls back to mtime
+    Image = None
+
+SORT_KEYS = ('natural', 'name', 'mtime', 'size', 'exif', 'none')
+
+_DIGITS = re.compile(r'(\d+)')
+_EXIF_IFD = 0x8769
+_EXIF_DATETIME_ORIGINAL = 36867
+_EXIF_DATETIME = 306
+
+def _pad_number(match):
+    digits = match.group().lstrip('0') or '0'
+    return '%03d%s' % (len(digits), digits)
+
+def natural_key(name):
+    """
+    Build a sort key that orders embedded numbers numerically ("img2" before "img10").
+
+    Every digit run is replaced by its length followed by the digits, so the
+    key is a plain string and comparisons stay on the fast string path.
+    """
+    return _DIGITS.sub(_pad_number, name.casefold())
+
+def _item_name(item):
+    return item.name if hasattr(item, 'name') else os.path.basename(item)
+
+def _item_path(item):
+    return item.path if hasattr(item, 'path') else item
+
+def _item_stat(item):
+    try:
+        return item.stat() if hasattr(item, 'stat') else os.stat(item)
+    except OSError:
+        return None
+
+def _mtime_key(item):
+    st = _item_stat(item)
+    return st.st_mtime if st is not None else 0.0
+
+def _size_key(item):
+    st = _item_stat(item)
+    return st.st_size if st is not None else 0
+
+def exif_timestamp(path):
+    """
+    Read the capture time of an image from its EXIF data.
+
+    Returns:
+        float: POSIX timestamp, or None if the file has no readable EXIF date
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as image:
+            exif = image.getexif()
+            value = exif.get_ifd(_EXIF_IFD).get(_EXIF_DATETIME_ORIGINAL) or exif.get(_EXIF_DATETIME)
+        if not value:
+            return None
+        return datetime.strptime(str(value).strip('\x00 '), "%Y:%m:%d %H:%M:%S").timestamp()
+    except Exception:
+        return None
+
+def _exif_key(item):
+    timestamp = exif_timestamp(_item_path(item))
+    return timestamp if timestamp is not None else _mtime_key(item)
+
+_PRIMARY_KEYS = {
+    'mtime': _mtime_key,
+    'size': _size_key,
+    'exif': _exif_key,
+}
+
+def parse_ordering(value, default='natural'):
+    """
+    Interpret an ordering setting such as "ascending", "mtime" or "size_desc".
+
+    Args:
+        value (str): Ordering setting ("ascending"/"descending" mean natural order)
+        default (str): Sort key used when the value is empty or unknown
+
+    Returns:
+        tuple: (sort_key, reverse)
+    """
+    value = (value or '').strip().lower()
+    if value in ('ascending', 'asc'):
+        return 'natural', False
+    if value in ('descending', 'desc'):
+        return 'natural', True
+    reverse = False
+    for suffix, is_reverse in (('_desc', True), ('_asc', False)):
+        if value.endswith(suffix):
+            value = value[:-len(suffix)]
+            reverse = is_reverse
+    if value not in SORT_KEYS:
+        return default, reverse
+    return value, reverse
+
+def sort_items(items, sort_by='natural', reverse=False):
+    """
+    Sort scan entries or paths for sequential numbering.
+
+    Keys are computed exactly once per item before sorting (stat and EXIF
+    reads included) and the sort runs over plain key lists, never calling
+    back into stat or a parser. Ties are broken by the natural name order so
+    the result is the same for preview and apply.
+
+    Args:
+        items (list): ScanEntry records or path strings
+        sort_by (str): One of SORT_KEYS
+        reverse (bool): Whether to reverse the order
+
+    Returns:
+        list: A new sorted list (the input order is kept for 'none')
+    """
+    if sort_by == 'none' or sort_by not in SORT_KEYS:
+        return list(reversed(items)) if reverse else list(items)
+
+    if sort_by == 'name':
+        keys = [_item_name(item) for item in items]
+    else:
+        keys = [natural_key(_item_name(item)) for item in items]
+    order = sorted(range(len(items)), key=keys.__getitem__, reverse=reverse)
+
+    if sort_by in _PRIMARY_KEYS:
+        # Stable second pass: metadata decides, natural name order breaks ties
+        primary = _PRIMARY_KEYS[sort_by]
+        keys = [primary(item) for item in items]
+        order.sort(key=keys.__getitem__, reverse=reverse)
+
+    return [items[i] for i in order]
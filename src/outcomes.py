@@ -0,0 +1,146 @@
+import errno as errno_codes
+import logging
+
+OUTCOME_OK = 'ok'
+OUTCOME_SKIPPED = 'skipped'
+OUTCOME_CONFLICT = 'conflict'
+OUTCOME_ERROR = 'error'
+
+_STATUSES = (OUTCOME_OK, OUTCOME_SKIPPED, OUTCOME_CONFLICT, OUTCOME_ERROR)
+
+DEFAULT_EXAMPLES = 5  # examples kept per status for the report
+
+class Outcome:
+    """
+    What happened to one item of an operation.
+
+    Attributes:
+        status (str): OUTCOME_OK, OUTCOME_SKIPPED, OUTCOME_CONFLICT or OUTCOME_ERROR
+        operation (str): What was attempted, e.g. "rename" or "collapse"
+        path (str): Item the operation worked on
+        target (str): Path it was to be moved to, if any
+        reason (str): Why it was skipped or failed, as a fixed text such as
+            "target exists" (None for OUTCOME_OK); summaries group by it
+        errno (int): OS error number for errors raised by the system, else None
+        detail (str): Item-specific detail, e.g. the names that clash (None if there is none)
+    """
+    __slots__ = ('status', 'operation', 'path', 'target', 'reason', 'errno', 'detail')
+
+    def __init__(self, status, operation, path, target=None, reason=None, errno=None, detail=None):
+        self.status = status
+        self.operation = operation
+        self.path = path
+        self.target = target
+        self.reason = reason
+        self.errno = errno
+        self.detail = detail
+
+    @classmethod
+    def from_error(cls, operation, path, target, error):
+        """
+        Build an OUTCOME_ERROR record from an exception, keeping its errno.
+
+        The reason is the error's system message when it has an errno, and
+        its type otherwise; the message of an error without an errno (which
+        may name the item) becomes the detail.
+        """
+        errno = getattr(error, 'errno', None)
+        message = getattr(error, 'strerror', None) or str(error)
+        if errno is not None:
+            return cls(OUTCOME_ERROR, operation, path, target, message, errno)
+        return cls(OUTCOME_ERROR, operation, path, target, type(error).__name__, detail=message or None)
+
+    @property
+    def ok(self):
+        return self.status == OUTCOME_OK
+
+    def __str__(self):
+        text = f"{self.operation} {self.path}"
+        if self.target:
+            text += f" -> {self.target}"
+        if self.status != OUTCOME_OK:
+            text += f": {self.status}"
+            if self.reason and self.detail:
+                text += f" ({self.reason}: {self.detail})"
+            elif self.reason:
+                text += f" ({self.reason})"
+        return text
+
+    def __repr__(self):
+        return f"Outcome({self})"
+
+def log_outcome(logger, outcome):
+    """Log one outcome at DEBUG level; the message is only formatted if DEBUG is enabled."""
+    logger.debug("%s", outcome)
+
+class OutcomeSummary:
+    """
+    Aggregates outcomes into counts, so a large run ends in one compact report.
+
+    Only the counts per status and per (status, reason) are kept, plus the
+    first few examples of each status, so memory does not grow with the run.
+    Reasons are fixed texts; anything specific to one item travels in the
+    outcome's ``detail`` and is only seen in the examples.
+
+    Attributes:
+        counts (dict): Status -> number of outcomes
+        reasons (dict): (status, reason) -> number of outcomes
+        examples (dict): Status -> list of the first Outcome records
+    """
+
+    def __init__(self, max_examples=DEFAULT_EXAMPLES):
+        self.max_examples = max_examples
+        self.counts = dict((status, 0) for status in _STATUSES)
+        self.reasons = {}
+        self.examples = dict((status, []) for status in _STATUSES)
+
+    def add(self, outcome):
+        """Count one Outcome."""
+        self.counts[outcome.status] += 1
+        if outcome.status != OUTCOME_OK:
+            reason = outcome.reason
+            if outcome.errno is not None:
+                reason = f"{errno_codes.errorcode.get(outcome.errno, outcome.errno)}: {reason}"
+            key = (outcome.status, reason)
+            self.reasons[key] = self.reasons.get(key, 0) + 1
+        examples = self.examples[outcome.status]
+        if len(examples) < self.max_examples:
+            examples.append(outcome)
+
+    def extend(self, outcomes):
+        for outcome in outcomes:
+            self.add(outcome)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def problems(self):
+        """Number of outcomes that were not OUTCOME_OK."""
+        return self.total - self.counts[OUTCOME_OK]
+
+    def format(self):
+        """
+        Render the summary as a few lines of text.
+
+        Returns:
+            str: One line of counts, then one line per problem reason and a few examples
+        """
+        parts = [f"{self.counts[OUTCOME_OK]} done"]
+        parts.extend(f"{self.counts[status]} {status}" for status in _STATUSES[1:] if self.counts[status])
+        lines = [", ".join(parts) + "."]
+        for (status, reason), count in sorted(self.reasons.items(), key=lambda item: -item[1]):
+            lines.append(f"  {count} {status}: {reason}")
+        for status in _STATUSES[1:]:
+            for outcome in self.examples[status]:
+                lines.append(f"    e.g. {outcome}")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.format()
+
+    def log(self, logger, level=logging.WARNING):
+        """Log the summary as one message if anything went wrong (formatted lazily)."""
+        if self.problems:
+            logger.log(level, "%s", self)
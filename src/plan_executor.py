@@ -0,0 +1,466 @@
+import os
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from src.stat_cache import StatCache
+    from src.journal import JournalBatch
+    from src.rename_engine import RenameEngine
+    from src.progress import ProgressReporter, CancellationToken
+    from src.outcomes import Outcome, OUTCOME_OK, OUTCOME_SKIPPED, OUTCOME_CONFLICT
+except ImportError:
+    from stat_cache import StatCache
+    from journal import JournalBatch
+    from rename_engine import RenameEngine
+    from progress import ProgressReporter, CancellationToken
+    from outcomes import Outcome, OUTCOME_OK, OUTCOME_SKIPPED, OUTCOME_CONFLICT
+
+STEP_MOVE = 'move'
+STEP_PARK = 'park'
+STEP_UNPARK = 'unpark'
+
+SKIP_DUPLICATE_SOURCE = 'duplicate source'
+SKIP_DUPLICATE_TARGET = 'duplicate target'
+SKIP_TARGET_EXISTS = 'target exists'
+SKIP_BLOCKED = 'blocked by a skipped or failed rename'
+SKIP_CANCELLED = 'cancelled'
+
+# Skips caused by a name being taken, as opposed to being held back
+_CONFLICT_REASONS = (SKIP_DUPLICATE_TARGET, SKIP_TARGET_EXISTS)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_APPLY_WORKERS = 8
+
+# Filesystems where each rename is a network round trip, so renaming in several folders at once pays off
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'afs', '9p', 'ceph', 'glusterfs',
+                       'fuse.glusterfs', 'fuse.sshfs', 'fuse.rclone'}
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+class RenameStep:
+    """
+    One filesystem rename in an execution schedule.
+
+    Attributes:
+        src (str): Path renamed from
+        dst (str): Path renamed to
+        move (int): Index of the requested move this step belongs to
+        kind (str): STEP_MOVE for a direct rename, STEP_PARK/STEP_UNPARK for
+            the two halves of a rename that goes through a temporary name
+    """
+    __slots__ = ('src', 'dst', 'move', 'kind')
+
+    def __init__(self, src, dst, move, kind=STEP_MOVE):
+        self.src = src
+        self.dst = dst
+        self.move = move
+        self.kind = kind
+
+    def __repr__(self):
+        return f"RenameStep({self.kind}: {self.src!r} -> {self.dst!r})"
+
+class RenameSchedule:
+    """
+    Ordered renames for a set of moves, plus the moves that can't be done.
+
+    Attributes:
+        steps (list): RenameStep records in execution order
+        skipped (dict): Move index -> reason for moves left out of the schedule
+        waits_on (list): For each move, the move that has to vacate its target first (or None)
+        cycles (int): Number of rename cycles broken with a temporary name
+    """
+
+    def __init__(self, steps, skipped, waits_on, cycles):
+        self.steps = steps
+        self.skipped = skipped
+        self.waits_on = waits_on
+        self.cycles = cycles
+
+def _temp_path(src, taken, exists):
+    directory = os.path.dirname(src)
+    while True:
+        candidate = os.path.join(directory, f".renamer_tmp_{uuid.uuid4().hex[:12]}")
+        if _key(candidate) not in taken and not exists(candidate):
+            taken.add(_key(candidate))
+            return candidate
+
+def schedule_moves(moves, exists=os.path.exists):
+    """
+    Order a set of renames so that no rename ever hits a name still in use.
+
+    Each move's target can only be taken once the move whose source it is has
+    run, which makes every move depend on at most one other. Moves are therefore
+    laid out as chains, run from the end whose target is free, and as cycles
+    (swaps, rotations), each broken by parking one item under a temporary
+    name. A permutation of n names with c cycles takes n + c renames.
+
+    Args:
+        moves (list): (src, dst) path pairs
+        exists (callable): Existence check used for targets outside the move set
+
+    Returns:
+        RenameSchedule: The schedule
+    """
+    count = len(moves)
+    src_keys = [_key(src) for src, _ in moves]
+    dst_keys = [_key(dst) for _, dst in moves]
+    skipped = {}
+
+    by_src = {}
+    for i, key in enumerate(src_keys):
+        if key in by_src:
+            skipped[i] = SKIP_DUPLICATE_SOURCE
+        else:
+            by_src[key] = i
+
+    claimed = {}
+    for i, key in enumerate(dst_keys):
+        if i in skipped:
+            continue
+        if key in claimed:
+            skipped[i] = SKIP_DUPLICATE_TARGET
+        else:
+            claimed[key] = i
+
+    waits_on = [None] * count
+    dependent = [None] * count
+    for i in range(count):
+        if i in skipped:
+            continue
+        j = by_src.get(dst_keys[i])
+        if j is None or j == i:
+            # Same name (or a case-only change on a case-insensitive system)
+            if j is None and exists(moves[i][1]):
+                skipped[i] = SKIP_TARGET_EXISTS
+            continue
+        if j in skipped:
+            skipped[i] = SKIP_BLOCKED
+            continue
+        waits_on[i] = j
+        dependent[j] = i
+
+    # A skipped move keeps its source occupied, so whatever waits on it is stuck too
+    for i in list(skipped):
+        j = dependent[i]
+        while j is not None and j not in skipped:
+            skipped[j] = SKIP_BLOCKED
+            j = dependent[j]
+
+    steps = []
+    done = [i in skipped for i in range(count)]
+
+    def run_chain(i):
+        while i is not None and not done[i]:
+            done[i] = True
+            steps.append(RenameStep(moves[i][0], moves[i][1], i))
+            i = dependent[i]
+
+    for i in range(count):
+        if not done[i] and waits_on[i] is None:
+            run_chain(i)
+
+    # Whatever is left lies on cycles
+    cycles = 0
+    taken = set(src_keys) | set(dst_keys)
+    for i in range(count):
+        if done[i]:
+            continue
+        cycles += 1
+        temp = _temp_path(moves[i][0], taken, exists)
+        done[i] = True
+        steps.append(RenameStep(moves[i][0], temp, i, STEP_PARK))
+        run_chain(dependent[i])
+        steps.append(RenameStep(temp, moves[i][1], i, STEP_UNPARK))
+
+    return RenameSchedule(steps, skipped, waits_on, cycles)
+
+class ExecutionReport:
+    """
+    Outcome of executing a set of moves.
+
+    Attributes:
+        renamed (dict): Move index -> final path, for moves that completed
+        skipped (dict): Move index -> reason, for moves that were not attempted
+        failed (dict): Move index -> error message
+        errnos (dict): Move index -> OS error number, for failed moves that have one
+        operations (int): Number of filesystem renames performed
+        cycles (int): Number of cycles broken with a temporary name
+        cancelled (bool): Whether the run stopped early; the moves not reached are skipped as SKIP_CANCELLED
+    """
+
+    def __init__(self, cycles=0):
+        self.renamed = {}
+        self.skipped = {}
+        self.failed = {}
+        self.errnos = {}
+        self.operations = 0
+        self.cycles = cycles
+        self.cancelled = False
+
+    def outcome(self, moves, i, operation='rename'):
+        """Get the Outcome record for move ``i`` of ``moves``, or None if it has none yet."""
+        src, dst = moves[i]
+        if i in self.renamed:
+            return Outcome(OUTCOME_OK, operation, src, self.renamed[i])
+        if i in self.failed:
+            return Outcome.from_error(operation, src, dst, OSError(self.errnos.get(i), self.failed[i]))
+        if i in self.skipped:
+            reason = self.skipped[i]
+            status = OUTCOME_CONFLICT if reason in _CONFLICT_REASONS else OUTCOME_SKIPPED
+            return Outcome(status, operation, src, dst, reason)
+        return None
+
+    def outcomes(self, moves, operation='rename'):
+        """
+        Yield an Outcome record for every move, in move order.
+
+        Args:
+            moves (list): The (src, dst) pairs the report was made for
+            operation (str): Operation name put in the records
+        """
+        for i in range(len(moves)):
+            outcome = self.outcome(moves, i, operation)
+            if outcome is not None:
+                yield outcome
+
+    def cancel_rest(self, indexes):
+        """Mark the moves in ``indexes`` that have no outcome yet as cancelled."""
+        self.cancelled = True
+        for i in indexes:
+            if i not in self.renamed and i not in self.failed and i not in self.skipped:
+                self.skipped[i] = SKIP_CANCELLED
+
+def execute_moves(moves, stat_cache=None, batch=None, engine=None, progress=None, cancel=None):
+    """
+    Rename every (src, dst) pair in dependency order, breaking cycles with temporary names.
+
+    If a rename fails, the moves that were waiting for its source to be freed
+    are skipped. An item parked under a temporary name whose final rename fails
+    is moved back to its original name when that is still free. Cancellation
+    is only honoured while no item is parked, so a cancelled run never leaves
+    temporary names behind.
+
+    Args:
+        moves (list): (src, dst) path pairs
+        stat_cache (StatCache): Metadata cache for this operation
+        batch (JournalBatch): Journal batch the renames are recorded in
+        engine (RenameEngine): Engine issuing the renames (one using directory
+            handles is opened for the call if omitted)
+        progress (ProgressReporter): Receives one step per finished move
+        cancel (CancellationToken): Stops the run before the next move when set
+
+    Returns:
+        ExecutionReport: What happened to each move
+    """
+    if progress is None:
+        progress = ProgressReporter()
+    progress.start(len(moves))
+    report = _execute(moves, stat_cache, batch, engine, progress, cancel)
+    progress.finish()
+    return report
+
+def _execute(moves, stat_cache, batch, engine, progress, cancel):
+    if stat_cache is None:
+        stat_cache = StatCache()
+    if batch is None:
+        batch = JournalBatch()
+    if cancel is None:
+        cancel = CancellationToken()
+    schedule = schedule_moves(moves, stat_cache.exists)
+    report = ExecutionReport(schedule.cycles)
+    report.skipped.update(schedule.skipped)
+    progress.advance(len(schedule.skipped))
+
+    own_engine = engine is None
+    if own_engine:
+        engine = RenameEngine()
+    try:
+        _run_schedule(schedule, moves, stat_cache, batch, engine, report, progress, cancel)
+    finally:
+        if own_engine:
+            engine.close()
+    return report
+
+def _run_schedule(schedule, moves, stat_cache, batch, engine, report, progress, cancel):
+    vacated = set()  # moves whose source name is free again
+    parked = 0  # items currently under a temporary name
+    for step in schedule.steps:
+        i = step.move
+        if i in report.failed or i in report.skipped:
+            continue
+        if step.kind == STEP_UNPARK:
+            # Whatever happens below, the item leaves its temporary name
+            parked -= 1
+        elif not parked and cancel.cancelled:
+            report.cancel_rest(range(len(moves)))
+            return
+        if step.kind != STEP_PARK:
+            blocker = schedule.waits_on[i]
+            if blocker is not None and blocker not in vacated:
+                if step.kind == STEP_UNPARK:
+                    _restore_parked(step, moves[i][0], stat_cache, report, batch, engine)
+                report.skipped[i] = SKIP_BLOCKED
+                progress.advance()
+                continue
+        if step.src == step.dst:
+            vacated.add(i)
+            report.renamed[i] = step.dst
+            progress.advance()
+            continue
+        try:
+            batch.rename(step.src, step.dst, moves[i][1] if step.kind == STEP_PARK else None, engine)
+        except OSError as e:
+            logger.debug("Error renaming %r to %r: %s", step.src, step.dst, e)
+            if step.kind == STEP_UNPARK:
+                _restore_parked(step, moves[i][0], stat_cache, report, batch, engine)
+            report.failed[i] = e.strerror or str(e)
+            if e.errno is not None:
+                report.errnos[i] = e.errno
+            progress.advance()
+            continue
+        report.operations += 1
+        stat_cache.record_rename(step.src, step.dst)
+        vacated.add(i)
+        if step.kind == STEP_PARK:
+            parked += 1
+        else:
+            report.renamed[i] = step.dst
+            progress.advance()
+
+def _restore_parked(step, original, stat_cache, report, batch, engine):
+    """Move a parked item back to its original name if nothing took it meanwhile."""
+    if stat_cache.exists(original):
+        logger.warning("'%s' was left as '%s'", os.path.basename(original), step.src)
+        return
+    try:
+        batch.rename(step.src, original, engine=engine)
+        report.operations += 1
+        stat_cache.record_rename(step.src, original)
+    except OSError as e:
+        logger.warning("'%s' was left as '%s': %s", os.path.basename(original), step.src, e)
+
+def is_network_path(path):
+    """Best-effort check whether a path lives on a network share (False if unknown)."""
+    path = os.path.abspath(path)
+    if os.name == 'nt':
+        if path.startswith('\\\\'):
+            return True
+        try:
+            import ctypes
+            DRIVE_REMOTE = 4
+            return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + '\\') == DRIVE_REMOTE
+        except (ImportError, AttributeError, OSError):
+            return False
+    try:
+        with open('/proc/self/mounts', 'r') as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    best, fstype = '', ''
+    for mount_point, mount_type in mounts:
+        mount_point = mount_point.replace('\\040', ' ')
+        prefix = mount_point.rstrip('/') + '/'
+        if (path == mount_point or path.startswith(prefix)) and len(mount_point) > len(best):
+            best, fstype = mount_point, mount_type
+    return fstype in NETWORK_FILESYSTEMS
+
+def resolve_apply_workers(setting, path):
+    """
+    Turn the apply_workers option into a worker count.
+
+    Args:
+        setting: A number, or "auto" to go parallel only on network shares
+            (on a local disk the renames are too cheap for threads to help)
+        path (str): Folder being renamed in
+
+    Returns:
+        int: Number of folders to rename in at once
+    """
+    if setting == 'auto':
+        return DEFAULT_APPLY_WORKERS if is_network_path(path) else 1
+    try:
+        return max(1, int(setting))
+    except (TypeError, ValueError):
+        return 1
+
+def shard_moves(moves):
+    """
+    Group moves by the folder they happen in, for a parallel apply.
+
+    Returns:
+        list: One list of shards per folder depth, deepest first; each shard is
+            the list of indexes of the moves in one folder, in plan order.
+            None if a move changes folder, which makes folders depend on each other.
+    """
+    shards = {}
+    for i, (src, dst) in enumerate(moves):
+        directory = os.path.dirname(_key(src))
+        if os.path.dirname(_key(dst)) != directory:
+            return None
+        shards.setdefault(directory, []).append(i)
+    levels = {}
+    for directory, indexes in shards.items():
+        levels.setdefault(directory.count(os.sep), []).append(indexes)
+    return [levels[depth] for depth in sorted(levels, reverse=True)]
+
+def execute_moves_parallel(moves, stat_cache=None, batch=None, max_workers=DEFAULT_APPLY_WORKERS, progress=None,
+                           cancel=None):
+    """
+    Like ``execute_moves``, but renames in different folders run concurrently.
+
+    Moves are split by parent folder. Each folder's moves run as one shard,
+    in dependency order, on a bounded thread pool. This pays off on network
+    shares, where every rename is a round trip. Folders are done deepest
+    first, one depth at a time, so a folder is only renamed after everything
+    inside it. Plans that move items between folders run sequentially.
+
+    Args:
+        moves (list): (src, dst) path pairs
+        stat_cache (StatCache): Metadata cache to update with the completed renames
+        batch (JournalBatch): Journal batch the renames are recorded in
+        max_workers (int): Maximum number of folders worked on at once
+        progress (ProgressReporter): Receives one step per finished move, from every shard
+        cancel (CancellationToken): Stops every shard before its next move when set
+
+    Returns:
+        ExecutionReport: Combined outcome of every shard, indexed like ``moves``
+    """
+    levels = shard_moves(moves) if max_workers > 1 else None
+    if levels is None or all(len(level) == 1 for level in levels):
+        return execute_moves(moves, stat_cache, batch, progress=progress, cancel=cancel)
+    if batch is None:
+        batch = JournalBatch()
+    if progress is None:
+        progress = ProgressReporter()
+    if cancel is None:
+        cancel = CancellationToken()
+
+    def run_shard(indexes):
+        # Shards share nothing but the journal batch and the progress reporter
+        with RenameEngine() as engine:
+            return indexes, _execute([moves[i] for i in indexes], StatCache(), batch, engine, progress, cancel)
+
+    report = ExecutionReport()
+    progress.start(len(moves))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for level in levels:
+            if cancel.cancelled:
+                report.cancel_rest(i for shard in level for i in shard)
+                continue
+            for indexes, shard in pool.map(run_shard, level):
+                report.operations += shard.operations
+                report.cycles += shard.cycles
+                report.cancelled = report.cancelled or shard.cancelled
+                for combined, part in ((report.renamed, shard.renamed), (report.skipped, shard.skipped),
+                                       (report.failed, shard.failed), (report.errnos, shard.errnos)):
+                    for move, value in part.items():
+                        combined[indexes[move]] = value
+    progress.finish()
+
+    if stat_cache is not None:
+        for i in report.renamed:
+            stat_cache.record_rename(moves[i][0], moves[i][1])
+    return report
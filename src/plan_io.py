@@ -0,0 +1,369 @@
+import os
+import csv
+import json
+import stat
+
+try:
+    from src.rename_plan import RenamePlan, apply_plan, STATUS_OK, STATUS_UNCHANGED
+    from src.stat_cache import StatCache
+    from src.folder_operations import collapse_folder
+except ImportError:
+    from rename_plan import RenamePlan, apply_plan, STATUS_OK, STATUS_UNCHANGED
+    from stat_cache import StatCache
+    from folder_operations import collapse_folder
+
+OP_RENAME = 'rename'
+OP_COLLAPSE = 'collapse'
+_OPS = (OP_RENAME, OP_COLLAPSE)
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_CSV = 'csv'
+_EXTENSIONS = {'.jsonl': FORMAT_JSONL, '.ndjson': FORMAT_JSONL, '.csv': FORMAT_CSV}
+
+FIELDS = ('op', 'path', 'new_name', 'is_dir', 'size', 'mtime_ns')
+
+# Only this many stale rows are kept for display; the rest are just counted
+MAX_REPORTED = 100
+
+class PlanFormatError(ValueError):
+    """Raised when a plan file can't be read."""
+
+class PlanRecord:
+    """
+    One operation in a saved plan, with the fingerprint taken when it was planned.
+
+    Attributes:
+        op (str): OP_RENAME, or OP_COLLAPSE to merge the folder at ``path`` into its parent
+        path (str): Full path of the item the operation works on
+        new_name (str): New name in the same folder (for a collapse, the new name of the parent)
+        is_dir (bool): Whether the item was a folder
+        size (int): Size in bytes at planning time
+        mtime_ns (int): Modification time in nanoseconds at planning time
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, op, path, new_name, is_dir=False, size=None, mtime_ns=None):
+        self.op = op
+        self.path = path
+        self.new_name = new_name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def to_dict(self):
+        return dict((field, getattr(self, field)) for field in FIELDS)
+
+    def __repr__(self):
+        return f"PlanRecord({self.op}: {self.path!r} -> {self.new_name!r})"
+
+def detect_format(path):
+    """
+    Work out the plan file format from its extension.
+
+    Raises:
+        ValueError: If the extension is not .jsonl, .ndjson or .csv
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _EXTENSIONS:
+        raise ValueError(f"Unknown plan format '{extension}' (use .jsonl or .csv)")
+    return _EXTENSIONS[extension]
+
+def _fingerprint(st):
+    return stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime_ns
+
+class _FolderSnapshot:
+    """
+    Answers fingerprint lookups from one folder listing at a time.
+
+    Plans list the items of a folder together, so each folder is listed once
+    with ``os.scandir`` and only the current listing is kept. A folder that
+    comes back after another one was listed is looked up with single stats
+    instead of being listed again.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self._entries = {}
+        self._seen = set()
+
+    def _list(self, directory):
+        entries = {}
+        try:
+            with os.scandir(directory) as iterator:
+                for entry in iterator:
+                    entries[entry.name] = entry
+        except OSError:
+            pass
+        self.directory = directory
+        self._entries = entries
+        self._seen.add(directory)
+
+    def get(self, path):
+        """Get (is_dir, size, mtime_ns) for a path, or None if it does not exist."""
+        directory, name = os.path.split(path)
+        try:
+            if directory != self.directory:
+                if directory in self._seen:
+                    return _fingerprint(os.lstat(path))
+                self._list(directory)
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            # DirEntry caches the stat, and on Windows it comes with the listing
+            return _fingerprint(entry.stat(follow_symlinks=False))
+        except OSError:
+            return None
+
+def rename_items(rows):
+    """Turn plan rows (PlanRow records) into plan items, leaving out unchanged rows."""
+    for row in rows:
+        if row.new_name != row.name:
+            yield OP_RENAME, row.path, row.new_name
+
+def move_items(moves):
+    """Turn (old_path, new_path) pairs within one folder into plan items."""
+    for old_path, new_path in moves:
+        yield OP_RENAME, old_path, os.path.basename(new_path)
+
+def collapse_items(pairs):
+    """Turn the (parent, child) pairs from identify_redundant_folders into plan items."""
+    for parent_folder, child_folder in pairs:
+        yield OP_COLLAPSE, child_folder, f"{os.path.basename(parent_folder)}_{os.path.basename(child_folder)}"
+
+def snapshot_records(items):
+    """
+    Fingerprint plan items, listing each folder once.
+
+    Items whose path no longer exists are left out.
+
+    Args:
+        items (iterable): (op, path, new_name) tuples
+
+    Yields:
+        PlanRecord: One record per existing item
+    """
+    snapshot = _FolderSnapshot()
+    for op, path, new_name in items:
+        fingerprint = snapshot.get(path)
+        if fingerprint is not None:
+            is_dir, size, mtime_ns = fingerprint
+            yield PlanRecord(op, path, new_name, is_dir, size, mtime_ns)
+
+def write_plan(records, output_path, fmt=None):
+    """
+    Write plan records to a JSON Lines or CSV file as they arrive.
+
+    Args:
+        records (iterable): PlanRecord records
+        output_path (str): Destination file
+        fmt (str): FORMAT_JSONL or FORMAT_CSV (default: from the extension)
+
+    Returns:
+        int: Number of records written
+    """
+    fmt = fmt or detect_format(output_path)
+    count = 0
+    # surrogateescape writes undecodable file names back as their original bytes
+    with open(output_path, 'w', encoding='utf-8', errors='surrogateescape', newline='') as f:
+        if fmt == FORMAT_CSV:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(FIELDS)
+            for record in records:
+                writer.writerow([record.op, record.path, record.new_name, int(record.is_dir),
+                                 record.size, record.mtime_ns])
+                count += 1
+        else:
+            for record in records:
+                f.write(json.dumps(record.to_dict(), ensure_ascii=False))
+                f.write('\n')
+                count += 1
+    return count
+
+def export_items(items, output_path, fmt=None):
+    """
+    Fingerprint plan items and write them to a plan file in one streaming pass.
+
+    Args:
+        items (iterable): (op, path, new_name) tuples, e.g. from rename_items
+        output_path (str): Destination file (.jsonl or .csv)
+        fmt (str): FORMAT_JSONL or FORMAT_CSV (default: from the extension)
+
+    Returns:
+        int: Number of records written
+    """
+    return write_plan(snapshot_records(items), output_path, fmt)
+
+def _parse_int(value, field, line):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise PlanFormatError(f"Line {line}: '{field}' must be a number")
+
+def _parse_record(values, line):
+    op = values.get('op') or OP_RENAME
+    if op not in _OPS:
+        raise PlanFormatError(f"Line {line}: unknown operation '{op}'")
+    path = values.get('path')
+    new_name = values.get('new_name')
+    if not path or not new_name:
+        raise PlanFormatError(f"Line {line}: 'path' and 'new_name' are required")
+    # A new name must stay in the item's folder
+    if os.sep in new_name or (os.altsep and os.altsep in new_name) or new_name in (os.curdir, os.pardir):
+        raise PlanFormatError(f"Line {line}: '{new_name}' is not a plain name")
+    is_dir = values.get('is_dir')
+    if isinstance(is_dir, str):
+        is_dir = is_dir.strip().lower() in ('1', 'true', 'yes')
+    return PlanRecord(op, path, new_name, bool(is_dir), _parse_int(values.get('size'), 'size', line),
+                      _parse_int(values.get('mtime_ns'), 'mtime_ns', line))
+
+def read_plan(input_path, fmt=None):
+    """
+    Read plan records from a JSON Lines or CSV file one at a time.
+
+    Args:
+        input_path (str): Plan file
+        fmt (str): FORMAT_JSONL or FORMAT_CSV (default: from the extension)
+
+    Yields:
+        PlanRecord: One record per row
+
+    Raises:
+        PlanFormatError: If a row can't be read
+    """
+    fmt = fmt or detect_format(input_path)
+    with open(input_path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+        if fmt == FORMAT_CSV:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or 'path' not in reader.fieldnames or 'new_name' not in reader.fieldnames:
+                raise PlanFormatError("Line 1: the header needs at least 'path' and 'new_name' columns")
+            for values in reader:
+                yield _parse_record(values, reader.line_num)
+        else:
+            for line, text in enumerate(f, 1):
+                if not text.strip():
+                    continue
+                try:
+                    values = json.loads(text)
+                except ValueError as e:
+                    raise PlanFormatError(f"Line {line}: {e}")
+                if not isinstance(values, dict):
+                    raise PlanFormatError(f"Line {line}: expected an object")
+                yield _parse_record(values, line)
+
+def _problem(record, fingerprint):
+    if fingerprint is None:
+        return "no longer exists"
+    if record.size is None or record.mtime_ns is None:
+        return "has no fingerprint in the plan"
+    is_dir, size, mtime_ns = fingerprint
+    if is_dir != record.is_dir:
+        return "is now a folder" if is_dir else "is no longer a folder"
+    if size != record.size or mtime_ns != record.mtime_ns:
+        return "was modified after the plan was made"
+    return None
+
+def check_records(records):
+    """
+    Compare each record's fingerprint with the item on disk, listing each folder once.
+
+    Args:
+        records (iterable): PlanRecord records
+
+    Yields:
+        tuple: (record, problem), where problem is None if the item is unchanged
+    """
+    snapshot = _FolderSnapshot()
+    for record in records:
+        yield record, _problem(record, snapshot.get(record.path))
+
+class ImportedPlan:
+    """
+    A saved plan whose fingerprints have been checked.
+
+    Attributes:
+        renames (RenamePlan): Rename rows whose items are unchanged
+        collapses (list): Collapse PlanRecords whose folders are unchanged
+        total (int): Number of records in the file
+        stale_count (int): Number of records left out because their item changed
+        stale (list): The first MAX_REPORTED (record, problem) pairs left out
+    """
+
+    def __init__(self):
+        self.renames = RenamePlan()
+        self.collapses = []
+        self.total = 0
+        self.stale_count = 0
+        self.stale = []
+
+    def summary(self):
+        text = f"{self.total} planned change(s), {self.stale_count} out of date"
+        lines = [f"  {record.path}: {problem}" for record, problem in self.stale]
+        if self.stale_count > len(self.stale):
+            lines.append(f"  ... and {self.stale_count - len(self.stale)} more")
+        return "\n".join([text] + lines)
+
+def import_plan(input_path, fmt=None):
+    """
+    Read a saved plan and check every fingerprint before anything is applied.
+
+    The file is streamed and the checked rows go straight into a compact
+    RenamePlan, so memory grows with the plan's names rather than the file.
+
+    Args:
+        input_path (str): Plan file (.jsonl or .csv)
+        fmt (str): FORMAT_JSONL or FORMAT_CSV (default: from the extension)
+
+    Returns:
+        ImportedPlan: The rows that can still be applied, and the stale ones
+
+    Raises:
+        PlanFormatError: If a row can't be read
+    """
+    imported = ImportedPlan()
+    for record, problem in check_records(read_plan(input_path, fmt)):
+        imported.total += 1
+        if problem is not None:
+            imported.stale_count += 1
+            if len(imported.stale) < MAX_REPORTED:
+                imported.stale.append((record, problem))
+        elif record.op == OP_COLLAPSE:
+            imported.collapses.append(record)
+        else:
+            status = STATUS_UNCHANGED if record.new_name == os.path.basename(record.path) else STATUS_OK
+            imported.renames.append(record.path, record.new_name, record.is_dir, status)
+    return imported
+
+def apply_imported_plan(imported, skip_conflicts=False, batch=None, max_workers=1, progress=None, cancel=None,
+                        summary=None):
+    """
+    Apply an imported plan: the renames first, then the collapses in file order.
+
+    Args:
+        imported (ImportedPlan): Plan returned by import_plan
+        skip_conflicts (bool): Apply the conflict-free renames instead of refusing
+        batch (JournalBatch): Journal batch the changes are recorded in
+        max_workers (int): Number of folders renamed in at once
+        progress (ProgressReporter): Receives one step per rename (collapses are not counted)
+        cancel (CancellationToken): Stops before the next rename or collapse when set
+        summary (OutcomeSummary): Receives an Outcome per rename and collapse
+
+    Returns:
+        tuple: (items renamed, folders collapsed)
+
+    Raises:
+        PlanConflictError: If the renames conflict and skip_conflicts is not set
+    """
+    renamed = 0
+    if len(imported.renames):
+        renamed = apply_plan(imported.renames, skip_conflicts=skip_conflicts, batch=batch, max_workers=max_workers,
+                             progress=progress, cancel=cancel, summary=summary)
+    collapsed = 0
+    stat_cache = StatCache()
+    for record in imported.collapses:
+        if cancel is not None and cancel.cancelled:
+            break
+        if collapse_folder(os.path.dirname(record.path), record.path, stat_cache, batch, record.new_name, summary):
+            collapsed += 1
+    return renamed, collapsed
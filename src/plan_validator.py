@@ -0,0 +1,225 @@
+import os
+import sys
+
+try:
+    from src.rename_utils import split_name
+except ImportError:
+    from rename_utils import split_name
+
+CONFLICT_DUPLICATE = 'duplicate target'
+CONFLICT_EXISTING = 'existing item'
+CONFLICT_CASE = 'case-insensitive clash'
+CONFLICT_TOO_LONG = 'name too long'
+CONFLICT_INVALID = 'invalid name'
+CONFLICT_EMPTY = 'empty name'
+
+MAX_NAME_LENGTH = 255
+MAX_WINDOWS_PATH = 260
+
+_IS_WINDOWS = os.name == 'nt'
+_WINDOWS_RESERVED_CHARS = set('<>:"|?*') | set(chr(c) for c in range(32))
+
+def default_case_insensitive():
+    """Whether names on this system's default filesystems ignore case."""
+    return _IS_WINDOWS or sys.platform == 'darwin'
+
+class Conflict:
+    """
+    One problem found in a plan.
+
+    Attributes:
+        kind (str): One of the CONFLICT_* values
+        index (int): Index of the offending move (or plan row)
+        path (str): Current path of the item
+        target (str): Planned path
+        other (str): The path it clashes with, if any
+    """
+    __slots__ = ('kind', 'index', 'path', 'target', 'other')
+
+    def __init__(self, kind, index, path, target, other=None):
+        self.kind = kind
+        self.index = index
+        self.path = path
+        self.target = target
+        self.other = other
+
+    def describe(self):
+        message = f"{os.path.basename(self.path)} → {os.path.basename(self.target)}: {self.kind}"
+        if self.other:
+            message += f" ({os.path.basename(self.other)})"
+        return message
+
+    def __repr__(self):
+        return f"Conflict({self.kind!r}, {self.path!r} -> {self.target!r})"
+
+class ConflictReport:
+    """
+    Result of a pre-flight check.
+
+    Attributes:
+        conflicts (list): Conflict records that would make the plan fail or clobber data
+        warnings (list): Conflict records that only matter on other filesystems
+            (e.g. names differing only by case on a case-sensitive system)
+        checked (int): Number of moves checked
+    """
+
+    def __init__(self, checked=0):
+        self.conflicts = []
+        self.warnings = []
+        self.checked = checked
+
+    @property
+    def has_conflicts(self):
+        return bool(self.conflicts)
+
+    def conflicting_indexes(self):
+        """Get the indexes of every move with at least one conflict."""
+        return set(conflict.index for conflict in self.conflicts)
+
+    def counts(self):
+        """Count the conflicts per kind."""
+        counts = {}
+        for conflict in self.conflicts:
+            counts[conflict.kind] = counts.get(conflict.kind, 0) + 1
+        return counts
+
+    def summary(self, limit=10):
+        """
+        Describe the conflicts for display.
+
+        Args:
+            limit (int): Maximum number of individual conflicts to list
+
+        Returns:
+            str: Multi-line description
+        """
+        if not self.conflicts:
+            return f"No conflicts in {self.checked} planned renames."
+        totals = ", ".join(f"{count} {kind}" for kind, count in sorted(self.counts().items()))
+        lines = [f"{len(self.conflicting_indexes())} of {self.checked} planned renames conflict ({totals}):"]
+        lines.extend(f"  {conflict.describe()}" for conflict in self.conflicts[:limit])
+        if len(self.conflicts) > limit:
+            lines.append(f"  ... and {len(self.conflicts) - limit} more")
+        return "\n".join(lines)
+
+class PlanConflictError(Exception):
+    """Raised when a plan with unresolved conflicts is applied."""
+
+    def __init__(self, report):
+        super().__init__(report.summary())
+        self.report = report
+
+def _list_names(directory_path):
+    try:
+        with os.scandir(directory_path) as iterator:
+            return [entry.name for entry in iterator]
+    except OSError:
+        return []
+
+def has_empty_stem(name, new_name):
+    """
+    Check whether a new name has nothing before its extension.
+
+    Such a name (``.jpg`` for ``a.jpg``, e.g. from a template that rendered
+    empty) would turn the item into a hidden file.
+
+    Args:
+        name (str): Current name
+        new_name (str): Planned name
+
+    Returns:
+        bool: True if the new name is only dots or the current name's extension
+    """
+    if not new_name.strip('.'):
+        return True
+    extension = split_name(name)[1]
+    return bool(extension) and new_name.lower() == extension.lower()
+
+def _name_problem(name, target):
+    """Return the CONFLICT_* kind for a name that can't exist on disk, or None."""
+    if not name or name in ('.', '..') or '/' in name or os.sep in name or '\0' in name:
+        return CONFLICT_INVALID
+    if _IS_WINDOWS:
+        if any(char in _WINDOWS_RESERVED_CHARS for char in name) or name[-1] in ' .':
+            return CONFLICT_INVALID
+        if len(name) > MAX_NAME_LENGTH or len(os.path.abspath(target)) >= MAX_WINDOWS_PATH:
+            return CONFLICT_TOO_LONG
+    elif len(os.fsencode(name)) > MAX_NAME_LENGTH:
+        return CONFLICT_TOO_LONG
+    return None
+
+def validate_moves(moves, case_insensitive=None, indexes=None, list_names=_list_names):
+    """
+    Check a whole set of renames before anything on disk is touched.
+
+    Every folder that receives a target is listed once and the final set of
+    names in it is worked out in memory: names that the plan moves away are
+    free, names that stay are untouched. Targets are then checked against
+    that set and against each other, so the whole check is linear in the
+    number of moves plus the size of the folders involved. Chains and swaps
+    inside the plan are not conflicts; the executor orders them.
+
+    Args:
+        moves (list): (src, dst) path pairs
+        case_insensitive (bool): Treat names differing only by case as equal
+            (defaults to the platform's usual behaviour)
+        indexes (list): Index to report for each move (defaults to its position)
+        list_names (callable): Returns the names in a folder
+
+    Returns:
+        ConflictReport: Conflicts and warnings found
+    """
+    if case_insensitive is None:
+        case_insensitive = default_case_insensitive()
+    report = ConflictReport(len(moves))
+
+    def add(kind, position, other=None, warning=False):
+        src, dst = moves[position]
+        index = indexes[position] if indexes is not None else position
+        (report.warnings if warning else report.conflicts).append(Conflict(kind, index, src, dst, other))
+
+    # Names leaving each folder, keyed by the folder
+    leaving = {}
+    for src, _ in moves:
+        directory, name = os.path.split(os.path.abspath(src))
+        leaving.setdefault(os.path.normcase(directory), set()).add(name)
+
+    folders = {}  # folder key -> (untouched names, untouched names by casefold, claimed, claimed by casefold)
+    for position, (src, dst) in enumerate(moves):
+        directory, name = os.path.split(os.path.abspath(dst))
+        # An empty new name leaves a trailing separator, which abspath would hide
+        problem = CONFLICT_INVALID if dst.endswith(('/', os.sep)) else _name_problem(name, dst)
+        if not problem and has_empty_stem(os.path.basename(src), name):
+            problem = CONFLICT_EMPTY
+        if problem:
+            add(problem, position)
+            continue
+
+        folder_key = os.path.normcase(directory)
+        folder = folders.get(folder_key)
+        if folder is None:
+            gone = leaving.get(folder_key, set())
+            untouched = set(n for n in list_names(directory) if n not in gone)
+            folder = folders[folder_key] = (untouched, dict((n.casefold(), n) for n in untouched), {}, {})
+        untouched, untouched_folded, claimed, claimed_folded = folder
+        same_item = os.path.normcase(os.path.abspath(src)) == os.path.normcase(os.path.abspath(dst))
+        folded = name.casefold()
+
+        if name in claimed:
+            add(CONFLICT_DUPLICATE, position, moves[claimed[name]][0])
+            continue
+        if name in untouched and not same_item:
+            add(CONFLICT_EXISTING, position, os.path.join(directory, name))
+            continue
+        if folded in untouched_folded and not same_item:
+            add(CONFLICT_CASE, position, os.path.join(directory, untouched_folded[folded]),
+                warning=not case_insensitive)
+            if case_insensitive:
+                continue
+        elif folded in claimed_folded:
+            add(CONFLICT_CASE, position, moves[claimed_folded[folded]][0], warning=not case_insensitive)
+            if case_insensitive:
+                continue
+        claimed[name] = position
+        claimed_folded.setdefault(folded, position)
+    return report
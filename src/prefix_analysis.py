@@ -0,0 +1,160 @@
+from collections import Counter
+from itertools import islice
+
+DEFAULT_MIN_CLUSTER = 2  # names that must share a prefix before it counts as one
+
+def _split_base(name):
+    return name.rsplit('.', 1)[0]
+
+def prefix_head(name):
+    """
+    Get the part of a name that can hold prefixes: everything up to its last underscore.
+
+    Args:
+        name (str): File or folder name
+
+    Returns:
+        str: e.g. ``"scan_2024_"`` for ``"scan_2024_001.png"``, or "" without an underscore
+    """
+    base = _split_base(name)
+    return base[:base.rfind('_') + 1]
+
+def suffix_tail(name):
+    """
+    Get the part of a name that can hold suffixes, reversed so it sorts like a prefix.
+
+    Args:
+        name (str): File or folder name
+
+    Returns:
+        str: e.g. ``"tide_"`` for ``"IMG_edit.jpg"`` (``"_edit"`` reversed), or ""
+    """
+    base = _split_base(name)
+    first = base.find('_')
+    return base[first:][::-1] if first >= 0 else ""
+
+def _shared_length(a, b):
+    """Length of the longest underscore-terminated prefix two strings have in common."""
+    length = 0
+    end = a.find('_') + 1
+    while end and b.startswith(a[:end]):
+        length = end
+        end = a.find('_', end) + 1
+    return length
+
+def _cluster_keys(keys, min_size):
+    """
+    Find the deepest underscore-terminated prefix each key shares with enough others.
+
+    Sorted neighbors are enough: in sorted order the longest prefix a key
+    shares with ``min_size - 1`` others is shared by a run of ``min_size``
+    consecutive keys. So after one sort only the common prefix of adjacent
+    keys is measured, one underscore-delimited token at a time.
+
+    Args:
+        keys (list): Strings ending in ``'_'`` (or empty)
+        min_size (int): Smallest number of keys that make a cluster (at least 2)
+
+    Returns:
+        Counter: Cluster prefix -> number of keys whose deepest cluster it is
+    """
+    min_size = max(2, min_size)
+    keys = sorted(key for key in keys if key)
+    count = len(keys)
+    if count < min_size:
+        return Counter()
+    # shared[j]: common prefix length of keys j and j + 1
+    shared = [_shared_length(a, b) for a, b in zip(keys, islice(keys, 1, None))]
+    span = min_size - 1
+    if span == 1:
+        # Each key takes the deeper of its two neighbors
+        depths = list(map(max, [0] + shared, shared + [0]))
+    else:
+        # runs[s]: common prefix length of the run of min_size keys starting at s
+        runs = [min(shared[start:start + span]) for start in range(count - span)]
+        # Each key takes the deepest run it belongs to
+        depths = [max(runs[max(0, i - span):i + 1]) for i in range(count)]
+    return Counter(key[:depth] for key, depth in zip(keys, depths) if depth)
+
+class PrefixClusters:
+    """
+    The prefix and suffix clusters found in a set of names.
+
+    A cluster is an underscore-delimited prefix (like ``"IMG_"`` or
+    ``"scan_2024_"``) or suffix (like ``"_edit"``) shared by at least
+    ``min_size`` names. Each name belongs to the deepest cluster it shares,
+    so a folder that mixes camera and export names gets one prefix per group.
+
+    Attributes:
+        prefixes (dict): Cluster prefix -> number of names in the cluster
+        suffixes (dict): Cluster suffix -> number of names in the cluster
+    """
+
+    def __init__(self, prefixes=None, suffixes=None):
+        self.prefixes = prefixes or {}
+        self.suffixes = suffixes or {}
+
+    def prefix_for(self, name):
+        """
+        Get the cluster prefix of a name.
+
+        Returns:
+            str: The deepest cluster prefix the name starts with, or "" if none
+        """
+        head = prefix_head(name)
+        prefixes = self.prefixes
+        end = len(head)
+        while end > 0:
+            if head[:end] in prefixes:
+                return head[:end]
+            end = head.rfind('_', 0, end - 1) + 1
+        return ""
+
+    def suffix_for(self, name):
+        """
+        Get the cluster suffix of a name (before its extension).
+
+        Returns:
+            str: The deepest cluster suffix the name ends with, or "" if none
+        """
+        tail = suffix_tail(name)
+        end = len(tail)
+        while end > 0:
+            suffix = tail[:end][::-1]
+            if suffix in self.suffixes:
+                return suffix
+            end = tail.rfind('_', 0, end - 1) + 1
+        return ""
+
+    def largest(self, limit=5):
+        """Get the biggest prefix clusters as (prefix, count) pairs, largest first."""
+        return sorted(self.prefixes.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def __bool__(self):
+        return bool(self.prefixes)
+
+def analyze_names(names, min_size=DEFAULT_MIN_CLUSTER, suffixes=False):
+    """
+    Find the prefix (and suffix) clusters in a set of names.
+
+    One sort plus a pass over adjacent pairs does the work, so apart from the
+    sort the cost is linear in the total length of the names and a million
+    names take a few seconds. Suffixes are only analyzed on request, as they
+    roughly double that.
+
+    Args:
+        names (iterable): File or folder names
+        min_size (int): Smallest number of names that make a cluster
+        suffixes (bool): Whether to look for suffix clusters too
+
+    Returns:
+        PrefixClusters: The clusters found
+    """
+    bases = [name.rsplit('.', 1)[0] for name in names]
+    heads = [base[:base.rfind('_') + 1] for base in bases]
+    suffix_clusters = {}
+    if suffixes:
+        tails = [base[base.find('_'):][::-1] for base in bases if '_' in base]
+        suffix_clusters = dict((tail[::-1], count) for tail, count in _cluster_keys(tails, min_size).items())
+    del bases
+    return PrefixClusters(dict(_cluster_keys(heads, min_size)), suffix_clusters)
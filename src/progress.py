@@ -0,0 +1,147 @@
+import time
+import threading
+
+DEFAULT_INTERVAL = 0.1  # seconds between progress callbacks
+
+class OperationCancelled(Exception):
+    """Raised when an operation stops because its cancellation token was set."""
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag shared between a caller and an operation.
+
+    The caller sets it with ``cancel`` (from any thread); the operation checks
+    it between items and stops at the next point where nothing is left half
+    done. Work completed before that point is kept.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            OperationCancelled: If cancellation was requested
+        """
+        if self._event.is_set():
+            raise OperationCancelled()
+
+class ProgressReporter:
+    """
+    Counts finished items and passes the progress to a callback at a throttled rate.
+
+    Operations call ``start`` with the number of items (None if unknown),
+    ``advance`` as items finish (it is safe to call from several threads) and
+    ``finish`` at the end. The callback receives the reporter itself and is
+    called on start, on finish and at most once every ``interval`` seconds in
+    between, so per-item updates cost only a counter increment.
+
+    Attributes:
+        done (int): Items finished so far
+        total (int): Items expected, or None if unknown
+    """
+
+    def __init__(self, callback=None, interval=DEFAULT_INTERVAL, clock=time.monotonic):
+        self.callback = callback
+        self.interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.done = 0
+        self.total = None
+        self.finished = False
+        self._started = clock()
+        self._last = self._started
+
+    def _emit(self):
+        if self.callback is not None:
+            self.callback(self)
+
+    def start(self, total=None):
+        """Reset the counters for a new run of ``total`` items."""
+        with self._lock:
+            self.done = 0
+            self.total = total
+            self.finished = False
+            self._started = self._last = self._clock()
+        self._emit()
+
+    def add_total(self, count):
+        """Raise the expected total, e.g. when more work is discovered."""
+        with self._lock:
+            self.total = (self.total or 0) + count
+
+    def advance(self, count=1):
+        """Record ``count`` more finished items."""
+        with self._lock:
+            self.done += count
+            now = self._clock()
+            if now - self._last < self.interval:
+                return
+            self._last = now
+        self._emit()
+
+    def finish(self):
+        """Mark the run as finished and send a last update."""
+        with self._lock:
+            self.finished = True
+            self._last = self._clock()
+        self._emit()
+
+    @property
+    def elapsed(self):
+        """Seconds since ``start``."""
+        return self._clock() - self._started
+
+    @property
+    def rate(self):
+        """Items finished per second, or 0.0 before the first second's worth of data."""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Estimated seconds left, or None if the total or the rate is unknown."""
+        rate = self.rate
+        if self.total is None or not rate:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+
+def _format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+def format_progress(reporter, width=30):
+    """
+    Render a progress reporter as one line of text.
+
+    Args:
+        reporter (ProgressReporter): Reporter to render
+        width (int): Width of the bar in characters (0 for no bar)
+
+    Returns:
+        str: e.g. ``[#########.........] 300/900 120.5/s ETA 0:05``
+    """
+    parts = []
+    if reporter.total:
+        if width:
+            filled = min(width, int(width * reporter.done / reporter.total))
+            parts.append("[" + "#" * filled + "." * (width - filled) + "]")
+        parts.append(f"{reporter.done}/{reporter.total}")
+    else:
+        parts.append(str(reporter.done))
+    parts.append(f"{reporter.rate:.1f}/s")
+    if reporter.finished:
+        parts.append(f"in {_format_seconds(reporter.elapsed)}")
+    elif reporter.eta is not None:
+        parts.append(f"ETA {_format_seconds(reporter.eta)}")
+    return " ".join(parts)
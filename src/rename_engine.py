@@ -0,0 +1,119 @@
+import os
+from bisect import bisect_left, insort
+
+# renameat() is available and directories can be opened as handles
+SUPPORTS_DIR_FD = os.rename in os.supports_dir_fd and hasattr(os, 'O_DIRECTORY')
+
+# O_PATH handles only need search permission on the folder and are all *at() calls need
+_DIR_FLAGS = (getattr(os, 'O_PATH', 0) or os.O_RDONLY) | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_CLOEXEC', 0)
+
+DEFAULT_MAX_OPEN = 128
+
+class RenameEngine:
+    """
+    Issues renames relative to open directory handles.
+
+    Passing full paths makes the kernel walk every component of both paths on
+    each call, which adds up on deep trees and network mounts. The engine opens
+    each folder once, keeps up to ``max_open`` handles (the oldest are closed
+    first) and passes bare names with ``src_dir_fd``/``dst_dir_fd``.
+    Where the platform has no ``dir_fd`` support (e.g. Windows), or a folder
+    can't be opened, it falls back to plain path-based calls.
+
+    A handle stays bound to the folder it was opened on, so handles for a
+    folder that is itself renamed (or anything below it) are dropped.
+    """
+
+    def __init__(self, use_dir_fd=None, max_open=DEFAULT_MAX_OPEN):
+        if use_dir_fd is None:
+            use_dir_fd = SUPPORTS_DIR_FD
+        self.use_dir_fd = bool(use_dir_fd) and SUPPORTS_DIR_FD
+        self.max_open = max(2, int(max_open))
+        self._handles = {}  # folder path -> fd, oldest first
+        self._sorted = []  # the same folder paths, sorted, so the handles below a path are one run
+        self._keys = {}  # folder as spelled in a path -> (absolute folder path, same with trailing separator)
+        self.opened = 0
+        self.renames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Close every open directory handle."""
+        while self._handles:
+            self._release(next(iter(self._handles)))
+
+    def _release(self, directory):
+        fd = self._handles.pop(directory)
+        del self._sorted[bisect_left(self._sorted, directory)]
+        os.close(fd)
+
+    def _below(self, path):
+        """Get the folders with an open handle that are ``path`` or lie below it."""
+        below = path.rstrip(os.sep) + os.sep
+        start = bisect_left(self._sorted, below)
+        end = start
+        while end < len(self._sorted) and self._sorted[end].startswith(below):
+            end += 1
+        folders = self._sorted[start:end]
+        if path in self._handles:
+            folders.append(path)
+        return folders
+
+    def _open(self, directory):
+        """Open a handle for a folder, or return None if it can't be opened."""
+        try:
+            fd = os.open(directory, _DIR_FLAGS)
+        except OSError:
+            return None
+        if len(self._handles) >= self.max_open:
+            # Plans are grouped by folder, so the oldest handle is the least likely to be needed again
+            self._release(next(iter(self._handles)))
+        self._handles[directory] = fd
+        insort(self._sorted, directory)
+        self.opened += 1
+        return fd
+
+    def _forget(self, path):
+        """Drop the handles on ``path`` and below it after it was moved."""
+        for directory in self._below(path):
+            self._release(directory)
+
+    def _locate(self, path):
+        """Split a path into (folder handle or None, absolute folder path with trailing separator, name)."""
+        i = path.rfind(os.sep)
+        directory = path[:i] if i > 0 else path[:i + 1]
+        name = path[i + 1:]
+        # Normalising the folder once per distinct spelling keeps per-call overhead low
+        folder = self._keys.get(directory)
+        if folder is None:
+            key = os.path.abspath(directory or os.curdir)
+            folder = self._keys[directory] = (key, os.path.join(key, ''))
+        fd = self._handles.get(folder[0])
+        if fd is None and name:
+            fd = self._open(folder[0])
+        return fd, folder[1], name
+
+    def rename(self, src, dst):
+        """
+        Rename ``src`` to ``dst``.
+
+        Raises:
+            OSError: If the rename fails
+        """
+        if self.use_dir_fd:
+            src_fd, src_prefix, src_name = self._locate(src)
+            dst_fd, dst_prefix, dst_name = self._locate(dst)
+            if src_fd is not None and dst_fd is not None:
+                os.rename(src_name, dst_name, src_dir_fd=src_fd, dst_dir_fd=dst_fd)
+                self.renames += 1
+                # Handles on (or below) a folder that was just moved no longer match their path
+                self._forget(src_prefix + src_name)
+                self._forget(dst_prefix + dst_name)
+                return
+        os.rename(src, dst)
+        self.renames += 1
@@ -0,0 +1,525 @@
+import os
+import csv
+import logging
+from array import array
+
+try:
+    from src.scanner import ScanEntry, iter_directory, scan_tree
+    from src.stat_cache import StatCache
+    from src.plan_executor import execute_moves_parallel, SKIP_CANCELLED
+    from src.plan_validator import validate_moves, has_empty_stem, PlanConflictError
+    from src.rename_utils import generate_new_name, generate_new_names, RegexRule, remove_prefix_and_order, parse_generated_name
+    from src.outcomes import Outcome, OutcomeSummary, OUTCOME_CONFLICT, log_outcome
+except ImportError:
+    from scanner import ScanEntry, iter_directory, scan_tree
+    from stat_cache import StatCache
+    from plan_executor import execute_moves_parallel, SKIP_CANCELLED
+    from plan_validator import validate_moves, has_empty_stem, PlanConflictError
+    from rename_utils import generate_new_name, generate_new_names, RegexRule, remove_prefix_and_order, parse_generated_name
+    from outcomes import Outcome, OutcomeSummary, OUTCOME_CONFLICT, log_outcome
+
+STATUS_OK = 'ok'
+STATUS_UNCHANGED = 'unchanged'
+STATUS_CONFLICT = 'conflict'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+# Status strings are stored as one byte per row; the code is the index here
+_STATUSES = (STATUS_OK, STATUS_UNCHANGED, STATUS_CONFLICT, STATUS_DONE, STATUS_FAILED)
+_STATUS_CODES = dict((status, code) for code, status in enumerate(_STATUSES))
+
+logger = logging.getLogger(__name__)
+
+class PlanRow:
+    """
+    One planned rename.
+
+    Attributes:
+        path (str): Current full path
+        name (str): Current name
+        new_name (str): Planned name (in the same folder)
+        is_dir (bool): Whether the item is a folder
+        status (str): STATUS_OK, STATUS_UNCHANGED or STATUS_CONFLICT
+    """
+    __slots__ = ('path', 'name', 'new_name', 'is_dir', 'status')
+
+    def __init__(self, path, name, new_name, is_dir=False, status=STATUS_OK):
+        self.path = path
+        self.name = name
+        self.new_name = new_name
+        self.is_dir = is_dir
+        self.status = status
+
+    @property
+    def new_path(self):
+        return os.path.join(os.path.dirname(self.path), self.new_name)
+
+    def __repr__(self):
+        return f"PlanRow({self.path!r} -> {self.new_name!r}, {self.status})"
+
+class _StringColumn:
+    """
+    Append-only column of strings packed into one UTF-8 buffer.
+
+    Each string costs its encoded length plus an 8-byte offset instead of a
+    full Python object. ``surrogatepass`` keeps undecodable file names (which
+    os.fsdecode turns into lone surrogates) intact.
+    """
+    __slots__ = ('_data', '_offsets')
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+
+    def append(self, value):
+        self._data += value.encode('utf-8', 'surrogatepass')
+        self._offsets.append(len(self._data))
+
+    def __getitem__(self, index):
+        return self._data[self._offsets[index]:self._offsets[index + 1]].decode('utf-8', 'surrogatepass')
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+class RenamePlan:
+    """
+    Compact, column-oriented store for a whole rename plan.
+
+    Folder paths are interned once in a directory table and every row keeps
+    only a 4-byte index into it. Old and new names are packed into string
+    columns, and the status and folder flag take one byte each, so a row costs
+    roughly the length of its two names plus a few dozen bytes. Rows are
+    handed out as PlanRow records on access.
+    """
+
+    def __init__(self):
+        self._dirs = []
+        self._dir_ids = {}
+        self._dir_index = array('I')
+        self._names = _StringColumn()
+        self._new_names = _StringColumn()
+        self._status = bytearray()
+        self._is_dir = bytearray()
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Collect plan rows (e.g. the output of build_plan) into a compact plan.
+
+        Args:
+            rows (iterable): PlanRow records
+
+        Returns:
+            RenamePlan: The filled plan
+        """
+        plan = cls()
+        plan.extend(rows)
+        return plan
+
+    def append(self, path, new_name, is_dir=False, status=STATUS_OK):
+        """
+        Add one row.
+
+        Args:
+            path (str): Current full path
+            new_name (str): Planned name in the same folder
+            is_dir (bool): Whether the item is a folder
+            status (str): One of the STATUS_* values
+        """
+        directory, name = os.path.split(path)
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_ids[directory] = len(self._dirs)
+            self._dirs.append(directory)
+        self._dir_index.append(dir_id)
+        self._names.append(name)
+        self._new_names.append(new_name)
+        self._status.append(_STATUS_CODES[status])
+        self._is_dir.append(1 if is_dir else 0)
+
+    def extend(self, rows):
+        """Add every PlanRow from an iterable."""
+        for row in rows:
+            self.append(row.path, row.new_name, row.is_dir, row.status)
+
+    def __len__(self):
+        return len(self._status)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return PlanRow(self.path(index), self._names[index], self._new_names[index],
+                       bool(self._is_dir[index]), _STATUSES[self._status[index]])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def directory(self, index):
+        return self._dirs[self._dir_index[index]]
+
+    def name(self, index):
+        return self._names[index]
+
+    def new_name(self, index):
+        return self._new_names[index]
+
+    def path(self, index):
+        return os.path.join(self._dirs[self._dir_index[index]], self._names[index])
+
+    def new_path(self, index):
+        return os.path.join(self._dirs[self._dir_index[index]], self._new_names[index])
+
+    def is_dir(self, index):
+        return bool(self._is_dir[index])
+
+    def status(self, index):
+        return _STATUSES[self._status[index]]
+
+    def set_status(self, index, status):
+        self._status[index] = _STATUS_CODES[status]
+
+    def paths(self):
+        """Get the current full path of every row, in plan order."""
+        return [self.path(index) for index in range(len(self))]
+
+    def count(self, status):
+        """Count the rows with the given status."""
+        return self._status.count(_STATUS_CODES[status])
+
+def stream_entries(directory_path, include_folders=False, recursive=False, entry_filter=None, catalog=None):
+    """
+    Yield the items to rename one at a time.
+
+    Args:
+        directory_path (str): Folder to scan
+        include_folders (bool): Whether to include folders
+        recursive (bool): Whether to include the contents of subfolders
+        entry_filter (callable): Predicate applied to each entry before it is kept
+        catalog (DirectoryCatalog): Reuse unchanged folder listings from this catalog
+
+    Returns:
+        iterator: ScanEntry records, one per item, in a stable order
+    """
+    if catalog is not None:
+        if recursive:
+            return catalog.scan_tree(directory_path, include_folders=include_folders, entry_filter=entry_filter)
+        return iter(catalog.scan_directory(directory_path, include_folders=include_folders,
+                                           entry_filter=entry_filter))
+    if recursive:
+        return scan_tree(directory_path, include_folders=include_folders, ordered=True, entry_filter=entry_filter)
+    return iter_directory(directory_path, include_folders=include_folders, entry_filter=entry_filter)
+
+def stream_common_prefix(names):
+    """
+    Compute ``find_longest_common_prefix`` over a stream of names without keeping them.
+
+    Only the smallest and largest name are tracked; their common prefix is
+    the one shared by every name.
+
+    Args:
+        names (iterable): File or folder names
+
+    Returns:
+        str: The common prefix, cut back to its last underscore
+    """
+    lowest = highest = None
+    for name in names:
+        if lowest is None:
+            lowest = highest = name
+        elif name < lowest:
+            lowest = name
+        elif name > highest:
+            highest = name
+    if lowest is None:
+        return ""
+    prefix = os.path.commonprefix([lowest, highest])
+    last_underscore = prefix.rfind('_')
+    if last_underscore > 0:
+        prefix = prefix[:last_underscore + 1]
+    return prefix
+
+def transform_names(entries, remove_prefixes=False, common_prefix=None, regex_rule=None, prefix_clusters=None,
+                    cleaner=None):
+    """
+    Apply the name transforms that run before the new prefix is added.
+
+    Args:
+        entries (iterable): ScanEntry records
+        remove_prefixes (bool): Whether to strip existing prefixes and order numbers
+        common_prefix (str): Shared prefix to strip
+        regex_rule (RegexRule): Compiled regex rule applied after prefix removal
+        prefix_clusters (PrefixClusters): Strip each name's own cluster prefix instead of common_prefix
+        cleaner (NameCleaner): Cleaning rules for the prefix removal (the built-in rules if omitted)
+
+    Yields:
+        tuple: (entry, transformed_name)
+    """
+    for entry in entries:
+        name = entry.name
+        if remove_prefixes:
+            name = remove_prefix_and_order(name, common_prefix, prefix_clusters=prefix_clusters, cleaner=cleaner)
+        if regex_rule is not None:
+            name = regex_rule.rename(name)
+        yield entry, name
+
+def next_order_index(names, prefix_format, start_index=1):
+    """
+    Find where numbering continues in a folder that was partly renamed before.
+
+    Args:
+        names (iterable): Current file or folder names
+        prefix_format (str): Prefix the earlier run used
+        start_index (int): Lowest number to return
+
+    Returns:
+        int: One past the highest existing sequence number, or start_index if that is higher
+    """
+    highest = start_index - 1
+    for name in names:
+        order = parse_generated_name(name, prefix_format, True)
+        if order is not None and order > highest:
+            highest = order
+    return highest + 1
+
+def assign_names(pairs, prefix_format, use_order=False, start_index=1, incremental=False, template=None):
+    """
+    Build the final names, numbering the items in the order they arrive.
+
+    In incremental mode, items whose current name already follows the naming
+    scheme keep it and do not use up a number (only for the built-in
+    prefix/number scheme, not for templates). Without numbering the names
+    are built as the pairs arrive; with numbering the pairs are collected
+    first, since the numbers are zero-padded to the width the item count
+    needs, and the names are built in one batch (see generate_new_names).
+
+    Args:
+        template (NameTemplate): Naming template to render instead of the built-in scheme
+
+    Yields:
+        tuple: (entry, new_name)
+    """
+    if template is not None:
+        incremental = False
+    if not use_order:
+        for entry, name in pairs:
+            if incremental and parse_generated_name(entry.name, prefix_format) is not None:
+                yield entry, entry.name
+            elif template is not None:
+                yield entry, template.render(entry, name, None, prefix_format)
+            else:
+                yield entry, generate_new_name(name, prefix_format)
+        return
+    entries = []
+    names = []
+    for entry, name in pairs:
+        entries.append(entry)
+        # None marks an item that keeps its current name
+        kept = incremental and parse_generated_name(entry.name, prefix_format, True) is not None
+        names.append(None if kept else name)
+    numbered = [name for name in names if name is not None]
+    if template is not None:
+        new_names = template.render_names(entries, numbered, prefix_format, True, start_index)
+    else:
+        new_names = generate_new_names(numbered, prefix_format, True, start_index)
+    new_names = iter(new_names)
+    for entry, name in zip(entries, names):
+        yield entry, entry.name if name is None else next(new_names)
+
+def check_collisions(pairs, stat_cache=None):
+    """
+    Turn (entry, new_name) pairs into plan rows, flagging names that would collide.
+
+    A row is a conflict when its target already exists on disk, an earlier
+    row claims the same target, or the new name has no stem (e.g. ``.jpg``
+    left over from an empty template), which would turn the item into a
+    hidden file. Only the set of claimed targets is kept.
+
+    Yields:
+        PlanRow: One row per pair
+    """
+    if stat_cache is None:
+        stat_cache = StatCache()
+    claimed = set()
+    for entry, new_name in pairs:
+        if new_name == entry.name:
+            yield PlanRow(entry.path, entry.name, new_name, entry.is_dir, STATUS_UNCHANGED)
+            continue
+        new_path = os.path.join(os.path.dirname(entry.path), new_name)
+        key = os.path.normcase(new_path)
+        status = STATUS_OK
+        if has_empty_stem(entry.name, new_name):
+            yield PlanRow(entry.path, entry.name, new_name, entry.is_dir, STATUS_CONFLICT)
+            continue
+        if key in claimed:
+            status = STATUS_CONFLICT
+        elif key != os.path.normcase(entry.path) and stat_cache.exists(new_path):
+            status = STATUS_CONFLICT
+        claimed.add(key)
+        yield PlanRow(entry.path, entry.name, new_name, entry.is_dir, status)
+
+def build_plan(entries, prefix_format, use_order=False, remove_prefixes=False, common_prefix=None,
+               regex_pattern=None, regex_replacement='', start_index=1, stat_cache=None, incremental=False,
+               prefix_clusters=None, cleaner=None, template=None):
+    """
+    Chain the plan stages (transform -> name -> collision check) lazily.
+
+    Nothing is materialized here; sorting, if wanted, has to happen on the
+    entries before they are passed in. With numbering, the first row comes
+    once every entry has been read, as the numbers are padded to the width
+    the count needs. For an incremental run over a folder
+    that was renamed before, pass ``incremental=True`` and a start_index from
+    next_order_index: items that already follow the scheme become
+    STATUS_UNCHANGED rows and the rest are numbered after them.
+
+    Args:
+        entries (iterable): ScanEntry records in numbering order
+        prefix_format (str): Prefix for the new names
+        use_order (bool): Whether to insert sequence numbers
+        remove_prefixes (bool): Whether to strip existing prefixes and order numbers first
+        common_prefix (str): Shared prefix to strip (see stream_common_prefix)
+        prefix_clusters (PrefixClusters): Per-cluster prefixes to strip instead (see analyze_names)
+        cleaner (NameCleaner): Cleaning rules for the prefix removal (see load_name_cleaner)
+        template (NameTemplate): Naming template used instead of prefix + number (see load_name_template)
+        regex_pattern (str): Optional regex applied after prefix removal
+        regex_replacement (str): Replacement for regex_pattern
+        start_index (int): First sequence number
+        stat_cache (StatCache): Metadata cache used for the collision check
+        incremental (bool): Leave items that already follow the naming scheme as they are
+
+    Yields:
+        PlanRow: One row per entry
+
+    Raises:
+        RegexRuleError: At call time if the regex is invalid or risky; while rows are
+            generated if the regex runs over its time budget on a name
+        TemplateError: At call time if the template uses ``{index}`` without ordering
+    """
+    # The regex and template are checked here, before any entry is read
+    if template is not None:
+        template.check_numbering(use_order)
+    regex_rule = RegexRule(regex_pattern, regex_replacement) if regex_pattern else None
+    pairs = transform_names(entries, remove_prefixes, common_prefix, regex_rule, prefix_clusters, cleaner)
+    pairs = assign_names(pairs, prefix_format, use_order, start_index, incremental, template)
+    return check_collisions(pairs, stat_cache)
+
+def build_suggestion_plan(suggestions, stat_cache=None):
+    """
+    Collect suggested names, e.g. from the AI renamer, into a compact plan.
+
+    Args:
+        suggestions (iterable): (full_path, new_name) pairs
+        stat_cache (StatCache): Metadata cache used for the type and collision checks
+
+    Returns:
+        RenamePlan: One row per suggestion, flagged like the rows of build_plan
+    """
+    if stat_cache is None:
+        stat_cache = StatCache()
+    pairs = ((ScanEntry(os.path.basename(path), path, stat_cache.isdir(path)), new_name)
+             for path, new_name in suggestions)
+    return RenamePlan.from_rows(check_collisions(pairs, stat_cache))
+
+def _pending_rows(plan):
+    return [index for index in range(len(plan)) if plan.status(index) in (STATUS_OK, STATUS_CONFLICT)]
+
+def validate_plan(plan, case_insensitive=None):
+    """
+    Run the pre-flight check over every pending row of a RenamePlan.
+
+    Rows are re-marked from the result: STATUS_CONFLICT if they have a real
+    conflict, STATUS_OK otherwise (the streaming collision check can only
+    flag names that are in use, not whether the plan frees them).
+
+    Args:
+        plan (RenamePlan): Plan to check
+        case_insensitive (bool): Treat names differing only by case as equal
+
+    Returns:
+        ConflictReport: Conflicts and warnings, with plan row indexes
+    """
+    rows = _pending_rows(plan)
+    report = validate_moves([(plan.path(index), plan.new_path(index)) for index in rows], case_insensitive, rows)
+    conflicting = report.conflicting_indexes()
+    for index in rows:
+        plan.set_status(index, STATUS_CONFLICT if index in conflicting else STATUS_OK)
+    return report
+
+def apply_plan(plan, stat_cache=None, skip_conflicts=False, batch=None, max_workers=1, progress=None, cancel=None,
+               summary=None):
+    """
+    Carry out the renames in a RenamePlan.
+
+    The whole plan is validated first and nothing is renamed if it has
+    conflicts, unless ``skip_conflicts`` is set, in which case the conflicting
+    rows are left out. The remaining rows are handed to the plan executor as
+    one set, so chains and swaps inside the plan succeed. Every attempted row
+    ends up as STATUS_DONE, STATUS_CONFLICT or STATUS_FAILED; rows not reached
+    before a cancellation stay STATUS_OK.
+
+    Args:
+        plan (RenamePlan): Plan to apply
+        stat_cache (StatCache): Metadata cache for this operation
+        skip_conflicts (bool): Apply the conflict-free rows instead of refusing
+        batch (JournalBatch): Journal batch the renames are recorded in
+        max_workers (int): Number of folders renamed in at once (1 for a sequential apply)
+        progress (ProgressReporter): Receives one step per applied row
+        cancel (CancellationToken): Stops the apply before the next row when set
+        summary (OutcomeSummary): Receives an Outcome per attempted or conflicting row
+            (if omitted, problems are logged as one summary warning)
+
+    Returns:
+        int: Number of items renamed
+
+    Raises:
+        PlanConflictError: If the plan has conflicts and skip_conflicts is not set
+    """
+    report = validate_plan(plan)
+    if report.has_conflicts and not skip_conflicts:
+        raise PlanConflictError(report)
+    own_summary = summary is None
+    if own_summary:
+        summary = OutcomeSummary()
+    for conflict in report.conflicts:
+        summary.add(Outcome(OUTCOME_CONFLICT, 'rename', conflict.path, conflict.target, conflict.kind))
+
+    rows = [index for index in range(len(plan)) if plan.status(index) == STATUS_OK]
+    moves = [(plan.path(index), plan.new_path(index)) for index in rows]
+    result = execute_moves_parallel(moves, stat_cache, batch, max_workers, progress, cancel)
+
+    for move, index in enumerate(rows):
+        if move in result.renamed:
+            plan.set_status(index, STATUS_DONE)
+        elif move in result.failed:
+            plan.set_status(index, STATUS_FAILED)
+        elif result.skipped.get(move) == SKIP_CANCELLED:
+            continue
+        else:
+            plan.set_status(index, STATUS_CONFLICT)
+        outcome = result.outcome(moves, move)
+        log_outcome(logger, outcome)
+        summary.add(outcome)
+    if own_summary:
+        summary.log(logger)
+    return len(result.renamed)
+
+def export_plan(rows, output_path):
+    """
+    Write plan rows to a tab-separated file as they are generated.
+
+    Args:
+        rows (iterable): PlanRow records
+        output_path (str): Destination file
+
+    Returns:
+        int: Number of rows written
+    """
+    count = 0
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        # csv quoting keeps names containing tabs or newlines intact
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow(["path", "new_name", "status"])
+        for row in rows:
+            writer.writerow([row.path, row.new_name, row.status])
+            count += 1
+    return count
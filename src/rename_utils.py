@@ -1,5 +1,17 @@
 import re
 import os
+import time
+from functools import lru_cache
+from itertools import count
+
+try:
+    from src.prefix_analysis import analyze_names
+    from src.name_cleaner import NameCleaner
+except ImportError:
+    from prefix_analysis import analyze_names
+    from name_cleaner import NameCleaner
+
+_DEFAULT_CLEANER = NameCleaner()
 
 def generate_new_name(original_name, prefix_format, order=None):
     """
@@ -33,26 +45,407 @@ def generate_new_name(original_name, prefix_format, order=None):
     
     return new_name
 
+# Inner extensions that belong to the outer one, as in ".tar.gz"
+COMPOUND_EXTENSIONS = ('.tar',)
+
+def split_name(name):
+    """
+    Split a name into its stem and extension.
+
+    Multi-part extensions like ``.tar.gz`` are kept together, and the dot of a
+    dotfile does not start an extension (``.bashrc`` is all stem).
+
+    Args:
+        name (str): File or folder name
+
+    Returns:
+        tuple: (stem, extension), the extension with its dot or ""
+    """
+    dot = name.rfind('.')
+    if dot <= 0 or dot == len(name) - 1:
+        return name, ''
+    inner = name.rfind('.', 0, dot)
+    if inner > 0 and name[inner:dot].lower() in COMPOUND_EXTENSIONS:
+        dot = inner
+    return name[:dot], name[dot:]
+
+def order_width(count, start_index=1):
+    """
+    Get the number of digits the order numbers of a run need.
+
+    Args:
+        count (int): Number of items that are numbered
+        start_index (int): Number of the first item
+
+    Returns:
+        int: Digits of the largest number, e.g. 2 for 10 items from 1
+    """
+    return len(str(max(start_index + count - 1, start_index, 0)))
+
+def generate_new_names(names, prefix_format, use_order=False, start_index=1, pad_width=None):
+    """
+    Generate the new names for a whole list at once.
+
+    The scheme is that of generate_new_name, except that order numbers are
+    zero-padded to the width of the largest one, so ``P_02_`` sorts before
+    ``P_10_``. The width is worked out once from the number of names.
+
+    Args:
+        names (list): Names to build on, in numbering order
+        prefix_format (str): Prefix for the new names
+        use_order (bool): Whether to insert sequence numbers
+        start_index (int): Number of the first name
+        pad_width (int): Digits the numbers are padded to (from the count if omitted)
+
+    Returns:
+        list: The new names, in order
+    """
+    prefix = prefix_format or ""
+    if not use_order:
+        return [prefix + name for name in names]
+    if pad_width is None:
+        pad_width = order_width(len(names), start_index)
+    return [f"{prefix}{order:0{pad_width}d}_{name}" for order, name in zip(count(start_index), names)]
+
+def parse_generated_name(name, prefix_format, use_order=False):
+    """
+    Check whether a name already follows the scheme generate_new_name produces.
+
+    This is the reverse of generate_new_name: with ordering the name must be
+    the prefix, a sequence number and an underscore followed by the rest;
+    without ordering it must start with the prefix. Without a prefix no name
+    is recognized, since any name starting with a number (``2024_trip.jpg``)
+    would otherwise count as renamed.
+
+    Args:
+        name (str): File or folder name
+        prefix_format (str): Prefix the names are generated with
+        use_order (bool): Whether the names carry sequence numbers
+
+    Returns:
+        int: The sequence number (0 when use_order is off), or None if the name
+        does not follow the scheme
+    """
+    if not prefix_format:
+        return None
+    if use_order:
+        match = _generated_name_pattern(prefix_format).match(name)
+        return int(match.group(1)) if match else None
+    if name.startswith(prefix_format) and len(name) > len(prefix_format):
+        return 0
+    return None
+
+@lru_cache(maxsize=32)
+def _generated_name_pattern(prefix_format):
+    return re.compile(re.escape(prefix_format) + r'(\d+)_')
+
+DEFAULT_REGEX_TIME_BUDGET = 0.05  # seconds one name may take before a rule is given up
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+_REPEATS = (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT)
+
+class RegexRuleError(ValueError):
+    """Raised when a regex rule is invalid, risky or too slow on a name."""
+
+_CATEGORY_TESTS = {
+    _sre_parse.CATEGORY_DIGIT: str.isdecimal,
+    _sre_parse.CATEGORY_NOT_DIGIT: lambda char: not char.isdecimal(),
+    _sre_parse.CATEGORY_SPACE: str.isspace,
+    _sre_parse.CATEGORY_NOT_SPACE: lambda char: not char.isspace(),
+    _sre_parse.CATEGORY_WORD: lambda char: char.isalnum() or char == '_',
+    _sre_parse.CATEGORY_NOT_WORD: lambda char: not (char.isalnum() or char == '_'),
+}
+
+def _can_match_char(item, char):
+    """Check whether a one-character pattern item can match char (True when unsure)."""
+    op, av = item
+    if op == _sre_parse.LITERAL:
+        return av == ord(char)
+    if op == _sre_parse.NOT_LITERAL:
+        return av != ord(char)
+    if op == _sre_parse.ANY:
+        return char != '\n'
+    if op != _sre_parse.IN:
+        return True
+    negate = False
+    for set_op, set_av in av:
+        if set_op == _sre_parse.NEGATE:
+            negate = True
+        elif set_op == _sre_parse.LITERAL:
+            if set_av == ord(char):
+                return not negate
+        elif set_op == _sre_parse.RANGE:
+            if set_av[0] <= ord(char) <= set_av[1]:
+                return not negate
+        elif set_op == _sre_parse.CATEGORY and set_av in _CATEGORY_TESTS:
+            if _CATEGORY_TESTS[set_av](char):
+                return not negate
+        else:
+            return True
+    return negate
+
+def _is_delimited(repeat_body, following, ignore_case):
+    """
+    Check whether a repeat of one character class always stops at the literal after it.
+
+    In ``(\\d+_)+`` every ``\\d+`` must end at an ``_`` it cannot match, so
+    the outer repeat has only one way to split the text and runs in linear time.
+    """
+    if len(repeat_body) != 1 or following is None or following[0] != _sre_parse.LITERAL:
+        return False
+    char = chr(following[1])
+    chars = set([char, char.lower(), char.upper()]) if ignore_case else (char,)
+    return not any(_can_match_char(repeat_body[0], c) for c in chars)
+
+# Stands in for a character the lint cannot describe; it may overlap anything
+_ANY_CHAR = (_sre_parse.ANY, None)
+_MAX_ENUMERATED_CHARS = 512
+
+def _enumerate_chars(item):
+    """List the characters a literal or plain character set matches (None if unknown or too many)."""
+    op, av = item
+    if op == _sre_parse.LITERAL:
+        return [chr(av)]
+    if op != _sre_parse.IN:
+        return None
+    chars = []
+    for set_op, set_av in av:
+        if set_op == _sre_parse.LITERAL:
+            chars.append(chr(set_av))
+        elif set_op == _sre_parse.RANGE and set_av[1] - set_av[0] < _MAX_ENUMERATED_CHARS:
+            chars.extend(chr(code) for code in range(set_av[0], set_av[1] + 1))
+        else:
+            return None
+    return chars if len(chars) <= _MAX_ENUMERATED_CHARS else None
+
+def _chars_overlap(first, second, ignore_case):
+    """Check whether two one-character pattern items can match the same character."""
+    if first is _ANY_CHAR or second is _ANY_CHAR:
+        return True
+    chars = _enumerate_chars(first)
+    other = second
+    if chars is None:
+        chars = _enumerate_chars(second)
+        other = first
+    if chars is None:
+        return True
+    for char in chars:
+        variants = set([char, char.lower(), char.upper()]) if ignore_case else (char,)
+        if any(_can_match_char(other, c) for c in variants):
+            return True
+    return False
+
+def _first_chars(items):
+    """
+    Get the items that can match the first character of a pattern sequence.
+
+    Returns:
+        tuple: (list of one-character items, whether the sequence can match empty)
+    """
+    first = []
+    for op, av in items:
+        if op in (_sre_parse.LITERAL, _sre_parse.NOT_LITERAL, _sre_parse.ANY, _sre_parse.IN):
+            first.append((op, av))
+            return first, False
+        if op in _REPEATS:
+            body_first, nullable = _first_chars(av[2])
+            first.extend(body_first)
+            if av[0] > 0 and not nullable:
+                return first, False
+        elif op == _sre_parse.SUBPATTERN:
+            body_first, nullable = _first_chars(av[-1])
+            first.extend(body_first)
+            if not nullable:
+                return first, False
+        elif op == _sre_parse.BRANCH:
+            nullable = False
+            for branch in av[1]:
+                branch_first, branch_nullable = _first_chars(branch)
+                first.extend(branch_first)
+                nullable = nullable or branch_nullable
+            if not nullable:
+                return first, False
+        elif op not in (_sre_parse.AT, _sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+            # Group references, conditionals and the like: assume anything
+            first.append(_ANY_CHAR)
+    return first, True
+
+def _has_ambiguous_branch(alternatives, following, loop_first, ignore_case):
+    """
+    Check whether two alternatives of a repeated branch can start on the same character.
+
+    An alternative that can match nothing starts wherever the pattern after the
+    branch does, which inside a repeat includes the next iteration. In
+    ``(a|aa)+`` both alternatives can start on ``a``, so a run of ``a`` can be
+    split in exponentially many ways.
+    """
+    follow_first, follow_nullable = _first_chars(following)
+    if follow_nullable:
+        follow_first = follow_first + loop_first
+    starts = []
+    for branch in alternatives:
+        first, nullable = _first_chars(branch)
+        if nullable:
+            first = first + follow_first
+        starts.append(first)
+    for position, first in enumerate(starts):
+        for other in starts[position + 1:]:
+            if any(_chars_overlap(a, b, ignore_case) for a in first for b in other):
+                return True
+    return False
+
+def _has_nested_repeat(items, inside_repeat=False, ignore_case=False, loop_first=()):
+    """
+    Check a parsed pattern for ambiguous repetition, like ``(a+)+`` or ``(a|aa)+``.
+
+    A variable repeat inside an unbounded one is counted unless it is followed
+    by a literal it cannot match, as in ``(\\d+_)+``: the literal fixes where each
+    iteration ends. A branch inside an unbounded repeat is counted when two of
+    its alternatives can start on the same character.
+    """
+    items = list(items)
+    for position, (op, av) in enumerate(items):
+        if op in _REPEATS:
+            low, high, body = av
+            if inside_repeat and high > 1 and high != low:
+                following = items[position + 1] if position + 1 < len(items) else None
+                if not _is_delimited(list(body), following, ignore_case):
+                    return True
+            body_loop_first = loop_first
+            if high == _sre_parse.MAXREPEAT:
+                body_loop_first = _first_chars(body)[0]
+            if _has_nested_repeat(body, inside_repeat or high == _sre_parse.MAXREPEAT, ignore_case,
+                                  body_loop_first):
+                return True
+        elif op == _sre_parse.SUBPATTERN:
+            add_flags = av[1] if len(av) == 4 else 0
+            if _has_nested_repeat(av[-1], inside_repeat,
+                                  ignore_case or bool(add_flags & _sre_parse.SRE_FLAG_IGNORECASE), loop_first):
+                return True
+        elif op in (_sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+            if _has_nested_repeat(av[-1], inside_repeat, ignore_case, loop_first):
+                return True
+        elif op == _sre_parse.BRANCH:
+            if inside_repeat and _has_ambiguous_branch(av[1], items[position + 1:], loop_first, ignore_case):
+                return True
+            if any(_has_nested_repeat(branch, inside_repeat, ignore_case, loop_first) for branch in av[1]):
+                return True
+    return False
+
+class RegexRule:
+    """
+    A regex replacement checked and compiled once, then applied to many names.
+
+    The pattern and the replacement (including its group references) are
+    validated when the rule is built, so a bad rule is reported before any
+    name is planned. Patterns with ambiguous repetition, the usual cause of
+    catastrophic backtracking, are refused unless ``lint`` is off: nested
+    unbounded quantifiers like ``(a+)+`` and repeated alternatives that can
+    start on the same character like ``(a|aa)+``. The ``time_budget`` is
+    checked after each name, so a rule that turns out slow is stopped before
+    the next name; it cannot interrupt a match already running, which is why
+    the lint matters.
+
+    Attributes:
+        pattern (str): The regex pattern
+        replacement (str): The replacement, as for re.sub
+        regex (re.Pattern): The compiled pattern
+    """
+    __slots__ = ('pattern', 'replacement', 'regex', 'time_budget')
+
+    def __init__(self, pattern, replacement='', time_budget=DEFAULT_REGEX_TIME_BUDGET, lint=True):
+        """
+        Args:
+            pattern (str): Regex pattern
+            replacement (str): Replacement string
+            time_budget (float): Seconds one name may take (None for no limit)
+            lint (bool): Whether to refuse patterns with ambiguous repetition
+
+        Raises:
+            RegexRuleError: If the pattern or replacement is invalid, or the pattern is risky
+        """
+        self.pattern = pattern
+        self.replacement = replacement
+        self.time_budget = time_budget
+        try:
+            self.regex = re.compile(pattern)
+        except re.error as e:
+            raise RegexRuleError(f"Invalid regex pattern: {e}")
+        try:
+            # Substituting into an empty string parses the replacement and its group references
+            self.regex.sub(replacement, '')
+        except (re.error, IndexError) as e:
+            raise RegexRuleError(f"Invalid regex replacement: {e}")
+        if lint:
+            parsed = _sre_parse.parse(pattern)
+            if _has_nested_repeat(parsed, ignore_case=bool(parsed.state.flags & _sre_parse.SRE_FLAG_IGNORECASE)):
+                raise RegexRuleError("Regex pattern nests unbounded quantifiers or repeats overlapping "
+                                     "alternatives (like '(a+)+' or '(a|aa)+'), which can take exponential "
+                                     "time; rewrite it without the nesting or end the inner repeat at a "
+                                     "delimiter (like '(\\d+_)+')")
+
+    def rename(self, name):
+        """
+        Apply the rule to one name.
+
+        Raises:
+            RegexRuleError: If the name took longer than the time budget (checked
+                once the substitution has finished)
+        """
+        if self.time_budget is None:
+            return self.regex.sub(self.replacement, name)
+        started = time.perf_counter()
+        new_name = self.regex.sub(self.replacement, name)
+        if time.perf_counter() - started > self.time_budget:
+            raise RegexRuleError(f"Regex pattern took too long on '{name}'")
+        return new_name
+
+    def apply(self, names):
+        """
+        Apply the rule to a batch of names.
+
+        Args:
+            names (iterable): Names to rewrite
+
+        Yields:
+            str: The new name for each name, in order
+        """
+        rename = self.rename
+        for name in names:
+            yield rename(name)
+
+@lru_cache(maxsize=32)
+def _lenient_rule(pattern, replacement):
+    try:
+        return RegexRule(pattern, replacement, time_budget=None, lint=False)
+    except RegexRuleError:
+        return None
+
 def apply_regex_rename(name, pattern, replacement):
     """
     Apply regular expression replacement to the name.
     
+    The rule is compiled once per pattern and replacement. Use RegexRule
+    directly to have invalid or risky patterns reported instead of ignored.
+    
     Args:
         name (str): Original filename
         pattern (str): Regex pattern
         replacement (str): Replacement string
         
     Returns:
-        str: New name after regex replacement
+        str: New name after regex replacement (the original name if the regex is invalid)
     """
-    try:
-        if not pattern:
-            return name
-        return re.sub(pattern, replacement, name)
-    except re.error:
-        # Return original name on invalid regex, caller should handle validation if possible
-        # or we just let it fail silently here to avoid crashing midway
+    if not pattern:
         return name
+    rule = _lenient_rule(pattern, replacement)
+    if rule is None:
+        return name
+    return rule.rename(name)
 
 def apply_prefix_format(base_name, prefix_format):
     """
@@ -75,27 +468,16 @@ def apply_prefix_format(base_name, prefix_format):
 def find_longest_common_prefix(filenames):
     """
     Find the longest common prefix across multiple filenames.
+    
+    The common prefix of a set of strings is the common prefix of its
+    smallest and largest member, so only those two are compared.
     """
     if not filenames:
         return ""
     
     # Get only basenames without paths
     basenames = [os.path.basename(f) for f in filenames]
-    
-    # Find the shortest filename to avoid index errors
-    min_length = min(len(name) for name in basenames)
-    
-    # Find the common prefix
-    prefix_end = 0
-    for i in range(min_length):
-        char = basenames[0][i]
-        if all(name[i] == char for name in basenames):
-            prefix_end = i + 1
-        else:
-            break
-    
-    # Get the common prefix
-    common_prefix = basenames[0][:prefix_end]
+    common_prefix = os.path.commonprefix([min(basenames), max(basenames)])
     
     # Make sure we don't break in the middle of a word/segment
     # Find the last underscore in the common prefix
@@ -105,60 +487,22 @@ def find_longest_common_prefix(filenames):
     
     return common_prefix
 
-def remove_prefix_and_order(filename, common_prefix=None, file_list=None):
+def remove_prefix_and_order(filename, common_prefix=None, file_list=None, prefix_clusters=None, cleaner=None):
     """
     Remove existing prefix and order numbers from a filename.
     Also handles duplicate patterns in filenames.
-    """
-    # Extract the base name and extension
-    base_name, extension = filename.rsplit('.', 1) if '.' in filename else (filename, '')
-    
-    # If we have a common prefix from a file list, use that
-    if common_prefix is None and file_list is not None and len(file_list) > 1:
-        common_prefix = find_longest_common_prefix(file_list)
     
-    # Check for duplicated patterns in the filename (like "name_name")
-    # Find potential duplicate patterns
-    for i in range(len(base_name) // 2):
-        half_length = len(base_name) // 2
-        if base_name[:half_length] == base_name[half_length:2*half_length]:
-            base_name = base_name[:half_length]
-            break
-    
-    # Clean the base name - use a more comprehensive approach
-    # First, remove any known common prefix
-    if common_prefix and base_name.startswith(common_prefix):
-        base_name = base_name[len(common_prefix):]
-        
-    # Next, use a regex to remove common prefixes followed by underscore
-    common_prefixes = ['img', 'doc', 'file', 'photo', 'pic', 'renamed', '2025', '2024']
-    prefix_pattern = r'^(?:' + '|'.join(common_prefixes) + r')_'
-    base_name = re.sub(prefix_pattern, '', base_name, flags=re.IGNORECASE)
-    
-    # Repeatedly remove order numbers (pattern: digits followed by underscore) 
-    # from the beginning until no more matches found
-    old_base_name = ""
-    while old_base_name != base_name:
-        old_base_name = base_name
-        base_name = re.sub(r'^(\d+)_', '', base_name)
-    
-    # Remove any remaining leading/trailing underscores
-    base_name = base_name.strip('_')
-    
-    # Remove duplicate content in filename (e.g., word_word)
-    tokens = base_name.split('_')
-    unique_tokens = []
-    for token in tokens:
-        if token not in unique_tokens:
-            unique_tokens.append(token)
-    
-    # Reconstruct base_name with unique tokens
-    base_name = '_'.join(unique_tokens)
-    
-    # Reattach the extension if it exists
-    if extension:
-        cleaned_name = f"{base_name}.{extension}"
-    else:
-        cleaned_name = base_name
-        
-    return cleaned_name
\ No newline at end of file
+    The prefix removed is the prefix of the cluster the name belongs to when
+    prefix clusters are given (or found from ``file_list``), so folders that
+    mix several prefixes lose each of them; otherwise it is ``common_prefix``.
+    The remaining steps are those of ``cleaner`` (the built-in rules by
+    default); use NameCleaner.clean_names to clean whole lists.
+    """
+    # If we have prefix clusters from a file list, use the name's own cluster prefix
+    if common_prefix is None and prefix_clusters is None and file_list is not None and len(file_list) > 1:
+        prefix_clusters = analyze_names([os.path.basename(f) for f in file_list])
+    if prefix_clusters is not None:
+        common_prefix = prefix_clusters.prefix_for(filename)
+    if cleaner is None:
+        cleaner = _DEFAULT_CLEANER
+    return cleaner.clean(filename, common_prefix)
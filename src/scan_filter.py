@@ -0,0 +1,210 @@
+import os
+import re
+import stat
+import fnmatch
+from datetime import datetime
+
+_IS_WINDOWS = os.name == 'nt'
+
+def _normalize_extensions(extensions):
+    normalized = []
+    for ext in extensions or []:
+        ext = ext.strip().lower()
+        if not ext:
+            continue
+        if not ext.startswith('.'):
+            ext = '.' + ext
+        normalized.append(ext)
+    return tuple(normalized)
+
+def _compile_globs(patterns, flags):
+    """Merge glob patterns into one compiled regex (or None if there are none)."""
+    patterns = [p for p in patterns or [] if p]
+    if not patterns:
+        return None
+    return re.compile('|'.join(fnmatch.translate(p) for p in patterns), flags)
+
+def _compile_regexes(patterns, flags):
+    """Merge regex patterns into one compiled alternation (or None if there are none)."""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    patterns = [p for p in patterns or [] if p]
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{p})' for p in patterns), flags)
+
+def _to_timestamp(value):
+    """Accept a POSIX timestamp, a datetime or an ISO date string."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+class ScanFilter:
+    """
+    Include/exclude rules evaluated while a folder is being scanned.
+
+    The rules are compiled once into a single predicate. Name-based checks run
+    first, and the entry is only stat'ed when a hidden-attribute (Windows),
+    size or time rule is set and every cheaper check has already passed. Include rules (extensions, include
+    patterns, size and time limits) apply to files only; exclude patterns and
+    hidden-entry skipping apply to folders too.
+
+    Args:
+        extensions (list): Allowed file extensions (e.g. ['.jpg', 'png'])
+        include_globs (list): Glob patterns a file name must match
+        exclude_globs (list): Glob patterns that reject a name
+        include_regex (str|list): Regex(es) a file name must match
+        exclude_regex (str|list): Regex(es) that reject a name
+        min_size (int): Minimum file size in bytes
+        max_size (int): Maximum file size in bytes
+        modified_after: Oldest allowed modification time (timestamp, datetime or ISO string)
+        modified_before: Newest allowed modification time (timestamp, datetime or ISO string)
+        skip_hidden (bool): Whether to skip hidden files and folders
+    """
+
+    def __init__(self, extensions=None, include_globs=None, exclude_globs=None,
+                 include_regex=None, exclude_regex=None, min_size=None, max_size=None,
+                 modified_after=None, modified_before=None, skip_hidden=False):
+        self.extensions = _normalize_extensions(extensions)
+        name_flags = re.IGNORECASE if _IS_WINDOWS else 0
+        self._include_glob = _compile_globs(include_globs, name_flags)
+        self._exclude_glob = _compile_globs(exclude_globs, name_flags)
+        self._include_regex = _compile_regexes(include_regex, 0)
+        self._exclude_regex = _compile_regexes(exclude_regex, 0)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = _to_timestamp(modified_after)
+        self.modified_before = _to_timestamp(modified_before)
+        self.skip_hidden = skip_hidden
+        self._predicate = self._compile()
+
+    @classmethod
+    def from_options(cls, options, supported_extensions=None, supported_only=False):
+        """
+        Build a filter from a ``scan_filters`` config section.
+
+        Args:
+            options (dict): Filter options as stored in the config
+            supported_extensions (list): Extensions allowed when supported_only is set
+            supported_only (bool): Restrict files to supported_extensions
+
+        Returns:
+            ScanFilter: The compiled filter
+        """
+        options = options or {}
+        return cls(
+            extensions=supported_extensions if supported_only else None,
+            include_globs=options.get("include_globs"),
+            exclude_globs=options.get("exclude_globs"),
+            include_regex=options.get("include_regex"),
+            exclude_regex=options.get("exclude_regex"),
+            min_size=options.get("min_size"),
+            max_size=options.get("max_size"),
+            modified_after=options.get("modified_after"),
+            modified_before=options.get("modified_before"),
+            skip_hidden=options.get("skip_hidden", False),
+        )
+
+    @property
+    def is_empty(self):
+        """True when no rule is set and every entry would be accepted."""
+        return not self._checks
+
+    def _compile(self):
+        # Cheapest checks first; anything needing stat goes last
+        name_checks = []
+        file_checks = []
+        stat_checks = []
+
+        if self.skip_hidden:
+            name_checks.append(lambda entry: not entry.name.startswith('.'))
+        if self._exclude_glob is not None:
+            exclude_glob = self._exclude_glob.match
+            name_checks.append(lambda entry: exclude_glob(entry.name) is None)
+        if self._exclude_regex is not None:
+            exclude_regex = self._exclude_regex.search
+            name_checks.append(lambda entry: exclude_regex(entry.name) is None)
+
+        if self.extensions:
+            extensions = self.extensions
+            file_checks.append(lambda entry: entry.name.lower().endswith(extensions))
+        if self._include_glob is not None:
+            include_glob = self._include_glob.match
+            file_checks.append(lambda entry: include_glob(entry.name) is not None)
+        if self._include_regex is not None:
+            include_regex = self._include_regex.search
+            file_checks.append(lambda entry: include_regex(entry.name) is not None)
+
+        # The hidden attribute needs stat; for catalog entries that is a real os.stat,
+        # so it only runs once the name and file checks have passed
+        attribute_checks = []
+        if self.skip_hidden and _IS_WINDOWS:
+            attribute_checks.append(lambda entry: not getattr(entry.stat(), 'st_file_attributes', 0)
+                                    & stat.FILE_ATTRIBUTE_HIDDEN)
+        if self.min_size is not None:
+            min_size = self.min_size
+            stat_checks.append(lambda entry: entry.stat().st_size >= min_size)
+        if self.max_size is not None:
+            max_size = self.max_size
+            stat_checks.append(lambda entry: entry.stat().st_size <= max_size)
+        if self.modified_after is not None:
+            after = self.modified_after
+            stat_checks.append(lambda entry: entry.stat().st_mtime >= after)
+        if self.modified_before is not None:
+            before = self.modified_before
+            stat_checks.append(lambda entry: entry.stat().st_mtime <= before)
+
+        self._checks = name_checks + file_checks + attribute_checks + stat_checks
+        folder_checks = tuple(name_checks + attribute_checks)
+        file_checks = tuple(name_checks + file_checks + attribute_checks + stat_checks)
+
+        def predicate(entry):
+            for check in (folder_checks if entry.is_dir else file_checks):
+                if not check(entry):
+                    return False
+            return True
+
+        return predicate
+
+    def __call__(self, entry):
+        """
+        Check whether a scanned entry passes every rule.
+
+        Args:
+            entry (ScanEntry): Entry to check
+
+        Returns:
+            bool: True if the entry should be kept
+        """
+        try:
+            return self._predicate(entry)
+        except OSError:
+            # The entry vanished or can't be stat'ed; leave it out
+            return False
+
+def load_scan_filter(config_manager, supported_only=None):
+    """
+    Build the scan filter described by the application config.
+
+    Args:
+        config_manager (ConfigManager): Source of the ``scan_filters`` and
+            ``supported_extensions`` options
+        supported_only (bool): Override the configured ``supported_only`` flag
+
+    Returns:
+        ScanFilter: The compiled filter, or None if no rule is active
+    """
+    options = config_manager.get_option("scan_filters", {})
+    if not isinstance(options, dict):
+        options = {}
+    extensions = config_manager.get_option("supported_extensions", [])
+    if not isinstance(extensions, list):
+        extensions = []
+    if supported_only is None:
+        supported_only = options.get("supported_only", False)
+    scan_filter = ScanFilter.from_options(options, extensions, supported_only)
+    return None if scan_filter.is_empty else scan_filter
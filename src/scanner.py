@@ -0,0 +1,320 @@
+import os
+import fnmatch
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_SCAN_WORKERS = 8
+# Listings in flight per worker; finished listings wait in memory until the consumer takes them
+SCAN_LOOKAHEAD = 2
+
+class ScanEntry:
+    """
+    Lightweight record describing a single directory entry.
+
+    Type information comes from the cached ``os.DirEntry`` data collected by
+    ``os.scandir``, so building an entry costs no extra stat call. The full
+    stat result is only fetched when ``stat()`` is called.
+    """
+    __slots__ = ('name', 'path', 'is_dir', '_dir_entry', '_stat')
+
+    def __init__(self, name, path, is_dir, dir_entry=None, stat_result=None):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self._dir_entry = dir_entry
+        self._stat = stat_result
+
+    def stat(self):
+        """
+        Return the stat result for this entry, fetching it on first use.
+
+        Returns:
+            os.stat_result: Stat information (symlinks are followed)
+        """
+        if self._stat is None:
+            if self._dir_entry is not None:
+                self._stat = self._dir_entry.stat()
+            else:
+                self._stat = os.stat(self.path)
+        return self._stat
+
+    def __repr__(self):
+        kind = "dir" if self.is_dir else "file"
+        return f"ScanEntry({self.path!r}, {kind})"
+
+def _entry_is_dir(dir_entry):
+    # Mirror os.path.isdir: broken links and permission problems count as "not a directory"
+    try:
+        return dir_entry.is_dir()
+    except OSError:
+        return False
+
+def _entry_is_file(dir_entry):
+    try:
+        return dir_entry.is_file()
+    except OSError:
+        return False
+
+def iter_directory(directory_path, include_files=True, include_folders=False, with_stat=False,
+                   entry_filter=None, stat_cache=None):
+    """
+    Yield the immediate children of a directory using a single ``os.scandir`` pass.
+
+    Args:
+        directory_path (str): Directory to list
+        include_files (bool): Whether to yield regular files
+        include_folders (bool): Whether to yield folders
+        with_stat (bool): Whether to fetch the stat result up front
+        entry_filter (callable): Predicate applied during the scan; rejected
+            entries are dropped immediately
+        stat_cache (StatCache): Optional cache primed with every yielded entry
+
+    Yields:
+        ScanEntry: One record per matching entry, in directory order
+    """
+    try:
+        iterator = os.scandir(directory_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+
+    with iterator:
+        for dir_entry in iterator:
+            if _entry_is_dir(dir_entry):
+                if not include_folders:
+                    continue
+                is_dir = True
+            elif include_files and _entry_is_file(dir_entry):
+                is_dir = False
+            else:
+                continue
+
+            entry = ScanEntry(dir_entry.name, dir_entry.path, is_dir, dir_entry)
+            if entry_filter is not None and not entry_filter(entry):
+                continue
+            if with_stat:
+                entry.stat()
+            if stat_cache is not None:
+                stat_cache.prime(entry)
+            yield entry
+
+def scan_directory(directory_path, include_files=True, include_folders=False, with_stat=False,
+                   entry_filter=None, stat_cache=None):
+    """
+    List the immediate children of a directory.
+
+    Args:
+        directory_path (str): Directory to list
+        include_files (bool): Whether to include regular files
+        include_folders (bool): Whether to include folders
+        with_stat (bool): Whether to fetch the stat result up front
+        entry_filter (callable): Predicate applied during the scan
+        stat_cache (StatCache): Optional cache primed with every returned entry
+
+    Returns:
+        list: List of ScanEntry records (empty if the directory does not exist)
+    """
+    return list(iter_directory(directory_path, include_files, include_folders, with_stat, entry_filter,
+                               stat_cache))
+
+def list_item_paths(directory_path, include_folders=False, recursive=False, entry_filter=None):
+    """
+    Get the paths of the files (and optionally folders) inside a directory.
+
+    Args:
+        directory_path (str): Directory to list
+        include_folders (bool): Whether to include folders
+        recursive (bool): Whether to include the contents of subfolders
+        entry_filter (callable): Predicate applied during the scan
+
+    Returns:
+        list: List of full paths
+    """
+    if recursive:
+        entries = scan_tree(directory_path, include_folders=include_folders, ordered=True,
+                            entry_filter=entry_filter)
+    else:
+        entries = iter_directory(directory_path, include_folders=include_folders, entry_filter=entry_filter)
+    return [entry.path for entry in entries]
+
+def list_subfolders(directory_path):
+    """
+    Get the immediate subfolders of a directory.
+
+    Args:
+        directory_path (str): Directory to list
+
+    Returns:
+        list: List of ScanEntry records for folders only
+    """
+    return scan_directory(directory_path, include_files=False, include_folders=True)
+
+def compile_dir_excludes(exclude_dirs):
+    """Build a predicate matching folder names or relative paths against glob patterns."""
+    if not exclude_dirs:
+        return None
+    patterns = [p.replace('\\', '/').rstrip('/') for p in exclude_dirs]
+
+    def is_excluded(name, rel_path):
+        for pattern in patterns:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern):
+                return True
+        return False
+
+    return is_excluded
+
+def _list_children(dir_path, onerror=None, prune=None, include_files=True, include_folders=True,
+                   entry_filter=None):
+    """
+    List one directory, splitting it into folders and non-folders like ``os.walk``.
+
+    Entries rejected by the include flags or ``entry_filter`` are dropped inside
+    the scandir loop and never kept; rejected folders are still descended into.
+    Folders matching ``prune`` are neither kept nor descended into.
+
+    Returns:
+        tuple: (dirs, files, descend) where dirs and files are lists of ScanEntry
+        records and descend lists the paths of subfolders to walk next
+    """
+    dirs, files, descend = [], [], []
+    try:
+        iterator = os.scandir(dir_path)
+    except OSError as e:
+        if onerror is not None:
+            onerror(e)
+        return dirs, files, descend
+
+    with iterator:
+        for dir_entry in iterator:
+            if _entry_is_dir(dir_entry):
+                entry = ScanEntry(dir_entry.name, dir_entry.path, True, dir_entry)
+                if prune is not None and prune(entry):
+                    continue
+                # Like os.walk, never descend into symlinked folders
+                try:
+                    if not dir_entry.is_symlink():
+                        descend.append(dir_entry.path)
+                except OSError:
+                    pass
+                if include_folders and (entry_filter is None or entry_filter(entry)):
+                    dirs.append(entry)
+            elif include_files:
+                entry = ScanEntry(dir_entry.name, dir_entry.path, False, dir_entry)
+                if entry_filter is None or entry_filter(entry):
+                    files.append(entry)
+    return dirs, files, descend
+
+def walk_tree(root, max_depth=None, exclude_dirs=None, max_workers=DEFAULT_SCAN_WORKERS,
+              ordered=False, onerror=None, include_files=True, include_folders=True, entry_filter=None):
+    """
+    Walk a directory tree, listing folders concurrently on a bounded thread pool.
+
+    Each listed folder is yielded as soon as its listing completes, so callers
+    can start working before the whole tree has been read. At most
+    ``max_workers * SCAN_LOOKAHEAD`` listings are in flight or waiting for the
+    consumer, so a slow consumer does not make the whole tree pile up in memory.
+
+    Args:
+        root (str): Directory to walk
+        max_depth (int): Maximum depth of yielded entries (1 = immediate children only,
+            None = unlimited)
+        exclude_dirs (list): Glob patterns; matching folders (by name or path relative
+            to root) are neither yielded nor descended into
+        max_workers (int): Maximum number of concurrent directory listings
+        ordered (bool): Yield folders in a deterministic breadth-first order with
+            entries sorted by name, instead of completion order
+        onerror (callable): Called with the OSError when a folder can't be listed
+        include_files (bool): Whether to keep non-folder entries in the listings
+        include_folders (bool): Whether to keep folders in the listings
+        entry_filter (callable): Predicate applied while each folder is listed;
+            rejected entries are never kept (rejected folders are still descended into)
+
+    Yields:
+        tuple: (dir_path, dirs, files) where dirs and files are lists of ScanEntry
+    """
+    if max_depth is not None and max_depth < 1:
+        return
+    is_excluded = compile_dir_excludes(exclude_dirs)
+    root_len = len(os.path.join(root, ''))
+    prune = None
+    if is_excluded is not None:
+        def prune(entry):
+            return is_excluded(entry.name, entry.path[root_len:].replace(os.sep, '/'))
+
+    def list_dir(dir_path, depth):
+        dirs, files, descend = _list_children(dir_path, onerror, prune, include_files, include_folders,
+                                              entry_filter)
+        if ordered:
+            dirs.sort(key=lambda e: e.name)
+            files.sort(key=lambda e: e.name)
+            descend.sort()
+        if max_depth is not None and depth + 1 >= max_depth:
+            descend = []
+        return dir_path, depth, dirs, files, descend
+
+    max_workers = max(1, max_workers)
+    # Folders found but not yet submitted; the pool never runs more than `limit` listings ahead
+    waiting = deque([(root, 0)])
+    limit = max_workers * SCAN_LOOKAHEAD
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        if ordered:
+            # FIFO of futures keeps breadth-first order while the pool lists ahead
+            queue = deque()
+            while waiting or queue:
+                while waiting and len(queue) < limit:
+                    queue.append(pool.submit(list_dir, *waiting.popleft()))
+                dir_path, depth, dirs, files, descend = queue.popleft().result()
+                waiting.extend((path, depth + 1) for path in descend)
+                yield dir_path, dirs, files
+        else:
+            pending = set()
+            while waiting or pending:
+                while waiting and len(pending) < limit:
+                    pending.add(pool.submit(list_dir, *waiting.popleft()))
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_path, depth, dirs, files, descend = future.result()
+                    waiting.extend((path, depth + 1) for path in descend)
+                    yield dir_path, dirs, files
+    finally:
+        # Stop queued listings promptly if the consumer stops early
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def scan_tree(root, include_files=True, include_folders=False, max_depth=None, exclude_dirs=None,
+              max_workers=DEFAULT_SCAN_WORKERS, ordered=False, entry_filter=None, stat_cache=None):
+    """
+    Recursively yield entries below a directory as they are discovered.
+
+    Args:
+        root (str): Directory to scan
+        include_files (bool): Whether to yield regular files
+        include_folders (bool): Whether to yield folders
+        max_depth (int): Maximum depth of yielded entries (None = unlimited)
+        exclude_dirs (list): Glob patterns for folders to skip entirely
+        max_workers (int): Maximum number of concurrent directory listings
+        ordered (bool): Yield entries in a deterministic order
+        entry_filter (callable): Predicate applied to files and folders while each
+            folder is listed (folders it rejects are still descended into)
+        stat_cache (StatCache): Optional cache primed with the complete listing
+            of every walked folder
+
+    Yields:
+        ScanEntry: One record per matching entry
+    """
+    # The stat cache needs complete listings, so filtering waits until entries are yielded
+    complete = stat_cache is not None and not exclude_dirs
+    listing_filter, check = (None, entry_filter) if complete else (entry_filter, None)
+    walker = walk_tree(root, max_depth, exclude_dirs, max_workers, ordered,
+                       include_files=include_files or complete, include_folders=include_folders or complete,
+                       entry_filter=listing_filter)
+    for dir_path, dirs, files in walker:
+        if complete:
+            stat_cache.prime_listing(dir_path, dirs + files)
+        if include_folders:
+            for entry in dirs:
+                if check is None or check(entry):
+                    yield entry
+        if include_files:
+            for entry in files:
+                if _entry_is_file(entry._dir_entry) and (check is None or check(entry)):
+                    yield entry
@@ -0,0 +1,209 @@
+import os
+import stat
+
+try:
+    from src.scanner import ScanEntry
+except ImportError:
+    from scanner import ScanEntry
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+class StatCache:
+    """
+    Per-operation cache of path metadata.
+
+    Existence and type questions are answered from directory listings: the
+    first lookup in a folder lists it once with ``os.scandir`` and every later
+    lookup in that folder is served from memory. Entries handed over by a scan
+    can be primed directly. Callers must report their own renames, moves,
+    removals and creations through the ``record_*`` methods so the cache stays
+    exact; it is meant to live for one operation, not across user prompts.
+
+    Attributes:
+        hits (int): Lookups answered without a system call
+        misses (int): Lookups that needed a stat or directory listing
+    """
+
+    def __init__(self, batch_directories=True):
+        self.batch_directories = batch_directories
+        self._listings = {}  # folder key -> {name key: ScanEntry} for fully listed folders
+        self._entries = {}   # path key -> ScanEntry, or None if known to be missing
+        self.hits = 0
+        self.misses = 0
+
+    def counters(self):
+        """Get the hit/miss counters as a dict."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def prime(self, entry):
+        """
+        Remember a scanned entry so later lookups for its path need no system call.
+
+        Args:
+            entry (ScanEntry): Entry produced by a scan
+        """
+        self._entries[_key(entry.path)] = entry
+
+    def prime_listing(self, directory_path, entries):
+        """
+        Remember the complete listing of a folder.
+
+        Args:
+            directory_path (str): Folder that was listed
+            entries (list): Every ScanEntry in the folder
+        """
+        self._listings[_key(directory_path)] = dict((os.path.normcase(e.name), e) for e in entries)
+
+    def _load_listing(self, folder_key):
+        listing = {}
+        try:
+            with os.scandir(folder_key) as iterator:
+                for dir_entry in iterator:
+                    try:
+                        is_dir = dir_entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    listing[os.path.normcase(dir_entry.name)] = ScanEntry(dir_entry.name, dir_entry.path,
+                                                                         is_dir, dir_entry)
+        except (FileNotFoundError, NotADirectoryError):
+            listing = None
+        self._listings[folder_key] = listing
+        return listing
+
+    def _lookup(self, path):
+        """Get the ScanEntry for a path, or None if it does not exist."""
+        key = _key(path)
+        if key in self._entries:
+            self.hits += 1
+            return self._entries[key]
+
+        folder_key, name = os.path.split(key)
+        if folder_key in self._listings:
+            self.hits += 1
+            listing = self._listings[folder_key]
+            return listing.get(name) if listing is not None else None
+
+        self.misses += 1
+        if self.batch_directories and name:
+            listing = self._load_listing(folder_key)
+            return listing.get(name) if listing is not None else None
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            entry = None
+        else:
+            entry = ScanEntry(os.path.basename(path), path, stat.S_ISDIR(st.st_mode), stat_result=st)
+        self._entries[key] = entry
+        return entry
+
+    def exists(self, path):
+        """Cached equivalent of os.path.exists."""
+        return self._lookup(path) is not None
+
+    def isdir(self, path):
+        """Cached equivalent of os.path.isdir."""
+        entry = self._lookup(path)
+        return entry is not None and entry.is_dir
+
+    def isfile(self, path):
+        """Cached equivalent of os.path.isfile (anything that exists and is not a folder)."""
+        entry = self._lookup(path)
+        return entry is not None and not entry.is_dir
+
+    def stat(self, path):
+        """
+        Get the full stat result for a path.
+
+        Returns:
+            os.stat_result: Stat information, or None if the path does not exist
+        """
+        entry = self._lookup(path)
+        if entry is None:
+            return None
+        try:
+            return entry.stat()
+        except OSError:
+            return None
+
+    def _peek(self, key):
+        """Return (known, entry) for a path key without counting or touching the disk."""
+        if key in self._entries:
+            return True, self._entries[key]
+        folder_key, name = os.path.split(key)
+        if folder_key in self._listings:
+            listing = self._listings[folder_key]
+            return True, listing.get(name) if listing is not None else None
+        return False, None
+
+    def _forget(self, key, recursive):
+        """Drop everything cached for a path, and for anything below it if it may be a folder."""
+        self._entries.pop(key, None)
+        self._listings.pop(key, None)
+        if not recursive:
+            return
+        prefix = os.path.join(key, '')
+        for cache in (self._entries, self._listings):
+            stale = [k for k in cache if k.startswith(prefix)]
+            for k in stale:
+                del cache[k]
+
+    def _is_dir_hint(self, key):
+        known, entry = self._peek(key)
+        # Unknown paths might be folders, so their subtree has to be dropped too
+        return entry.is_dir if entry is not None else not known
+
+    def _mark_missing(self, key):
+        folder_key, name = os.path.split(key)
+        listing = self._listings.get(folder_key)
+        if listing is not None:
+            listing.pop(name, None)
+        else:
+            self._entries[key] = None
+
+    def _mark_present(self, key, path, is_dir):
+        entry = ScanEntry(os.path.basename(path), path, is_dir)
+        folder_key, name = os.path.split(key)
+        if folder_key in self._listings:
+            if self._listings[folder_key] is None:
+                # The folder itself was created along the way
+                del self._listings[folder_key]
+            else:
+                self._listings[folder_key][name] = entry
+        self._entries[key] = entry
+
+    def record_removal(self, path):
+        """Report that a path (and anything below it) was deleted."""
+        key = _key(path)
+        self._forget(key, self._is_dir_hint(key))
+        self._mark_missing(key)
+
+    def record_creation(self, path, is_dir=False):
+        """Report that a file or folder was created at a path."""
+        key = _key(path)
+        # A new folder may shadow paths below it that were cached as missing
+        self._forget(key, is_dir)
+        self._mark_present(key, path, is_dir)
+
+    def record_rename(self, src, dst):
+        """
+        Report that ``src`` was renamed or moved to ``dst``.
+
+        Args:
+            src (str): Original path
+            dst (str): New path
+        """
+        src_key = _key(src)
+        dst_key = _key(dst)
+        _, entry = self._peek(src_key)
+        if entry is not None:
+            is_dir = entry.is_dir
+        else:
+            self.misses += 1
+            is_dir = os.path.isdir(dst)
+
+        self._forget(src_key, is_dir)
+        self._mark_missing(src_key)
+        self._forget(dst_key, is_dir)
+        self._mark_present(dst_key, dst, is_dir)
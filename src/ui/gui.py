@@ -2,15 +2,31 @@ import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QLineEdit, QPushButton, QTextEdit, QTabWidget, 
-                             QFileDialog, QComboBox, QTableWidget, QTableWidgetItem, 
-                             QHeaderView, QMessageBox, QCheckBox, QGroupBox, QDialog)
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                             QFileDialog, QComboBox, 
+                             QHeaderView, QMessageBox, QCheckBox, QGroupBox, QDialog, QTableView, QProgressBar)
+from PyQt5.QtGui import QIcon, QColor
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QAbstractTableModel, QModelIndex
 from src.config_manager import ConfigManager
 from src.ai_renamer import AIRenamer
-from src.file_operations import rename_files
-from src.rename_utils import generate_new_name, apply_regex_rename
 from src.folder_operations import collapse_redundant_folders, uncollapse_folders, identify_redundant_folders
+from src.scanner import scan_directory, scan_tree, list_subfolders
+from src.catalog import DirectoryCatalog
+from src.scan_filter import load_scan_filter
+from src.ordering import parse_ordering, sort_items, SORT_KEYS
+from src.rename_utils import RegexRule, RegexRuleError
+from src.prefix_analysis import analyze_names
+from src.name_cleaner import load_name_cleaner
+from src.name_template import NameTemplate, TemplateError
+from src.rename_plan import (stream_entries, build_plan, build_suggestion_plan, apply_plan, validate_plan,
+                             next_order_index, RenamePlan, STATUS_CONFLICT, STATUS_FAILED)
+from src.plan_executor import resolve_apply_workers
+from src.journal import Journal, JournalBatch
+from src.progress import ProgressReporter, CancellationToken, OperationCancelled, format_progress
+from src.outcomes import OutcomeSummary
+from src.plan_io import (rename_items, collapse_items, export_items, import_plan,
+                         apply_imported_plan, PlanFormatError)
+
+PREVIEW_CHUNK_SIZE = 500
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -22,6 +38,62 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
+class PlanTableModel(QAbstractTableModel):
+    """Table model that reads rows straight from a RenamePlan, so no per-cell items are kept."""
+
+    HEADERS = ["Original Name", "New Name"]
+
+    def __init__(self, plan=None, base_dir=None):
+        super().__init__()
+        self.plan = plan if plan is not None else RenamePlan()
+        self.base_dir = base_dir
+        self._row_count = len(self.plan)
+
+    def set_plan(self, plan, base_dir=None):
+        self.beginResetModel()
+        self.plan = plan
+        self.base_dir = base_dir
+        self._row_count = len(plan)
+        self.endResetModel()
+
+    def sync_rows(self):
+        """Show the rows that were appended to the plan since the last sync."""
+        count = len(self.plan)
+        if count > self._row_count:
+            self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+            self._row_count = count
+            self.endInsertRows()
+
+    def refresh(self):
+        """Repaint every row, e.g. after row statuses changed."""
+        if self._row_count:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._row_count - 1, len(self.HEADERS) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            if index.column() == 1:
+                return self.plan.new_name(row)
+            if self.base_dir:
+                return os.path.relpath(self.plan.path(row), self.base_dir)
+            return self.plan.name(row)
+        if role == Qt.ForegroundRole and self.plan.status(row) in (STATUS_CONFLICT, STATUS_FAILED):
+            return QColor(Qt.red)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
 class ModelFetcherThread(QThread):
     models_fetched = pyqtSignal(str, list)
 
@@ -34,6 +106,31 @@ class ModelFetcherThread(QThread):
         models = self.ai_renamer.get_available_models(self.provider)
         self.models_fetched.emit(self.provider, models)
 
+class OperationWorker(QThread):
+    """Runs operation(progress, cancel) off the UI thread and reports its progress."""
+    progress_changed = pyqtSignal(int, int, str)
+    succeeded = pyqtSignal(object, bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, operation):
+        super().__init__()
+        self.operation = operation
+        self.cancel = CancellationToken()
+
+    def report(self, reporter):
+        # Called from the worker at a throttled rate; the signal is queued to the UI thread
+        self.progress_changed.emit(reporter.done, reporter.total or 0, format_progress(reporter, width=0))
+
+    def run(self):
+        try:
+            result = self.operation(ProgressReporter(self.report), self.cancel)
+        except OperationCancelled:
+            result = None
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.succeeded.emit(result, self.cancel.cancelled)
+
 class PromptPreviewDialog(QDialog):
     def __init__(self, system_prompt, full_prompt, parent=None):
         super().__init__(parent)
@@ -65,7 +162,23 @@ class FileRenamerGUI(QMainWindow):
         super().__init__()
         self.config_manager = ConfigManager()
         self.ai_renamer = AIRenamer(self.config_manager)
+        try:
+            self.catalog = DirectoryCatalog(self.config_manager.get_catalog_path())
+        except Exception as e:
+            print(f"Directory catalog unavailable, scanning directly: {e}")
+            self.catalog = None
+        try:
+            options = self.config_manager.get_option("journal", {})
+            if not isinstance(options, dict):
+                options = {}
+            self.journal = Journal(self.config_manager.get_journal_path(), options.get("sync_every", 64),
+                                   options.get("history_limit", 50)) if options.get("enabled", True) else None
+        except Exception as e:
+            print(f"Rename journal unavailable, changes can't be undone: {e}")
+            self.journal = None
+        self.worker = None
         self.init_ui()
+        self.recover_interrupted_operations()
 
     def init_ui(self):
         self.setWindowTitle("Advanced AI File Renamer")
@@ -87,6 +200,34 @@ class FileRenamerGUI(QMainWindow):
         self.create_folder_tools_tab()
         self.create_settings_tab()
         
+        # Progress of the running operation
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_label = QLabel()
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_operation)
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.progress_label)
+        progress_layout.addWidget(self.cancel_btn)
+        layout.addLayout(progress_layout)
+        self.show_progress(False)
+        
+        # Undo / redo of whole operations, backed by the rename journal
+        history_layout = QHBoxLayout()
+        history_layout.addStretch()
+        undo_btn = QPushButton("Undo Last Operation")
+        undo_btn.clicked.connect(lambda: self.replay_history(redo=False))
+        redo_btn = QPushButton("Redo")
+        redo_btn.clicked.connect(lambda: self.replay_history(redo=True))
+        undo_btn.setEnabled(self.journal is not None)
+        redo_btn.setEnabled(self.journal is not None)
+        saved_plan_btn = QPushButton("Apply Saved Plan...")
+        saved_plan_btn.clicked.connect(self.apply_saved_plan)
+        history_layout.addWidget(saved_plan_btn)
+        history_layout.addWidget(undo_btn)
+        history_layout.addWidget(redo_btn)
+        layout.addLayout(history_layout)
+        
         # Apply styling
         self.apply_styles()
 
@@ -158,13 +299,41 @@ class FileRenamerGUI(QMainWindow):
         self.prefix_input.setPlaceholderText("Prefix Format (e.g., 'Image_')")
         options_layout.addWidget(QLabel("Prefix:"))
         options_layout.addWidget(self.prefix_input)
+
+        # Optional naming template; empty keeps the prefix + number naming
+        self.template_input = QLineEdit()
+        output_format = self.config_manager.get_option("output_format", "")
+        self.template_input.setPlaceholderText(
+            f"Naming Template (optional, e.g. '{output_format or '{prefix}{label}_{index:03d}'}')")
+        self.template_input.setToolTip("Fields: {prefix} {label} {index:04d} {stem} {ext} "
+                                       "{mtime:%Y%m%d} {size} {parent} {taken:%Y%m%d}")
+        options_layout.addWidget(QLabel("Template:"))
+        options_layout.addWidget(self.template_input)
         
+        ordering_layout = QHBoxLayout()
         self.ordering_check = QCheckBox("Enable Ordering")
-        options_layout.addWidget(self.ordering_check)
+        ordering_layout.addWidget(self.ordering_check)
+        ordering_layout.addWidget(QLabel("Sort By:"))
+        self.sort_combo = QComboBox()
+        self.sort_combo.addItems(list(SORT_KEYS))
+        self.sort_desc_check = QCheckBox("Descending")
+        default_sort, default_reverse = parse_ordering(self.config_manager.get_option("default_ordering", "ascending"))
+        self.sort_combo.setCurrentText(default_sort)
+        self.sort_desc_check.setChecked(default_reverse)
+        ordering_layout.addWidget(self.sort_combo)
+        ordering_layout.addWidget(self.sort_desc_check)
+        ordering_layout.addStretch()
+        options_layout.addLayout(ordering_layout)
         
         self.remove_prefix_check = QCheckBox("Remove Existing Prefixes")
         options_layout.addWidget(self.remove_prefix_check)
 
+        self.incremental_check = QCheckBox("Skip Already Renamed Items (Continue Numbering)")
+        self.incremental_check.setToolTip("Needs a prefix to recognize items named by an earlier run")
+        self.incremental_check.setEnabled(False)
+        self.prefix_input.textChanged.connect(self.toggle_incremental_check)
+        options_layout.addWidget(self.incremental_check)
+
         # Regex Section
         regex_group = QGroupBox("Regex Renaming (Advanced)")
         regex_layout = QVBoxLayout()
@@ -194,6 +363,12 @@ class FileRenamerGUI(QMainWindow):
         self.manual_include_folders = QCheckBox("Include Folders")
         options_layout.addWidget(self.manual_include_folders)
         
+        self.manual_recursive_check = QCheckBox("Include Subfolders (Recursive, files only)")
+        options_layout.addWidget(self.manual_recursive_check)
+        
+        self.manual_supported_only = QCheckBox("Supported File Types Only")
+        options_layout.addWidget(self.manual_supported_only)
+        
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
         
@@ -203,14 +378,17 @@ class FileRenamerGUI(QMainWindow):
         preview_btn.clicked.connect(self.preview_manual_rename)
         apply_btn = QPushButton("Apply Rename")
         apply_btn.clicked.connect(self.apply_manual_rename)
+        export_btn = QPushButton("Export Plan...")
+        export_btn.clicked.connect(self.export_manual_plan)
         btn_layout.addWidget(preview_btn)
+        btn_layout.addWidget(export_btn)
         btn_layout.addWidget(apply_btn)
         layout.addLayout(btn_layout)
         
         # Results Table
-        self.manual_table = QTableWidget()
-        self.manual_table.setColumnCount(2)
-        self.manual_table.setHorizontalHeaderLabels(["Original Name", "New Name"])
+        self.manual_plan_model = PlanTableModel()
+        self.manual_table = QTableView()
+        self.manual_table.setModel(self.manual_plan_model)
         self.manual_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         layout.addWidget(self.manual_table)
         
@@ -284,15 +462,18 @@ class FileRenamerGUI(QMainWindow):
         generate_btn.clicked.connect(self.generate_ai_suggestions)
         apply_btn = QPushButton("Apply Rename")
         apply_btn.clicked.connect(self.apply_ai_rename)
+        export_btn = QPushButton("Export Plan...")
+        export_btn.clicked.connect(self.export_ai_plan)
         btn_layout.addWidget(preview_prompt_btn)
         btn_layout.addWidget(generate_btn)
+        btn_layout.addWidget(export_btn)
         btn_layout.addWidget(apply_btn)
         layout.addLayout(btn_layout)
         
         # Results Table
-        self.ai_table = QTableWidget()
-        self.ai_table.setColumnCount(2)
-        self.ai_table.setHorizontalHeaderLabels(["Original Name", "New Name"])
+        self.ai_plan_model = PlanTableModel()
+        self.ai_table = QTableView()
+        self.ai_table.setModel(self.ai_plan_model)
         self.ai_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         layout.addWidget(self.ai_table)
         
@@ -327,7 +508,10 @@ class FileRenamerGUI(QMainWindow):
         c_preview_btn.clicked.connect(self.preview_collapse)
         c_apply_btn = QPushButton("Collapse Folders")
         c_apply_btn.clicked.connect(self.apply_collapse)
+        c_export_btn = QPushButton("Export Plan...")
+        c_export_btn.clicked.connect(self.export_collapse_plan)
         c_btn_layout.addWidget(c_preview_btn)
+        c_btn_layout.addWidget(c_export_btn)
         c_btn_layout.addWidget(c_apply_btn)
         collapse_layout.addLayout(c_btn_layout)
         
@@ -449,70 +633,166 @@ class FileRenamerGUI(QMainWindow):
         provider = self.provider_combo.currentText()
         self.config_manager.set_model(provider, model)
 
-    def get_items_in_dir(self, directory, include_folders=False):
-        if not directory or not os.path.exists(directory):
+    def get_scan_filter(self, supported_only=None):
+        try:
+            return load_scan_filter(self.config_manager, supported_only)
+        except Exception as e:
+            print(f"Ignoring invalid scan filter settings: {e}")
+            return None
+
+    def get_name_cleaner(self):
+        try:
+            return load_name_cleaner(self.config_manager)
+        except Exception as e:
+            print(f"Ignoring invalid cleaning settings: {e}")
+            return None
+
+    def get_entries_in_dir(self, directory, include_folders=False, recursive=False, supported_only=None):
+        if not directory:
             return []
-        items = []
-        for f in os.listdir(directory):
-            full_path = os.path.join(directory, f)
-            if os.path.isfile(full_path) or (include_folders and os.path.isdir(full_path)):
-                items.append(full_path)
-        return items
+        if recursive:
+            # Folders are skipped so renaming them can't invalidate the planned file paths
+            include_folders = False
+        entry_filter = self.get_scan_filter(supported_only)
+        if self.catalog is not None:
+            if recursive:
+                return list(self.catalog.scan_tree(directory, include_folders=include_folders,
+                                                   entry_filter=entry_filter))
+            return self.catalog.scan_directory(directory, include_folders=include_folders, entry_filter=entry_filter)
+        if recursive:
+            return list(scan_tree(directory, include_folders=include_folders, ordered=True, entry_filter=entry_filter))
+        return scan_directory(directory, include_folders=include_folders, entry_filter=entry_filter)
+
+    def get_items_in_dir(self, directory, include_folders=False, recursive=False, supported_only=None):
+        return [entry.path for entry in self.get_entries_in_dir(directory, include_folders, recursive, supported_only)]
+
+    def get_subfolders_in_dir(self, directory):
+        if self.catalog is not None:
+            return self.catalog.list_subfolders(directory)
+        return list_subfolders(directory)
 
     def preview_manual_rename(self):
         directory = self.manual_dir_input.text()
         include_folders = self.manual_include_folders.isChecked()
-        files = self.get_items_in_dir(directory, include_folders)
-        if not files:
+        recursive = self.manual_recursive_check.isChecked()
+        supported_only = self.manual_supported_only.isChecked()
+        if not directory:
             QMessageBox.warning(self, "Warning", "No files found or invalid directory.")
             return
+        if recursive:
+            # Folders are skipped so renaming them can't invalidate the planned file paths
+            include_folders = False
+
+        # Regex params; a bad pattern is reported before anything is scanned
+        use_regex = self.regex_enable_check.isChecked()
+        regex_pattern = self.regex_pattern_input.text() if use_regex else None
+        regex_repl = self.regex_repl_input.text()
+        if regex_pattern:
+            try:
+                RegexRule(regex_pattern, regex_repl)
+            except RegexRuleError as e:
+                QMessageBox.warning(self, "Invalid Regex", str(e))
+                return
+        template = None
+        if self.template_input.text():
+            try:
+                template = NameTemplate(self.template_input.text())
+                template.check_numbering(self.ordering_check.isChecked())
+            except TemplateError as e:
+                QMessageBox.warning(self, "Invalid Template", str(e))
+                return
+
+        entries = stream_entries(directory, include_folders, recursive,
+                                 self.get_scan_filter(supported_only), self.catalog)
 
         prefix = self.prefix_input.text()
         ordering = self.ordering_check.isChecked()
+        if ordering and self.sort_combo.currentText() != 'none':
+            # Only a full sort needs every entry up front
+            entries = sort_items(list(entries), self.sort_combo.currentText(), self.sort_desc_check.isChecked())
         
-        # Regex params
-        use_regex = self.regex_enable_check.isChecked()
-        regex_pattern = self.regex_pattern_input.text()
-        regex_repl = self.regex_repl_input.text()
+        # Items named by an earlier run keep their names; new ones are numbered after them
+        incremental = self.incremental_check.isChecked() and template is None and bool(prefix)
+        start_index = 1
+        if incremental and ordering:
+            entries = list(entries)
+            start_index = next_order_index((entry.name for entry in entries), prefix)
+
+        # Each group of similarly named items loses its own prefix
+        remove_prefixes = self.remove_prefix_check.isChecked()
+        prefix_clusters = cleaner = None
+        if remove_prefixes:
+            entries = list(entries)
+            prefix_clusters = analyze_names(entry.name for entry in entries)
+            cleaner = self.get_name_cleaner()
+
+        rows = build_plan(entries, prefix, ordering, remove_prefixes, regex_pattern=regex_pattern,
+                          regex_replacement=regex_repl, start_index=start_index, incremental=incremental,
+                          prefix_clusters=prefix_clusters, cleaner=cleaner, template=template)
         
-        # Simple preview logic (simplified version of main.py logic)
-        self.manual_table.setRowCount(len(files))
-        self.manual_preview_data = [] # Store for applying
+        # Rows are shown in chunks so the first ones appear while the rest are still planned
+        plan = RenamePlan()
+        self.manual_plan_model.set_plan(plan, directory if recursive else None)
+        try:
+            for row in rows:
+                plan.append(row.path, row.new_name, row.is_dir, row.status)
+                if len(plan) % PREVIEW_CHUNK_SIZE == 0:
+                    self.manual_plan_model.sync_rows()
+                    QApplication.processEvents()
+        except RegexRuleError as e:
+            # The pattern ran over its time budget on a name; a partial plan is not applied
+            self.manual_plan_model.sync_rows()
+            self.manual_plan = None
+            QMessageBox.warning(self, "Invalid Regex", str(e))
+            return
+        self.manual_plan_model.sync_rows()
+        self.manual_plan = plan # Store for applying
         
-        for i, file_path in enumerate(files):
-            old_name = os.path.basename(file_path)
-            
-            # Apply Regex First if enabled
-            intermediate_name = old_name
-            if use_regex:
-                intermediate_name = apply_regex_rename(old_name, regex_pattern, regex_repl)
-                
-            order_val = i + 1 if ordering else None
-            new_name = generate_new_name(intermediate_name, prefix, order_val)
-            
-            self.manual_table.setItem(i, 0, QTableWidgetItem(old_name))
-            self.manual_table.setItem(i, 1, QTableWidgetItem(new_name))
-            self.manual_preview_data.append((file_path, new_name))
+        if not len(plan):
+            QMessageBox.warning(self, "Warning", "No files found or invalid directory.")
 
     def apply_manual_rename(self):
-        if not hasattr(self, 'manual_preview_data') or not self.manual_preview_data:
+        if getattr(self, 'manual_plan', None) is None or not len(self.manual_plan):
             QMessageBox.warning(self, "Warning", "Please preview changes first.")
             return
             
         try:
-            count = 0
-            for old_path, new_name in self.manual_preview_data:
-                dir_path = os.path.dirname(old_path)
-                new_path = os.path.join(dir_path, new_name)
-                if old_path != new_path:
-                    os.rename(old_path, new_path)
-                    count += 1
-            
-            QMessageBox.information(self, "Success", f"Renamed {count} files.")
-            self.manual_preview_data = []
-            self.manual_table.setRowCount(0)
+            directory = self.manual_dir_input.text()
+            workers = self.get_apply_workers(directory)
+            report = validate_plan(self.manual_plan)
+            if report.has_conflicts:
+                # Nothing has been renamed yet; let the user decide
+                self.manual_plan_model.refresh()
+                answer = QMessageBox.question(
+                    self, "Conflicts Found",
+                    report.summary() + "\n\nSkip the conflicting items and rename the rest?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if answer != QMessageBox.Yes:
+                    return
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
+            return
+        plan = self.manual_plan
+        summary = OutcomeSummary()
+
+        def apply(progress, cancel):
+            with self.begin_batch("rename", directory) as batch:
+                return apply_plan(plan, skip_conflicts=True, batch=batch, max_workers=workers,
+                                  progress=progress, cancel=cancel, summary=summary)
+
+        def done(count, cancelled):
+            skipped = plan.count(STATUS_CONFLICT)
+            failed = plan.count(STATUS_FAILED)
+            message = f"Renamed {count} files."
+            if skipped or failed:
+                message += f" Skipped {skipped} name conflicts, {failed} failed."
+            if cancelled:
+                message += " Cancelled before the rest."
+            QMessageBox.information(self, "Success", self.with_summary(message, summary))
+            self.manual_plan = None
+            self.manual_plan_model.set_plan(RenamePlan())
+
+        self.run_operation(apply, done)
 
     def generate_ai_suggestions(self):
         directory = self.ai_dir_input.text()
@@ -529,40 +809,61 @@ class FileRenamerGUI(QMainWindow):
             
         provider = self.provider_combo.currentText()
         model = self.model_combo.currentText()
-        
-        try:
-            suggestions = self.ai_renamer.get_rename_suggestions(files, prompt, provider, model)
-            
-            self.ai_table.setRowCount(len(suggestions))
-            self.ai_preview_data = suggestions # Store for applying
-            
-            for i, (old_path, new_name) in enumerate(suggestions):
-                old_name = os.path.basename(old_path)
-                self.ai_table.setItem(i, 0, QTableWidgetItem(old_name))
-                self.ai_table.setItem(i, 1, QTableWidgetItem(new_name))
-                
-        except Exception as e:
-            QMessageBox.critical(self, "AI Error", str(e))
+
+        def generate(progress, cancel):
+            return self.ai_renamer.get_rename_suggestions(files, prompt, provider, model, progress, cancel)
+
+        def done(suggestions, cancelled):
+            if suggestions is None:
+                return
+            # Suggestions share the compact plan and table model of the manual rename
+            self.ai_plan = build_suggestion_plan(suggestions) # Store for applying
+            self.ai_plan_model.set_plan(self.ai_plan)
+
+        self.run_operation(generate, done, error_title="AI Error")
 
     def apply_ai_rename(self):
-        if not hasattr(self, 'ai_preview_data') or not self.ai_preview_data:
+        if getattr(self, 'ai_plan', None) is None or not len(self.ai_plan):
             QMessageBox.warning(self, "Warning", "Please generate suggestions first.")
             return
             
+        directory = self.ai_dir_input.text()
         try:
-            count = 0
-            for old_path, new_name in self.ai_preview_data:
-                dir_path = os.path.dirname(old_path)
-                new_path = os.path.join(dir_path, new_name)
-                if old_path != new_path:
-                    os.rename(old_path, new_path)
-                    count += 1
-            
-            QMessageBox.information(self, "Success", f"Renamed {count} files.")
-            self.ai_preview_data = []
-            self.ai_table.setRowCount(0)
+            workers = self.get_apply_workers(directory)
+            # Suggested names are checked as a whole before anything is renamed
+            report = validate_plan(self.ai_plan)
+            if report.has_conflicts:
+                self.ai_plan_model.refresh()
+                answer = QMessageBox.question(
+                    self, "Conflicts Found",
+                    report.summary() + "\n\nSkip the conflicting items and rename the rest?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if answer != QMessageBox.Yes:
+                    return
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
+            return
+        plan = self.ai_plan
+        summary = OutcomeSummary()
+
+        def apply(progress, cancel):
+            with self.begin_batch("ai rename", directory) as batch:
+                return apply_plan(plan, skip_conflicts=True, batch=batch, max_workers=workers,
+                                  progress=progress, cancel=cancel, summary=summary)
+
+        def done(count, cancelled):
+            skipped = plan.count(STATUS_CONFLICT)
+            failed = plan.count(STATUS_FAILED)
+            message = f"Renamed {count} files."
+            if skipped or failed:
+                message += f" Skipped {skipped} name conflicts, {failed} failed."
+            if cancelled:
+                message += " Cancelled before the rest."
+            QMessageBox.information(self, "Success", self.with_summary(message, summary))
+            self.ai_plan = None
+            self.ai_plan_model.set_plan(RenamePlan())
+
+        self.run_operation(apply, done)
 
     def preview_ai_prompt(self):
         directory = self.ai_dir_input.text()
@@ -590,7 +891,7 @@ class FileRenamerGUI(QMainWindow):
             return
             
         try:
-            redundant = identify_redundant_folders(directory)
+            redundant = identify_redundant_folders(directory, catalog=self.catalog)
             if not redundant:
                 self.folder_results.setText("No redundant folders found.")
                 return
@@ -611,17 +912,22 @@ class FileRenamerGUI(QMainWindow):
             QMessageBox.warning(self, "Warning", "Invalid directory.")
             return
 
-        try:
-            collapsed = collapse_redundant_folders(directory, recursive)
+        summary = OutcomeSummary()
+
+        def collapse(progress, cancel):
+            with self.begin_batch("collapse", directory) as batch:
+                return collapse_redundant_folders(directory, recursive, batch, progress, cancel, summary)
+
+        def done(collapsed, cancelled):
             if collapsed:
                 text = f"Successfully collapsed {len(collapsed)} folder(s):\n"
                 for folder in collapsed:
                     text += f"{folder}\n"
-                self.folder_results.setText(text)
             else:
-                self.folder_results.setText("No folders were collapsed.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+                text = "No folders were collapsed."
+            self.folder_results.setText(self.with_summary(text, summary))
+
+        self.run_operation(collapse, done)
 
     def preview_uncollapse(self):
         directory = self.uncollapse_dir_input.text()
@@ -635,11 +941,8 @@ class FileRenamerGUI(QMainWindow):
             return
             
         try:
-            potential = []
-            for item in os.listdir(directory):
-                full_path = os.path.join(directory, item)
-                if os.path.isdir(full_path) and len(item.split('_')) >= min_parts:
-                    potential.append(full_path)
+            potential = [entry.path for entry in self.get_subfolders_in_dir(directory)
+                         if len(entry.name.split('_')) >= min_parts]
             
             if not potential:
                 self.folder_results.setText(f"No folders found with {min_parts}+ parts.")
@@ -666,18 +969,228 @@ class FileRenamerGUI(QMainWindow):
             QMessageBox.warning(self, "Warning", "Invalid directory.")
             return
 
-        try:
-            uncollapsed = uncollapse_folders(directory, min_parts)
+        summary = OutcomeSummary()
+
+        def uncollapse(progress, cancel):
+            with self.begin_batch("uncollapse", directory) as batch:
+                return uncollapse_folders(directory, min_parts, batch, progress, cancel, summary)
+
+        def done(uncollapsed, cancelled):
             if uncollapsed:
                 text = f"Successfully uncollapsed {len(uncollapsed)} folder(s):\n"
                 for folder in uncollapsed:
                     text += f"{folder}\n"
-                self.folder_results.setText(text)
             else:
-                self.folder_results.setText("No folders were uncollapsed.")
+                text = "No folders were uncollapsed."
+            self.folder_results.setText(self.with_summary(text, summary))
+
+        self.run_operation(uncollapse, done)
+
+    def export_plan_items(self, items):
+        """Save plan items with their file fingerprints so they can be applied later."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Plan", "", "Plan files (*.jsonl *.csv)")
+        if not path:
+            return
+        try:
+            count = export_items(items, path)
+            QMessageBox.information(self, "Exported", f"Exported {count} rows to {path}")
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Could not export the plan: {e}")
+
+    def export_manual_plan(self):
+        if getattr(self, 'manual_plan', None) is None or not len(self.manual_plan):
+            QMessageBox.warning(self, "Warning", "Please preview changes first.")
+            return
+        self.export_plan_items(rename_items(self.manual_plan))
+
+    def export_ai_plan(self):
+        if getattr(self, 'ai_plan', None) is None or not len(self.ai_plan):
+            QMessageBox.warning(self, "Warning", "Please generate suggestions first.")
+            return
+        self.export_plan_items(rename_items(self.ai_plan))
+
+    def export_collapse_plan(self):
+        if not getattr(self, 'collapse_preview_data', None):
+            QMessageBox.warning(self, "Warning", "Please preview the collapse first.")
+            return
+        self.export_plan_items(collapse_items(self.collapse_preview_data))
+
+    def apply_saved_plan(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Apply Saved Plan", "", "Plan files (*.jsonl *.ndjson *.csv)")
+        if not path:
+            return
+        try:
+            try:
+                imported = import_plan(path)
+            except (PlanFormatError, ValueError) as e:
+                QMessageBox.critical(self, "Error", f"Could not read the plan: {e}")
+                return
+            if not len(imported.renames) and not imported.collapses:
+                QMessageBox.information(self, "Nothing to Do", imported.summary() + "\n\nNothing left to apply.")
+                return
+            question = imported.summary() + "\n\nApply the plan?"
+            if imported.stale_count:
+                question = imported.summary() + "\n\nSkip the out-of-date items and apply the rest?"
+            answer = QMessageBox.question(self, "Apply Saved Plan", question,
+                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                return
+            report = validate_plan(imported.renames)
+            if report.has_conflicts:
+                answer = QMessageBox.question(
+                    self, "Conflicts Found",
+                    report.summary() + "\n\nSkip the conflicting items and apply the rest?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if answer != QMessageBox.Yes:
+                    return
+            directory = imported.renames.directory(0) if len(imported.renames) else os.path.dirname(path)
+            workers = self.get_apply_workers(directory)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+            return
+
+        summary = OutcomeSummary()
+
+        def apply(progress, cancel):
+            with self.begin_batch("apply plan", path) as batch:
+                return apply_imported_plan(imported, skip_conflicts=True, batch=batch, max_workers=workers,
+                                           progress=progress, cancel=cancel, summary=summary)
+
+        def done(result, cancelled):
+            renamed, collapsed = result
+            message = f"Renamed {renamed} item(s) and collapsed {collapsed} folder(s)."
+            if cancelled:
+                message += " Cancelled before the rest."
+            QMessageBox.information(self, "Success", self.with_summary(message, summary))
+
+        self.run_operation(apply, done)
+
+    def with_summary(self, message, summary):
+        """Append the compact problem report of an operation to a message."""
+        if summary.problems:
+            return message + "\n\n" + summary.format()
+        return message
+
+    def show_progress(self, visible):
+        for widget in (self.progress_bar, self.progress_label, self.cancel_btn):
+            widget.setVisible(visible)
+
+    def is_busy(self):
+        """Check whether an operation is still running, telling the user if so."""
+        if self.worker is not None and self.worker.isRunning():
+            QMessageBox.warning(self, "Busy", "Another operation is still running.")
+            return True
+        return False
+
+    def run_operation(self, operation, on_done, error_title="Error"):
+        """
+        Run operation(progress, cancel) on a worker thread, showing its progress.
+
+        on_done(result, cancelled) is called on the UI thread when it finishes.
+        """
+        if self.is_busy():
+            return
+        self.worker = OperationWorker(operation)
+        self.worker.progress_changed.connect(self.update_progress)
+        self.worker.succeeded.connect(lambda result, cancelled: self.finish_operation(on_done, result, cancelled))
+        self.worker.failed.connect(lambda message: self.fail_operation(error_title, message))
+        self.progress_bar.setRange(0, 0)
+        self.progress_label.setText("")
+        self.cancel_btn.setEnabled(True)
+        self.show_progress(True)
+        self.worker.start()
+
+    def update_progress(self, done, total, text):
+        # A zero maximum shows a busy indicator while the total is unknown
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(min(done, total))
+        self.progress_label.setText(text)
+
+    def cancel_operation(self):
+        if self.worker is not None:
+            self.worker.cancel.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.progress_label.setText("Cancelling after the current item...")
+
+    def finish_operation(self, on_done, result, cancelled):
+        self.show_progress(False)
+        try:
+            on_done(result, cancelled)
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
+    def fail_operation(self, title, message):
+        self.show_progress(False)
+        QMessageBox.critical(self, title, message)
+
+    def get_apply_workers(self, directory):
+        return resolve_apply_workers(self.config_manager.get_option("apply_workers", "auto"), directory)
+
+    def begin_batch(self, operation, description=''):
+        """Start a journal batch for an operation (an unrecorded batch if journaling is off)."""
+        if self.journal is None:
+            return JournalBatch()
+        return self.journal.begin(operation, description)
+
+    def show_replay_report(self, report, action):
+        message = f"{action} {report.applied} change(s)."
+        if report.problems:
+            message += f"\n\n{len(report.problems)} change(s) could not be made:\n" + "\n".join(report.problems[:20])
+            QMessageBox.warning(self, "Partially Done", message)
+        else:
+            QMessageBox.information(self, "Done", message)
+
+    def replay_history(self, redo=False):
+        # Replaying while an apply is running would rename the same files from two threads
+        if self.journal is None or self.is_busy():
+            return
+        try:
+            undo_stack, redo_stack = self.journal.history()
+            stack = redo_stack if redo else undo_stack
+            if not stack:
+                QMessageBox.information(self, "Nothing to Do", f"Nothing to {'redo' if redo else 'undo'}.")
+                return
+            answer = QMessageBox.question(
+                self, "Redo" if redo else "Undo",
+                f"{'Redo' if redo else 'Undo'} this operation?\n\n{stack[-1].describe()}",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                return
+            report = self.journal.redo() if redo else self.journal.undo()
+            self.show_replay_report(report, "Redid" if redo else "Reverted")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+
+    def recover_interrupted_operations(self):
+        if self.journal is None or self.is_busy():
+            return
+        try:
+            for batch in self.journal.incomplete():
+                answer = QMessageBox.question(
+                    self, "Interrupted Operation",
+                    f"An operation did not finish:\n\n{batch.describe()}\n\n"
+                    "Roll it back? Choose No to keep the changes made so far.",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+                roll_back = answer == QMessageBox.Yes
+                report = self.journal.recover(batch, roll_back)
+                self.show_replay_report(report, "Rolled back" if roll_back else "Completed")
+            # Operations beyond the undo history are dropped so later reads stay quick
+            self.journal.compact()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not recover interrupted operations: {e}")
+
+    def closeEvent(self, event):
+        # A running operation stops after its current item; the thread must end before the window goes
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel.cancel()
+            self.progress_label.setText("Cancelling after the current item...")
+            self.worker.wait()
+        super().closeEvent(event)
+
+    def toggle_incremental_check(self, prefix):
+        # Without a prefix any name starting with a number would look renamed already
+        self.incremental_check.setEnabled(bool(prefix))
+
     def toggle_regex_inputs(self, state):
         enabled = (state == Qt.Checked)
         self.regex_pattern_input.setEnabled(enabled)
@@ -1,6 +1,8 @@
 import sys
 import os
+import threading
 from src.utils.console_input import safe_input
+from src.progress import ProgressReporter, CancellationToken, OperationCancelled, format_progress
 
 def display_welcome_message():
     print("\n" + "="*60)
@@ -46,6 +48,54 @@ def display_results(results):
     for result in results:
         print(result)
 
+def display_progress(reporter):
+    """Redraw the progress line in place (a ProgressReporter callback)"""
+    line = format_progress(reporter)
+    sys.stdout.write("\r" + line.ljust(getattr(display_progress, 'width', 0)))
+    display_progress.width = len(line)
+    if reporter.finished:
+        sys.stdout.write("\n")
+        display_progress.width = 0
+    sys.stdout.flush()
+
+def run_with_progress(operation):
+    """
+    Run an operation with a progress bar; Ctrl+C asks it to stop after the current item.
+    
+    Args:
+        operation (callable): Called as operation(progress, cancel)
+        
+    Returns:
+        The operation's result, or None if it was cancelled before producing one
+    """
+    progress = ProgressReporter(display_progress)
+    cancel = CancellationToken()
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = operation(progress, cancel)
+        except OperationCancelled:
+            pass
+        except BaseException as e:
+            outcome['error'] = e
+
+    # The work runs on a helper thread so Ctrl+C reaches this one and can be turned into a cancellation
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    while worker.is_alive():
+        try:
+            worker.join(0.2)
+        except KeyboardInterrupt:
+            if not cancel.cancelled:
+                print("\nCancelling after the current item...")
+                cancel.cancel()
+    if 'error' in outcome:
+        raise outcome['error']
+    if cancel.cancelled:
+        print("Cancelled. Changes made before that are kept and can be undone.")
+    return outcome.get('result')
+
 def display_error(message):
     print(f"Error: {message}")
 
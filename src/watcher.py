@@ -0,0 +1,344 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+try:
+    from src.scanner import ScanEntry
+    from src.ordering import sort_items
+    from src.rename_utils import generate_new_name, RegexRule, RegexRuleError
+    from src.outcomes import Outcome, OutcomeSummary, OUTCOME_OK, OUTCOME_CONFLICT, OUTCOME_ERROR, log_outcome
+except ImportError:
+    from scanner import ScanEntry
+    from ordering import sort_items
+    from rename_utils import generate_new_name, RegexRule, RegexRuleError
+    from outcomes import Outcome, OutcomeSummary, OUTCOME_OK, OUTCOME_CONFLICT, OUTCOME_ERROR, log_outcome
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+
+def _list_names(directory_path):
+    try:
+        with os.scandir(directory_path) as iterator:
+            return set(entry.name for entry in iterator)
+    except FileNotFoundError:
+        return set()
+
+class PollingBackend:
+    """
+    Change source that relists the folder on every wait.
+
+    Used wherever inotify is unavailable (Windows, macOS, network shares).
+    """
+
+    def __init__(self, directory_path):
+        self.directory_path = directory_path
+        self._names = _list_names(directory_path)
+
+    def wait(self, timeout):
+        """
+        Wait for changes in the folder.
+
+        Returns:
+            tuple: (added names, removed names) since the previous call
+        """
+        time.sleep(timeout)
+        names = _list_names(self.directory_path)
+        added = names - self._names
+        removed = self._names - names
+        self._names = names
+        return added, removed
+
+    def close(self):
+        pass
+
+class InotifyBackend:
+    """
+    Change source backed by Linux inotify, accessed through ctypes.
+
+    Raises:
+        OSError: If inotify is unavailable or the folder can't be watched
+    """
+
+    def __init__(self, directory_path):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.directory_path = directory_path
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(directory_path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, os.strerror(err), directory_path)
+        self._names = None
+
+    def wait(self, timeout):
+        """
+        Wait up to ``timeout`` seconds for changes in the folder.
+
+        Returns:
+            tuple: (added names, removed names); both sets are empty on timeout
+        """
+        added, removed = set(), set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return added, removed
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return added, removed
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; fall back to a full relisting
+                return self._resync()
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                raise OSError(errno.ENOENT, "Watched folder was removed or moved", self.directory_path)
+            if not name or mask & IN_ISDIR:
+                continue
+            if mask & (IN_MOVED_FROM | IN_DELETE):
+                removed.add(name)
+                added.discard(name)
+            else:
+                added.add(name)
+                removed.discard(name)
+        return added, removed
+
+    def _resync(self):
+        names = _list_names(self.directory_path)
+        # Report everything as added; the watcher ignores names it already knows
+        return names, set()
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+def open_backend(directory_path, use_inotify=True):
+    """
+    Open the best available change source for a folder.
+
+    Args:
+        directory_path (str): Folder to watch
+        use_inotify (bool): Whether to try inotify before falling back to polling
+
+    Returns:
+        object: An InotifyBackend or PollingBackend
+    """
+    if use_inotify:
+        try:
+            return InotifyBackend(directory_path)
+        except (OSError, AttributeError):
+            pass
+    return PollingBackend(directory_path)
+
+class FolderWatcher:
+    """
+    Rename files as they arrive in a hot folder.
+
+    Files present when the watch starts are left alone. New arrivals are
+    collected into batches: a batch is only taken once no new file has shown
+    up for ``debounce`` seconds, and a file only joins it after its size and
+    mtime stayed the same across two checks, so files that are still being
+    copied are never renamed. Sequence numbers continue across batches, and
+    the names the watcher produces itself are never picked up again.
+
+    Args:
+        directory_path (str): Folder to watch
+        prefix_format (str): Prefix for the new names
+        use_order (bool): Whether to insert sequence numbers
+        sort_by (str): Sort key applied within each batch (see ordering.SORT_KEYS)
+        reverse (bool): Whether to reverse the sort order
+        regex_pattern (str): Optional regex applied to each name before the prefix
+        regex_replacement (str): Replacement for regex_pattern
+        start_index (int): First sequence number to use
+        entry_filter (callable): Predicate deciding which arrivals are renamed
+        debounce (float): Quiet period in seconds before a batch is taken
+        poll_interval (float): Seconds between stability checks (and relistings when polling)
+        use_inotify (bool): Whether to use inotify when available
+
+    Attributes:
+        summary (OutcomeSummary): Outcomes of every rename attempted since the watch started
+
+    Raises:
+        RegexRuleError: If regex_pattern or regex_replacement is invalid or risky
+    """
+
+    def __init__(self, directory_path, prefix_format, use_order=True, sort_by='natural', reverse=False,
+                 regex_pattern=None, regex_replacement='', start_index=1, entry_filter=None,
+                 debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True):
+        self.directory_path = directory_path
+        self.prefix_format = prefix_format
+        self.use_order = use_order
+        self.sort_by = sort_by
+        self.reverse = reverse
+        self.regex_rule = RegexRule(regex_pattern, regex_replacement) if regex_pattern else None
+        self.next_index = start_index
+        self.entry_filter = entry_filter
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self._known = set()     # names that are never renamed (pre-existing, filtered out or ours)
+        self._pending = {}      # name -> last (size, mtime_ns) snapshot, or None before the first check
+        self._last_event = 0.0
+        self._last_check = 0.0
+        self.summary = OutcomeSummary()
+
+    def _check_stable(self, now):
+        """Return the pending names whose size and mtime held still since the last check."""
+        if now - self._last_event < self.debounce or now - self._last_check < self.poll_interval:
+            return []
+        self._last_check = now
+        ready = []
+        for name in list(self._pending):
+            path = os.path.join(self.directory_path, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[name]
+                continue
+            if os.path.isdir(path):
+                del self._pending[name]
+                self._known.add(name)
+                continue
+            snapshot = (st.st_size, st.st_mtime_ns)
+            if self._pending[name] == snapshot:
+                del self._pending[name]
+                ready.append(name)
+            else:
+                self._pending[name] = snapshot
+        return ready
+
+    def _report(self, outcome):
+        self.summary.add(outcome)
+        log_outcome(logger, outcome)
+        if not outcome.ok:
+            # Problems are rare here and the user is watching, so they are shown as they happen
+            logger.warning("%s", outcome)
+
+    def process_batch(self, names):
+        """
+        Rename a batch of arrived files, continuing the sequence numbering.
+
+        Args:
+            names (list): File names inside the watched folder
+
+        Returns:
+            list: List of (old_path, new_path) tuples for the files that were renamed
+        """
+        entries = []
+        for name in names:
+            entry = ScanEntry(name, os.path.join(self.directory_path, name), False)
+            if self.entry_filter is not None and not self.entry_filter(entry):
+                self._known.add(name)
+                continue
+            entries.append(entry)
+
+        renamed = []
+        for entry in sort_items(entries, self.sort_by, self.reverse):
+            self._known.add(entry.name)
+            base_name = entry.name
+            if self.regex_rule is not None:
+                try:
+                    base_name = self.regex_rule.rename(base_name)
+                except RegexRuleError as e:
+                    self._report(Outcome(OUTCOME_ERROR, 'rename', entry.path, reason='regex rule failed',
+                                         detail=str(e)))
+                    continue
+            order_value = self.next_index if self.use_order else None
+            new_name = generate_new_name(base_name, self.prefix_format, order_value)
+            new_path = os.path.join(self.directory_path, new_name)
+
+            if new_name != entry.name:
+                if os.path.exists(new_path):
+                    self._report(Outcome(OUTCOME_CONFLICT, 'rename', entry.path, new_path, 'target exists'))
+                    continue
+                try:
+                    os.rename(entry.path, new_path)
+                except OSError as e:
+                    self._report(Outcome.from_error('rename', entry.path, new_path, e))
+                    continue
+                self._known.discard(entry.name)
+                self._known.add(new_name)
+                self._report(Outcome(OUTCOME_OK, 'rename', entry.path, new_path))
+            renamed.append((entry.path, new_path))
+            if self.use_order:
+                self.next_index += 1
+        return renamed
+
+    def run(self, stop_event=None, on_batch=None, max_batches=None):
+        """
+        Watch the folder until stopped.
+
+        Args:
+            stop_event (threading.Event): Stops the watch once set
+            on_batch (callable): Called with the (old_path, new_path) list of every batch
+            max_batches (int): Stop after this many renamed batches
+
+        Returns:
+            int: Number of batches processed
+        """
+        backend = open_backend(self.directory_path, self.use_inotify)
+        self._known = _list_names(self.directory_path)
+        self._pending = {}
+        batches = 0
+        try:
+            while stop_event is None or not stop_event.is_set():
+                added, removed = backend.wait(self.poll_interval)
+                now = time.monotonic()
+                for name in removed:
+                    self._known.discard(name)
+                    self._pending.pop(name, None)
+                for name in added:
+                    if name not in self._known:
+                        self._pending[name] = None
+                        self._last_event = now
+
+                ready = self._check_stable(now) if self._pending else []
+                if not ready:
+                    continue
+                renamed = self.process_batch(ready)
+                if renamed:
+                    batches += 1
+                    if on_batch is not None:
+                        on_batch(renamed)
+                    if max_batches is not None and batches >= max_batches:
+                        break
+        finally:
+            backend.close()
+        return batches
@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import unittest
+from benchmarks.synthetic_tree import make_names, make_flat_tree, make_chains, make_underscore_folders
+from benchmarks.run_benchmarks import run_benchmarks, compare_results
+
+class TestSyntheticTree(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_names_are_seeded(self):
+        self.assertEqual(make_names(50, seed=7), make_names(50, seed=7))
+        self.assertNotEqual(make_names(50, seed=7), make_names(50, seed=8))
+        self.assertEqual(len(set(make_names(500))), 500)
+
+    def test_tree_shapes(self):
+        paths = make_flat_tree(os.path.join(self.test_dir, 'flat'), 20)
+        self.assertEqual(len(os.listdir(os.path.join(self.test_dir, 'flat'))), 20)
+        self.assertTrue(all(os.path.isfile(p) for p in paths))
+
+        top = make_chains(os.path.join(self.test_dir, 'chains'), 2, depth=4)[0]
+        depth = 0
+        for _, dirs, files in os.walk(top):
+            depth += 1
+            if depth < 4:
+                self.assertEqual((len(dirs), len(files)), (1, 0))
+        self.assertEqual(depth, 4)
+
+        folders = make_underscore_folders(os.path.join(self.test_dir, 'wide'), 3, parts=3)
+        self.assertTrue(all(len(os.path.basename(f).split('_')) == 3 for f in folders))
+
+class TestBenchmarkRunner(unittest.TestCase):
+
+    def test_run_and_compare(self):
+        results = run_benchmarks(['find_longest_common_prefix'], sizes=[10], repeat=1, log=None)
+        self.assertIn('find_longest_common_prefix[10]', results['results'])
+
+        baseline = {"results": {"find_longest_common_prefix[10]": {"best": 1e-9}}}
+        rows = compare_results(results, baseline, threshold=1.5)
+        self.assertEqual(len(rows), 1)
+        self.assertTrue(rows[0][4])
+
+if __name__ == '__main__':
+    unittest.main()
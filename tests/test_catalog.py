@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from src.catalog import DirectoryCatalog
+
+class TestDirectoryCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.test_dir = os.path.join(self.work_dir, 'data')
+        os.makedirs(os.path.join(self.test_dir, 'sub'))
+        for name in ['a.txt', os.path.join('sub', 'b.txt')]:
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write('content')
+        self.age_dirs()
+        self.catalog = DirectoryCatalog(os.path.join(self.work_dir, 'catalog.sqlite3'))
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.work_dir)
+
+    def age_dirs(self, seconds=100):
+        # Pretend the folders were last modified a while ago so listings can be reused
+        old = time.time() - seconds
+        for path in [self.test_dir, os.path.join(self.test_dir, 'sub')]:
+            os.utime(path, (old, old))
+
+    def test_second_scan_reuses_listing(self):
+        first = [e.name for e in self.catalog.scan_directory(self.test_dir, include_folders=True)]
+        second = [e.name for e in self.catalog.scan_directory(self.test_dir, include_folders=True)]
+        self.assertEqual(first, ['a.txt', 'sub'])
+        self.assertEqual(second, first)
+        self.assertEqual((self.catalog.misses, self.catalog.hits), (1, 1))
+
+    def test_changed_directory_is_relisted(self):
+        self.catalog.scan_directory(self.test_dir)
+        with open(os.path.join(self.test_dir, 'c.txt'), 'w') as f:
+            f.write('new')
+        self.age_dirs(50)
+        names = [e.name for e in self.catalog.scan_directory(self.test_dir)]
+        self.assertEqual(names, ['a.txt', 'c.txt'])
+        self.assertEqual(self.catalog.misses, 2)
+
+    def test_tree_scan_only_relists_changed_folders(self):
+        names = sorted(e.name for e in self.catalog.scan_tree(self.test_dir))
+        self.assertEqual(names, ['a.txt', 'b.txt'])
+        sub_dir = os.path.join(self.test_dir, 'sub')
+        os.remove(os.path.join(sub_dir, 'b.txt'))
+        old = time.time() - 50
+        os.utime(sub_dir, (old, old))
+        names = sorted(e.name for e in self.catalog.scan_tree(self.test_dir))
+        self.assertEqual(names, ['a.txt'])
+        # Root reused, only 'sub' relisted
+        self.assertEqual((self.catalog.misses, self.catalog.hits), (3, 1))
+
+    def test_walk_filters_while_reading_listings(self):
+        walked = dict((os.path.relpath(path, self.test_dir), [e.name for e in dirs + files])
+                      for path, dirs, files in self.catalog.walk(self.test_dir,
+                                                                 entry_filter=lambda e: e.name != 'sub'))
+        self.assertEqual(walked, {'.': ['a.txt'], 'sub': ['b.txt']})
+        names = [e.name for e in self.catalog.scan_tree(self.test_dir, include_folders=True,
+                                                        entry_filter=lambda e: e.name != 'a.txt')]
+        self.assertEqual(names, ['sub', 'b.txt'])
+
+    def test_recently_modified_directory_is_not_trusted(self):
+        os.utime(self.test_dir, None)
+        self.catalog.scan_directory(self.test_dir)
+        self.catalog.scan_directory(self.test_dir)
+        self.assertEqual(self.catalog.hits, 0)
+
+    def test_missing_directory(self):
+        self.assertEqual(self.catalog.scan_directory(os.path.join(self.work_dir, 'missing')), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.journal import Journal, JournalBatch, JournalOp, OP_MOVE, BATCH_OPEN, BATCH_COMMITTED
+from src.plan_executor import execute_moves
+from src.folder_operations import collapse_folder, uncollapse_folder
+
+def write(path, content='content'):
+    with open(path, 'w') as f:
+        f.write(content)
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.work = os.path.join(self.test_dir, 'work')
+        os.makedirs(self.work)
+        self.journal = Journal(os.path.join(self.test_dir, 'journal.jsonl'), sync_every=4)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.test_dir)
+
+    def path(self, *parts):
+        return os.path.join(self.work, *parts)
+
+    def test_records_are_written_before_each_change(self):
+        write(self.path('a.txt'))
+        with self.journal.begin('rename') as batch:
+            batch.rename(self.path('a.txt'), self.path('b.txt'))
+            with open(self.journal.path) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([r['type'] for r in records], ['begin', 'move'])
+        self.assertEqual(self.journal.read()[0].state, BATCH_COMMITTED)
+
+    def test_undo_and_redo_swap(self):
+        write(self.path('a.txt'), 'A')
+        write(self.path('b.txt'), 'B')
+        with self.journal.begin('rename') as batch:
+            execute_moves([(self.path('a.txt'), self.path('b.txt')),
+                           (self.path('b.txt'), self.path('a.txt'))], batch=batch)
+        self.assertEqual(read(self.path('a.txt')), 'B')
+
+        report = self.journal.undo()
+        self.assertEqual(report.problems, [])
+        self.assertEqual((read(self.path('a.txt')), read(self.path('b.txt'))), ('A', 'B'))
+        self.assertIsNone(self.journal.undo())
+
+        self.journal.redo()
+        self.assertEqual((read(self.path('a.txt')), read(self.path('b.txt'))), ('B', 'A'))
+        self.assertIsNone(self.journal.redo())
+        self.assertEqual(len(self.journal.history()[0]), 1)
+
+    def test_failed_change_is_not_undone(self):
+        write(self.path('a.txt'))
+        with self.journal.begin('rename') as batch:
+            with self.assertRaises(OSError):
+                batch.rename(self.path('missing.txt'), self.path('x.txt'))
+            batch.rename(self.path('a.txt'), self.path('b.txt'))
+        self.assertEqual(len(self.journal.read()[0].applied_ops()), 1)
+        self.journal.undo()
+        self.assertEqual(os.listdir(self.work), ['a.txt'])
+
+    def test_recover_interrupted_batch(self):
+        for name in ['1.txt', '2.txt', '3.txt']:
+            write(self.path(name), name)
+        batch = self.journal.begin('rename')
+        batch.rename(self.path('1.txt'), self.path('x1.txt'))
+        batch.rename(self.path('2.txt'), self.path('x2.txt'))
+        # Crash between writing the intent and renaming
+        batch._intent('move', self.path('3.txt'), self.path('x3.txt'))
+
+        incomplete = self.journal.incomplete()
+        self.assertEqual([b.state for b in incomplete], [BATCH_OPEN])
+        report = self.journal.recover(incomplete[0])
+        self.assertEqual(report.applied, 2)
+        self.assertEqual(sorted(os.listdir(self.work)), ['1.txt', '2.txt', '3.txt'])
+        self.assertEqual(self.journal.incomplete(), [])
+        self.assertEqual(self.journal.history(), ([], []))
+
+    def test_recover_checks_last_change_in_each_folder(self):
+        for folder in ['x', 'y']:
+            os.makedirs(self.path(folder))
+            write(self.path(folder, '1.txt'))
+            write(self.path(folder, '2.txt'))
+        batch = self.journal.begin('rename')
+        # Two folders renamed in parallel; each was cut short after its intent record
+        batch.rename(self.path('x', '1.txt'), self.path('x', 'a.txt'))
+        batch.rename(self.path('y', '1.txt'), self.path('y', 'a.txt'))
+        batch._intent('move', self.path('x', '2.txt'), self.path('x', 'b.txt'))
+        batch._intent('move', self.path('y', '2.txt'), self.path('y', 'b.txt'))
+
+        report = self.journal.recover(self.journal.incomplete()[0])
+        self.assertEqual((report.applied, report.problems), (2, []))
+        self.assertEqual(sorted(os.listdir(self.path('x'))), ['1.txt', '2.txt'])
+        self.assertEqual(sorted(os.listdir(self.path('y'))), ['1.txt', '2.txt'])
+
+    def test_keep_interrupted_batch_finishes_parked_item(self):
+        write(self.path('a.txt'), 'A')
+        batch = self.journal.begin('rename')
+        batch.rename(self.path('a.txt'), self.path('.tmp'), final=self.path('b.txt'))
+
+        self.journal.recover(self.journal.incomplete()[0], roll_back=False)
+        self.assertEqual(os.listdir(self.work), ['b.txt'])
+        # The kept batch can be undone like any other
+        self.journal.undo()
+        self.assertEqual(os.listdir(self.work), ['a.txt'])
+
+    def test_case_only_rename_on_case_insensitive_system(self):
+        write(self.path('A.txt'))
+        op = JournalOp(0, OP_MOVE, self.path('a.txt'), self.path('A.txt'))
+        # Both spellings resolve to the same file, as on Windows or macOS
+        with mock.patch('src.journal._same_item', return_value=True), \
+                mock.patch('os.path.lexists', return_value=True):
+            self.assertTrue(op.is_applied())
+            self.assertFalse(JournalOp(0, OP_MOVE, self.path('A.txt'), self.path('a.txt')).is_applied())
+
+    def test_torn_last_line_is_ignored(self):
+        write(self.path('a.txt'))
+        with self.journal.begin('rename') as batch:
+            batch.rename(self.path('a.txt'), self.path('b.txt'))
+        self.journal.close()
+        with open(self.journal.path, 'a') as f:
+            f.write('{"type": "mo')
+        self.assertEqual(len(self.journal.read()), 1)
+
+    def test_compact_keeps_recent_history(self):
+        self.journal.history_limit = 2
+        write(self.path('f0.txt'))
+        for i in range(4):
+            with self.journal.begin('rename') as batch:
+                batch.rename(self.path(f'f{i}.txt'), self.path(f'f{i + 1}.txt'))
+        self.journal.undo()
+        open_batch = self.journal.begin('rename')
+        open_batch.rename(self.path('f3.txt'), self.path('g.txt'))
+        before = self.journal.history()
+
+        # Only the oldest rename falls beyond the last two undoable operations
+        self.assertEqual(self.journal.compact(), 1)
+        after = self.journal.history()
+        self.assertEqual([[b.id for b in stack] for stack in after],
+                         [[b.id for b in before[0][-2:]], [b.id for b in before[1]]])
+        self.assertEqual(len(self.journal.read()), 5)  # 2 undoable, 1 undone and its undo, 1 open
+        self.assertEqual([b.id for b in self.journal.incomplete()], [open_batch.id])
+        self.assertEqual(self.journal.compact(), 0)
+        # The journal keeps working after the rewrite
+        open_batch.commit()
+        self.journal.undo()
+        self.assertEqual(os.listdir(self.work), ['f3.txt'])
+
+    def test_unjournaled_batch_just_renames(self):
+        write(self.path('a.txt'))
+        with JournalBatch() as batch:
+            batch.rename(self.path('a.txt'), self.path('b.txt'))
+        self.assertEqual(os.listdir(self.work), ['b.txt'])
+        self.assertFalse(os.path.exists(self.journal.path))
+
+class TestJournaledFolderOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.work = os.path.join(self.test_dir, 'work')
+        os.makedirs(self.work)
+        self.journal = Journal(os.path.join(self.test_dir, 'journal.jsonl'))
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.test_dir)
+
+    def snapshot(self):
+        result = []
+        for root, dirs, files in os.walk(self.work):
+            rel = os.path.relpath(root, self.work)
+            result.extend(os.path.join(rel, name) for name in dirs + files)
+        return sorted(result)
+
+    def test_collapse_keeps_item_named_like_child(self):
+        inner = os.path.join(self.work, 'a', 'b')
+        os.makedirs(inner)
+        write(os.path.join(inner, 'b'), 'keep me')
+        write(os.path.join(inner, 'other.txt'))
+        before = self.snapshot()
+
+        with self.journal.begin('collapse') as batch:
+            new_path = collapse_folder(os.path.join(self.work, 'a'), inner, batch=batch)
+        self.assertEqual(new_path, os.path.join(self.work, 'a_b'))
+        self.assertEqual(sorted(os.listdir(new_path)), ['b', 'other.txt'])
+        self.assertEqual(read(os.path.join(new_path, 'b')), 'keep me')
+
+        self.journal.undo()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_uncollapse_moves_folder_into_place(self):
+        folder = os.path.join(self.work, 'x_y_z')
+        os.makedirs(os.path.join(folder, 'sub'))
+        write(os.path.join(folder, 'f.txt'), 'data')
+        before = self.snapshot()
+
+        with self.journal.begin('uncollapse') as batch:
+            result = uncollapse_folder(folder, batch=batch)
+        self.assertEqual(result, os.path.join(self.work, 'x'))
+        self.assertEqual(read(os.path.join(self.work, 'x', 'y', 'z', 'f.txt')), 'data')
+        self.assertTrue(os.path.isdir(os.path.join(self.work, 'x', 'y', 'z', 'sub')))
+
+        self.journal.undo()
+        self.assertEqual(self.snapshot(), before)
+        self.journal.redo()
+        self.assertEqual(read(os.path.join(self.work, 'x', 'y', 'z', 'f.txt')), 'data')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from src.name_cleaner import NameCleaner, load_name_cleaner
+from src.prefix_analysis import analyze_names
+from src.rename_utils import remove_prefix_and_order
+
+class FakeConfig:
+    def __init__(self, options):
+        self.options = options
+
+    def get_option(self, key, default=None):
+        return self.options.get(key, default)
+
+class TestNameCleaner(unittest.TestCase):
+
+    # (name, common prefix, result of the long-standing remove_prefix_and_order rules)
+    cases = [
+        ('IMG_001_beach.jpg', None, 'beach.jpg'),
+        ('img_2024_3_4_party.png', None, 'party.png'),
+        ('Trip_12_Trip_sea.jpg', 'Trip_', 'Trip_sea.jpg'),
+        ('photo_photo.txt', None, 'photo.txt'),
+        ('abcabc', None, 'abc'),
+        ('abab_x.pdf', None, 'abab_x.pdf'),
+        ('__a__b__a.txt', None, 'a__b.txt'),
+        ('007_.jpg', None, '.jpg'),
+        ('report.', None, 'report'),
+        ('2025_doc_x.docx', None, 'doc_x.docx'),
+    ]
+
+    def test_default_rules(self):
+        cleaner = NameCleaner()
+        for name, prefix, expected in self.cases:
+            self.assertEqual(cleaner.clean(name, prefix), expected, name)
+            self.assertEqual(remove_prefix_and_order(name, prefix), expected, name)
+
+    def test_batch_matches_single_names(self):
+        cleaner = NameCleaner()
+        names = [name for name, _, _ in self.cases]
+        self.assertEqual(cleaner.clean_names(names, 'Trip_'), [cleaner.clean(name, 'Trip_') for name in names])
+        clusters = analyze_names(['DSC_1_a.jpg', 'DSC_2_b.jpg', 'scan_x_c.png', 'scan_x_d.png'])
+        self.assertEqual(cleaner.clean_names(['DSC_1_a.jpg', 'scan_x_c.png'], prefix_clusters=clusters),
+                         ['a.jpg', 'c.png'])
+
+    def test_configured_rules(self):
+        config = FakeConfig({"cleaning": {"prefixes": ["DSC"], "order_pattern": r"[A-Z]\d+", "dedupe_tokens": False}})
+        cleaner = load_name_cleaner(config)
+        self.assertEqual(cleaner.clean('dsc_A1_B2_x_x.jpg'), 'x_x.jpg')
+        self.assertEqual(cleaner.clean('IMG_1_x.jpg'), 'IMG_1_x.jpg')
+        # A missing section keeps the built-in rules
+        self.assertEqual(load_name_cleaner(FakeConfig({})).clean('IMG_1_x.jpg'), 'x.jpg')
+
+    def test_prefixes_are_literal(self):
+        cleaner = NameCleaner(prefixes=['v1.0', 'c++'], order_pattern=None)
+        self.assertEqual(cleaner.clean('v1.0_notes.txt'), 'notes.txt')
+        self.assertEqual(cleaner.clean('v1x0_notes.txt'), 'v1x0_notes.txt')
+        self.assertEqual(cleaner.clean('C++_code.cpp'), 'code.cpp')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.name_template import NameTemplate, TemplateError, load_name_template
+from src.rename_plan import build_plan, apply_plan, RenamePlan, STATUS_CONFLICT
+from src.scanner import ScanEntry, scan_directory
+
+class CountingEntry(ScanEntry):
+    __slots__ = ('stat_calls',)
+
+    def __init__(self, name, path):
+        super().__init__(name, path, False)
+        self.stat_calls = 0
+
+    def stat(self):
+        self.stat_calls += 1
+        return super().stat()
+
+class TestNameTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'trip_beach_01.jpg')
+        with open(self.path, 'w') as f:
+            f.write('12345')
+        os.utime(self.path, (0, 1700000000))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_fields(self):
+        template = NameTemplate('{prefix}{label}_{index:04d}')
+        self.assertEqual(template.fields, {'prefix', 'label', 'index'})
+        self.assertEqual(template.render(self.path, index=7, prefix='P_'), 'P_trip_beach_0007.jpg')
+        parent = os.path.basename(self.test_dir)
+        template = NameTemplate('{parent}-{mtime:%Y}-{size}-{stem}{ext}')
+        self.assertEqual(template.render(self.path), f'{parent}-2023-5-trip_beach_01.jpg')
+        # Numbering off leaves the index out
+        self.assertEqual(NameTemplate('{stem}{index}').render(self.path), 'trip_beach_01.jpg')
+
+    def test_only_used_fields_are_computed(self):
+        entry = CountingEntry('trip_beach_01.jpg', self.path)
+        NameTemplate('{prefix}{stem}_{index:03d}').render(entry, index=1)
+        self.assertEqual(entry.stat_calls, 0)
+        NameTemplate('{mtime}_{stem}').render(entry)
+        self.assertEqual(entry.stat_calls, 1)
+
+    def test_invalid_templates(self):
+        for text in ['', '{nope}', '{index:%Y}', '{stem.upper}', 'a/{stem}', '{mtime:%Y/%m}', '{stem']:
+            with self.assertRaises(TemplateError, msg=text):
+                NameTemplate(text)
+
+    def test_render_names_pads_plain_index(self):
+        entries = [ScanEntry(name, os.path.join(self.test_dir, name), False)
+                   for name in [f'f{i}.jpg' for i in range(10)] + ['logs.tar.gz', '.env']]
+        new_names = NameTemplate('{index}-{stem}').render_names(entries, use_order=True)
+        self.assertEqual(new_names[0], '01-f0.jpg')
+        self.assertEqual(new_names[-2:], ['11-logs.tar.gz', '12-.env'])
+        self.assertEqual(NameTemplate('{index:d}{ext}').render_names(entries[:1], use_order=True, start_index=9),
+                         ['9.jpg'])
+        self.assertEqual(NameTemplate('{stem}!{ext}').render_names(entries[-2:]), ['logs!.tar.gz', '.env!'])
+
+    def test_build_plan_uses_template(self):
+        rows = list(build_plan(scan_directory(self.test_dir), 'X_', use_order=True, start_index=3,
+                               template=NameTemplate('{prefix}{index:02d}_{stem}')))
+        self.assertEqual([row.new_name for row in rows], ['X_03_trip_beach_01.jpg'])
+
+    def test_index_needs_ordering(self):
+        template = NameTemplate('{index}')
+        template.check_numbering(True)
+        with self.assertRaises(TemplateError):
+            build_plan(scan_directory(self.test_dir), '', template=template)
+
+    def test_empty_stem_is_a_conflict(self):
+        open(os.path.join(self.test_dir, 'other.jpg'), 'w').close()
+        plan = RenamePlan.from_rows(build_plan(scan_directory(self.test_dir), '', template=NameTemplate('{prefix}')))
+        self.assertEqual([row.new_name for row in plan], ['.jpg', '.jpg'])
+        self.assertEqual([row.status for row in plan], [STATUS_CONFLICT, STATUS_CONFLICT])
+        self.assertEqual(apply_plan(plan, skip_conflicts=True), 0)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['other.jpg', 'trip_beach_01.jpg'])
+
+    def test_configured_template(self):
+        class Config:
+            def get_option(self, key, default=None):
+                return {'output_format': '{prefix}{label}_{index}'}.get(key, default)
+        self.assertEqual(load_name_template(Config()).template, '{prefix}{label}_{index}')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.ordering import natural_key, parse_ordering, sort_items
+from src.scanner import scan_directory
+
+class CountingItem:
+    def __init__(self, name, size):
+        self.name = name
+        self.path = name
+        self.size = size
+        self.stat_calls = 0
+
+    def stat(self):
+        self.stat_calls += 1
+        return os.stat_result((0, 0, 0, 0, 0, 0, self.size, 0, 0, 0))
+
+class TestOrdering(unittest.TestCase):
+
+    def test_natural_order(self):
+        names = ['img10.jpg', 'img2.jpg', 'IMG1.jpg', 'img2a.jpg']
+        self.assertEqual(sort_items(names, 'natural'), ['IMG1.jpg', 'img2.jpg', 'img2a.jpg', 'img10.jpg'])
+        self.assertEqual(sort_items(names, 'natural', reverse=True)[0], 'img10.jpg')
+        self.assertLess(natural_key('file9'), natural_key('file10'))
+
+    def test_none_keeps_scan_order(self):
+        names = ['b', 'a', 'c']
+        self.assertEqual(sort_items(names, 'none'), names)
+
+    def test_parse_ordering(self):
+        self.assertEqual(parse_ordering('ascending'), ('natural', False))
+        self.assertEqual(parse_ordering('descending'), ('natural', True))
+        self.assertEqual(parse_ordering('size_desc'), ('size', True))
+        self.assertEqual(parse_ordering('mtime'), ('mtime', False))
+        self.assertEqual(parse_ordering('bogus'), ('natural', False))
+
+    def test_stat_keys_are_computed_once_per_item(self):
+        items = [CountingItem(f'f{i}', size) for i, size in enumerate([30, 10, 20, 10])]
+        ordered = sort_items(items, 'size')
+        self.assertEqual([item.name for item in ordered], ['f1', 'f3', 'f2', 'f0'])
+        self.assertTrue(all(item.stat_calls == 1 for item in items))
+
+    def test_mtime_order_on_disk(self):
+        test_dir = tempfile.mkdtemp()
+        try:
+            for i, name in enumerate(['c.txt', 'a.txt', 'b.txt']):
+                path = os.path.join(test_dir, name)
+                with open(path, 'w') as f:
+                    f.write('x')
+                os.utime(path, (1000 + i, 1000 + i))
+            ordered = sort_items(scan_directory(test_dir), 'mtime')
+            self.assertEqual([entry.name for entry in ordered], ['c.txt', 'a.txt', 'b.txt'])
+        finally:
+            shutil.rmtree(test_dir)
+
+if __name__ == '__main__':
+    unittest.main()
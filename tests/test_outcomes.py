@@ -0,0 +1,99 @@
+import errno
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from src.outcomes import Outcome, OutcomeSummary, OUTCOME_OK, OUTCOME_SKIPPED, OUTCOME_CONFLICT, OUTCOME_ERROR
+from src.file_operations import rename_files
+from src.plan_executor import execute_moves
+from src.rename_plan import RenamePlan, apply_plan
+
+class TestOutcomeSummary(unittest.TestCase):
+
+    def test_counts_reasons_and_examples(self):
+        summary = OutcomeSummary(max_examples=1)
+        summary.add(Outcome(OUTCOME_OK, 'rename', 'a', 'b'))
+        for name in 'cd':
+            summary.add(Outcome(OUTCOME_ERROR, 'rename', name, 'x', 'Permission denied', errno.EACCES))
+        summary.add(Outcome(OUTCOME_SKIPPED, 'rename', 'e', reason='path does not exist'))
+        self.assertEqual((summary.total, summary.problems), (4, 3))
+        self.assertEqual(summary.reasons[(OUTCOME_ERROR, 'EACCES: Permission denied')], 2)
+        self.assertEqual(summary.format().splitlines(), [
+            "1 done, 1 skipped, 2 error.",
+            "  2 error: EACCES: Permission denied",
+            "  1 skipped: path does not exist",
+            "    e.g. rename e: skipped (path does not exist)",
+            "    e.g. rename c -> x: error (Permission denied)",
+        ])
+
+    def test_item_details_do_not_become_reasons(self):
+        summary = OutcomeSummary(max_examples=1)
+        for i in range(3):
+            summary.add(Outcome(OUTCOME_CONFLICT, 'collapse', f'p{i}', f'c{i}', 'would overwrite existing items',
+                                detail=f'x{i}.txt'))
+            summary.add(Outcome.from_error('rename', f'a{i}', None, ValueError(f"bad name a{i}")))
+        self.assertEqual(summary.reasons, {(OUTCOME_CONFLICT, 'would overwrite existing items'): 3,
+                                           (OUTCOME_ERROR, 'ValueError'): 3})
+        self.assertIn("e.g. collapse p0 -> c0: conflict (would overwrite existing items: x0.txt)", summary.format())
+
+    def test_log_is_one_message(self):
+        summary = OutcomeSummary()
+        summary.add(Outcome(OUTCOME_CONFLICT, 'collapse', 'a', 'b', 'target exists'))
+        summary.add(Outcome(OUTCOME_CONFLICT, 'collapse', 'c', 'b', 'target exists'))
+        with self.assertLogs('test.outcomes', level='WARNING') as logs:
+            summary.log(logging.getLogger('test.outcomes'))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('2 conflict: target exists', logs.output[0])
+
+class TestOperationOutcomes(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def make(self, *names):
+        for name in names:
+            open(self.path(name), 'w').close()
+
+    def test_missing_path_is_one_summary_warning(self):
+        self.make('a.txt')
+        paths = [self.path('a.txt'), self.path('missing.txt')]
+        with self.assertLogs('src.file_operations', level='WARNING') as logs:
+            new_paths = rename_files(paths, 'P_')
+        self.assertEqual(new_paths, [self.path('P_a.txt'), self.path('missing.txt')])
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('1 skipped', logs.output[0])
+
+    def test_rename_files_skips_invalid_names_up_front(self):
+        long_name = 'b' * 200 + '.txt'
+        self.make('a.txt', long_name)
+        summary = OutcomeSummary()
+        new_paths = rename_files([self.path('a.txt'), self.path(long_name)], 'P' * 60, summary=summary)
+        self.assertEqual(new_paths, [self.path('P' * 60 + 'a.txt'), self.path(long_name)])
+        self.assertEqual((summary.counts[OUTCOME_OK], summary.counts[OUTCOME_CONFLICT]), (1, 1))
+        self.assertTrue(os.path.exists(self.path(long_name)))
+
+    def test_apply_plan_records_conflicts(self):
+        self.make('a.txt', 'b.txt')
+        plan = RenamePlan()
+        plan.append(self.path('a.txt'), 'c.txt')
+        plan.append(self.path('b.txt'), 'c.txt')
+        summary = OutcomeSummary()
+        self.assertEqual(apply_plan(plan, skip_conflicts=True, summary=summary), 1)
+        self.assertEqual((summary.counts[OUTCOME_OK], summary.counts[OUTCOME_CONFLICT]), (1, 1))
+
+    def test_failure_keeps_errno(self):
+        self.make('a.txt')
+        moves = [(self.path('a.txt'), self.path(os.path.join('missing', 'a.txt')))]
+        outcome = execute_moves(moves).outcome(moves, 0)
+        self.assertEqual(outcome.status, OUTCOME_ERROR)
+        self.assertEqual(outcome.errno, errno.ENOENT)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.plan_executor import (schedule_moves, execute_moves, execute_moves_parallel, shard_moves,
+                               resolve_apply_workers, STEP_PARK,
+                               SKIP_TARGET_EXISTS, SKIP_DUPLICATE_TARGET, SKIP_BLOCKED)
+from src.journal import Journal
+from src.file_operations import rename_files
+
+class TestPlanExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def make(self, *names):
+        for name in names:
+            with open(self.path(name), 'w') as f:
+                f.write(name)
+
+    def contents(self):
+        result = {}
+        for name in os.listdir(self.test_dir):
+            with open(self.path(name)) as f:
+                result[name] = f.read()
+        return result
+
+    def moves(self, *pairs):
+        return [(self.path(src), self.path(dst)) for src, dst in pairs]
+
+    def test_shift_chain_needs_no_temp(self):
+        self.make('1', '2', '3')
+        report = execute_moves(self.moves(('1', '2'), ('2', '3'), ('3', '4')))
+        self.assertEqual(self.contents(), {'2': '1', '3': '2', '4': '3'})
+        self.assertEqual((report.operations, report.cycles), (3, 0))
+
+    def test_swap_and_rotation(self):
+        self.make('a', 'b', 'x', 'y', 'z')
+        moves = self.moves(('a', 'b'), ('b', 'a'), ('x', 'y'), ('y', 'z'), ('z', 'x'))
+        schedule = schedule_moves(moves)
+        self.assertEqual(sum(step.kind == STEP_PARK for step in schedule.steps), 2)
+
+        report = execute_moves(moves)
+        self.assertEqual(self.contents(), {'a': 'b', 'b': 'a', 'x': 'z', 'y': 'x', 'z': 'y'})
+        # n renames plus one per cycle
+        self.assertEqual((report.operations, report.cycles), (7, 2))
+        self.assertEqual(len(report.renamed), 5)
+
+    def test_untouched_target_blocks_chain(self):
+        self.make('a', 'b', 'keep')
+        report = execute_moves(self.moves(('b', 'keep'), ('a', 'b')))
+        self.assertEqual(report.skipped, {0: SKIP_TARGET_EXISTS, 1: SKIP_BLOCKED})
+        self.assertEqual(self.contents(), {'a': 'a', 'b': 'b', 'keep': 'keep'})
+
+    def test_duplicate_target(self):
+        self.make('a', 'b')
+        report = execute_moves(self.moves(('a', 'c'), ('b', 'c')))
+        self.assertEqual(report.skipped, {1: SKIP_DUPLICATE_TARGET})
+        self.assertEqual(self.contents(), {'c': 'a', 'b': 'b'})
+
+    def test_rename_files_follows_chains(self):
+        self.make('x', '1_x')
+        # "x" becomes "1_x", which is only free once "1_x" itself has moved on
+        new_paths = rename_files([self.path('x'), self.path('1_x')], '', use_order=True)
+        self.assertEqual(new_paths, [self.path('1_x'), self.path('2_1_x')])
+        self.assertEqual(self.contents(), {'1_x': 'x', '2_1_x': '1_x'})
+
+class TestParallelExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for folder in ['a', 'b', os.path.join('a', 'sub')]:
+            os.makedirs(self.path(folder))
+            for name in ['1', '2']:
+                with open(self.path(folder, name), 'w') as f:
+                    f.write(folder + name)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, *parts):
+        return os.path.join(self.test_dir, *parts)
+
+    def read(self, *parts):
+        with open(self.path(*parts)) as f:
+            return f.read()
+
+    def test_shards_deepest_first(self):
+        moves = [(self.path('a', '1'), self.path('a', 'x')), (self.path('a', 'sub', '1'), self.path('a', 'sub', 'x')),
+                 (self.path('b', '1'), self.path('b', 'x')), (self.path('a', '2'), self.path('a', 'y'))]
+        self.assertEqual(shard_moves(moves), [[[1]], [[0, 3], [2]]])
+        self.assertIsNone(shard_moves([(self.path('a', '1'), self.path('b', '3'))]))
+
+    def test_swaps_in_every_folder_and_folder_renamed_last(self):
+        moves = []
+        for folder in ['a', 'b', os.path.join('a', 'sub')]:
+            moves += [(self.path(folder, '1'), self.path(folder, '2')), (self.path(folder, '2'), self.path(folder, '1'))]
+        moves.append((self.path('a', 'sub'), self.path('a', 'renamed')))
+        moves.append((self.path('b', 'missing'), self.path('b', 'x')))
+
+        report = execute_moves_parallel(moves, max_workers=4)
+        self.assertEqual(len(report.renamed), 7)
+        self.assertEqual(list(report.failed), [7])
+        self.assertEqual(report.cycles, 3)
+        self.assertEqual(self.read('a', 'renamed', '1'), 'a' + os.sep + 'sub2')
+        self.assertEqual((self.read('a', '1'), self.read('b', '1')), ('a2', 'b2'))
+
+    def test_resolve_apply_workers(self):
+        self.assertEqual(resolve_apply_workers(4, self.test_dir), 4)
+        self.assertEqual(resolve_apply_workers('bad', self.test_dir), 1)
+        self.assertIn(resolve_apply_workers('auto', self.test_dir), (1, 8))
+
+    def test_parallel_batch_is_journaled(self):
+        journal = Journal(self.path('journal.jsonl'))
+        moves = [(self.path(folder, '1'), self.path(folder, 'x')) for folder in ['a', 'b']]
+        with journal.begin('rename') as batch:
+            execute_moves_parallel(moves, batch=batch, max_workers=2)
+        self.assertEqual(sorted(op.seq for op in journal.read()[0].ops), [0, 1])
+        journal.undo()
+        journal.close()
+        self.assertEqual((self.read('a', '1'), self.read('b', '1')), ('a1', 'b1'))
+
+if __name__ == '__main__':
+    unittest.main()
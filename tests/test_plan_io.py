@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.rename_plan import stream_entries, build_plan, STATUS_DONE
+from src.folder_operations import identify_redundant_folders
+from src.plan_io import (rename_items, collapse_items, export_items, read_plan, import_plan, apply_imported_plan,
+                         PlanFormatError, OP_COLLAPSE)
+
+class TestPlanIO(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.work = os.path.join(self.test_dir, 'work')
+        os.makedirs(self.work)
+        for name in ['b.txt', 'a, "quoted".txt', 'ünï.txt']:
+            with open(os.path.join(self.work, name), 'w') as f:
+                f.write(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def export(self, extension):
+        rows = build_plan(stream_entries(self.work), 'P_')
+        path = os.path.join(self.test_dir, 'plan' + extension)
+        self.assertEqual(export_items(rename_items(rows), path), 3)
+        return path
+
+    def test_round_trip(self):
+        for extension in ['.jsonl', '.csv']:
+            path = self.export(extension)
+            records = list(read_plan(path))
+            self.assertEqual(sorted(r.new_name for r in records), ['P_a, "quoted".txt', 'P_b.txt', 'P_ünï.txt'])
+            self.assertTrue(all(r.size is not None and r.mtime_ns is not None and not r.is_dir for r in records))
+
+    def test_apply_imported_plan(self):
+        path = self.export('.csv')
+        imported = import_plan(path)
+        self.assertEqual((imported.total, imported.stale_count), (3, 0))
+        self.assertEqual(apply_imported_plan(imported), (3, 0))
+        self.assertEqual(imported.renames.count(STATUS_DONE), 3)
+        self.assertEqual(sorted(os.listdir(self.work)), ['P_a, "quoted".txt', 'P_b.txt', 'P_ünï.txt'])
+
+    def test_changed_items_are_left_out(self):
+        path = self.export('.jsonl')
+        with open(os.path.join(self.work, 'b.txt'), 'a') as f:
+            f.write('more')
+        os.remove(os.path.join(self.work, 'ünï.txt'))
+
+        imported = import_plan(path)
+        self.assertEqual(imported.stale_count, 2)
+        self.assertEqual(sorted(problem for _, problem in imported.stale),
+                         ['no longer exists', 'was modified after the plan was made'])
+        self.assertEqual(apply_imported_plan(imported), (1, 0))
+        self.assertEqual(sorted(os.listdir(self.work)), ['P_a, "quoted".txt', 'b.txt'])
+
+    def test_collapse_plan(self):
+        inner = os.path.join(self.work, 'outer', 'inner')
+        os.makedirs(inner)
+        open(os.path.join(inner, 'f.txt'), 'w').close()
+        path = os.path.join(self.test_dir, 'collapse.jsonl')
+        export_items(collapse_items(identify_redundant_folders(self.work)), path)
+
+        imported = import_plan(path)
+        self.assertEqual([r.op for r in imported.collapses], [OP_COLLAPSE])
+        self.assertEqual(apply_imported_plan(imported), (0, 1))
+        self.assertEqual(os.listdir(os.path.join(self.work, 'outer_inner')), ['f.txt'])
+
+    def test_bad_rows_are_reported(self):
+        path = os.path.join(self.test_dir, 'bad.jsonl')
+        with open(path, 'w') as f:
+            f.write('{"path": "/x/a.txt", "new_name": "b.txt"}\n')
+            f.write('{"path": "/x/c.txt", "new_name": "../d.txt"}\n')
+        records = read_plan(path)
+        self.assertEqual(next(records).new_name, 'b.txt')
+        with self.assertRaisesRegex(PlanFormatError, 'Line 2'):
+            next(records)
+        with self.assertRaises(ValueError):
+            list(read_plan(os.path.join(self.test_dir, 'plan.txt')))
+
+if __name__ == '__main__':
+    unittest.main()
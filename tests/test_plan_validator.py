@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.plan_validator import (validate_moves, PlanConflictError, CONFLICT_DUPLICATE, CONFLICT_EXISTING,
+                                CONFLICT_CASE, CONFLICT_TOO_LONG, CONFLICT_INVALID)
+from src.rename_plan import RenamePlan, apply_plan, STATUS_CONFLICT, STATUS_DONE
+
+class TestPlanValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name in ['a.txt', 'b.txt', 'keep.txt', 'Other.txt']:
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def moves(self, *pairs):
+        return [(os.path.join(self.test_dir, src), os.path.join(self.test_dir, dst)) for src, dst in pairs]
+
+    def kinds(self, report):
+        return [(conflict.index, conflict.kind) for conflict in report.conflicts]
+
+    def test_swaps_and_chains_are_clean(self):
+        report = validate_moves(self.moves(('a.txt', 'b.txt'), ('b.txt', 'a.txt')), case_insensitive=True)
+        self.assertFalse(report.has_conflicts)
+
+    def test_duplicate_and_existing(self):
+        report = validate_moves(self.moves(('a.txt', 'c.txt'), ('b.txt', 'c.txt'), ('Other.txt', 'keep.txt')),
+                                case_insensitive=False)
+        self.assertEqual(self.kinds(report), [(1, CONFLICT_DUPLICATE), (2, CONFLICT_EXISTING)])
+        self.assertEqual(report.conflicting_indexes(), {1, 2})
+
+    def test_case_clashes(self):
+        moves = self.moves(('a.txt', 'other.txt'), ('b.txt', 'X.txt'), ('keep.txt', 'x.txt'))
+        insensitive = validate_moves(moves, case_insensitive=True)
+        self.assertEqual(self.kinds(insensitive), [(0, CONFLICT_CASE), (2, CONFLICT_CASE)])
+        sensitive = validate_moves(moves, case_insensitive=False)
+        self.assertFalse(sensitive.has_conflicts)
+        self.assertEqual(len(sensitive.warnings), 2)
+
+    def test_bad_names(self):
+        report = validate_moves(self.moves(('a.txt', 'x' * 300), ('b.txt', '')), case_insensitive=False)
+        self.assertEqual(self.kinds(report), [(0, CONFLICT_TOO_LONG), (1, CONFLICT_INVALID)])
+
+    def test_apply_refuses_conflicting_plan(self):
+        plan = RenamePlan()
+        plan.append(os.path.join(self.test_dir, 'a.txt'), 'keep.txt')
+        plan.append(os.path.join(self.test_dir, 'b.txt'), 'c.txt')
+        with self.assertRaises(PlanConflictError) as context:
+            apply_plan(plan)
+        self.assertEqual(context.exception.report.conflicting_indexes(), {0})
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, 'b.txt')))
+
+        self.assertEqual(apply_plan(plan, skip_conflicts=True), 1)
+        self.assertEqual([plan.status(0), plan.status(1)], [STATUS_CONFLICT, STATUS_DONE])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from src.prefix_analysis import analyze_names, prefix_head
+from src.rename_utils import find_longest_common_prefix, remove_prefix_and_order
+
+class TestPrefixAnalysis(unittest.TestCase):
+
+    names = ['IMG_0001.jpg', 'IMG_0002.jpg', 'DSC_0100.jpg', 'DSC_0101.jpg', 'DSC_0102.jpg',
+             'scan_2024_a.png', 'scan_2024_b.png', 'scan_2023_c.png', 'notes.txt', 'todo_list.txt']
+
+    def test_clusters_per_prefix(self):
+        clusters = analyze_names(self.names)
+        self.assertEqual(clusters.prefixes, {'IMG_': 2, 'DSC_': 3, 'scan_2024_': 2, 'scan_': 1})
+        self.assertEqual(clusters.largest(1), [('DSC_', 3)])
+        self.assertEqual(clusters.prefix_for('scan_2024_a.png'), 'scan_2024_')
+        self.assertEqual(clusters.prefix_for('scan_2023_c.png'), 'scan_')
+        # A prefix only one name has is not a cluster
+        self.assertEqual(clusters.prefix_for('todo_list.txt'), '')
+
+    def test_min_size(self):
+        clusters = analyze_names(self.names, min_size=3)
+        self.assertEqual(clusters.prefixes, {'DSC_': 3, 'scan_': 3})
+
+    def test_suffixes(self):
+        clusters = analyze_names(['a_edit.jpg', 'b_edit.jpg', 'c_x_final.jpg', 'd_final.png'], suffixes=True)
+        self.assertEqual(clusters.suffixes, {'_edit': 2, '_final': 2})
+        self.assertEqual(clusters.suffix_for('c_x_final.jpg'), '_final')
+
+    def test_remove_prefix_per_cluster(self):
+        cleaned = [remove_prefix_and_order(name, file_list=self.names) for name in self.names]
+        self.assertEqual(cleaned, ['0001.jpg', '0002.jpg', '0100.jpg', '0101.jpg', '0102.jpg',
+                                   'a.png', 'b.png', 'c.png', 'notes.txt', 'todo_list.txt'])
+
+    def test_common_prefix_unchanged(self):
+        self.assertEqual(prefix_head('scan_2024_001.png'), 'scan_2024_')
+        for names in (['IMG_001_a.jpg', 'IMG_002_b.jpg'], ['abc_1', 'abd_2'], ['solo_name.txt'], ['x', 'y'],
+                      ['/a/IMG_1.jpg', '/b/IMG_2.jpg']):
+            # Same result as the original character-by-character scan
+            expected = names[0].rsplit('/', 1)[-1]
+            for other in names[1:]:
+                other = other.rsplit('/', 1)[-1]
+                expected = expected[:next((i for i, (x, y) in enumerate(zip(expected, other)) if x != y),
+                                          min(len(expected), len(other)))]
+            if expected.rfind('_') > 0:
+                expected = expected[:expected.rfind('_') + 1]
+            self.assertEqual(find_longest_common_prefix(names), expected)
+
+if __name__ == '__main__':
+    unittest.main()
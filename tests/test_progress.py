@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.progress import ProgressReporter, CancellationToken, OperationCancelled, format_progress
+from src.plan_executor import execute_moves, SKIP_CANCELLED
+from src.rename_plan import RenamePlan, apply_plan, STATUS_OK, STATUS_DONE
+from src.folder_operations import uncollapse_folders
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestProgressReporter(unittest.TestCase):
+
+    def test_updates_are_throttled(self):
+        clock = FakeClock()
+        updates = []
+        progress = ProgressReporter(lambda p: updates.append(p.done), interval=1.0, clock=clock)
+        progress.start(100)
+        for _ in range(20):
+            clock.now += 0.25
+            progress.advance()
+        progress.finish()
+        # start, one per simulated second, finish
+        self.assertEqual(updates, [0, 4, 8, 12, 16, 20, 20])
+
+    def test_rate_and_eta(self):
+        clock = FakeClock()
+        progress = ProgressReporter(interval=0, clock=clock)
+        progress.start(100)
+        self.assertIsNone(progress.eta)
+        clock.now = 5.0
+        progress.advance(25)
+        self.assertEqual(progress.rate, 5.0)
+        self.assertEqual(progress.eta, 15.0)
+        self.assertEqual(format_progress(progress, width=4), "[#...] 25/100 5.0/s ETA 0:15")
+        progress.finish()
+        self.assertEqual(format_progress(progress, width=0), "25/100 5.0/s in 0:05")
+
+    def test_cancellation_token(self):
+        cancel = CancellationToken()
+        cancel.raise_if_cancelled()
+        cancel.cancel()
+        self.assertTrue(cancel.cancelled)
+        with self.assertRaises(OperationCancelled):
+            cancel.raise_if_cancelled()
+
+class TestCancellation(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def make(self, *names):
+        for name in names:
+            with open(self.path(name), 'w') as f:
+                f.write(name)
+
+    def cancel_after(self, count):
+        cancel = CancellationToken()
+
+        def check(progress):
+            if progress.done >= count:
+                cancel.cancel()
+        return ProgressReporter(check, interval=0), cancel
+
+    def test_cancel_stops_between_moves(self):
+        self.make('1', '2', '3', '4')
+        moves = [(self.path(name), self.path('x' + name)) for name in '1234']
+        progress, cancel = self.cancel_after(2)
+        report = execute_moves(moves, progress=progress, cancel=cancel)
+        self.assertTrue(report.cancelled)
+        self.assertEqual(len(report.renamed), 2)
+        self.assertEqual(list(report.skipped.values()), [SKIP_CANCELLED] * 2)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['3', '4', 'x1', 'x2'])
+
+    def test_cancel_never_leaves_parked_items(self):
+        self.make('a', 'b', 'c', 'd')
+        # Each swap needs a temporary name; cancelling inside the first one must still finish it
+        moves = [(self.path('a'), self.path('b')), (self.path('b'), self.path('a')),
+                 (self.path('c'), self.path('d')), (self.path('d'), self.path('c'))]
+        progress, cancel = self.cancel_after(1)
+        report = execute_moves(moves, progress=progress, cancel=cancel)
+        self.assertTrue(report.cancelled)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['a', 'b', 'c', 'd'])
+        contents = []
+        for name in 'abcd':
+            with open(self.path(name)) as f:
+                contents.append(f.read())
+        self.assertEqual(contents, ['b', 'a', 'c', 'd'])
+
+    def test_rows_not_reached_stay_pending(self):
+        self.make('1', '2', '3')
+        plan = RenamePlan()
+        for name in '123':
+            plan.append(self.path(name), 'x' + name)
+        progress, cancel = self.cancel_after(1)
+        self.assertEqual(apply_plan(plan, progress=progress, cancel=cancel), 1)
+        self.assertEqual([row.status for row in plan], [STATUS_DONE, STATUS_OK, STATUS_OK])
+
+    def test_folder_operation_reports_progress(self):
+        for name in ['a_b', 'c_d', 'e_f']:
+            os.makedirs(self.path(name))
+        progress, cancel = self.cancel_after(2)
+        self.assertEqual(len(uncollapse_folders(self.test_dir, progress=progress, cancel=cancel)), 2)
+        self.assertEqual((progress.done, progress.total), (2, 3))
+
+if __name__ == '__main__':
+    unittest.main()
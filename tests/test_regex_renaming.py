@@ -5,7 +5,7 @@ import unittest
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.rename_utils import apply_regex_rename
+from src.rename_utils import apply_regex_rename, RegexRule, RegexRuleError
 
 class TestRegexRenaming(unittest.TestCase):
     def test_basic_regex_replace(self):
@@ -43,5 +43,43 @@ class TestRegexRenaming(unittest.TestCase):
         new_name = apply_regex_rename(name, pattern, replacement)
         self.assertEqual(new_name, "test.txt")
 
+class TestRegexRule(unittest.TestCase):
+    def test_batch_apply(self):
+        rule = RegexRule(r"(\w+)_(\w+)", r"\2_\1")
+        self.assertEqual(list(rule.apply(["John_Doe.txt", "plain.txt"])), ["Doe_John.txt", "plain.txt"])
+
+    def test_invalid_rules_are_reported_upfront(self):
+        for pattern, replacement in [(r"[", "x"), (r"(\d+)", r"\2"), (r"(?P<n>\d+)", r"\g<name>")]:
+            with self.assertRaises(RegexRuleError):
+                RegexRule(pattern, replacement)
+        # The lenient function keeps returning the original name
+        self.assertEqual(apply_regex_rename("a1.txt", r"(\d+)", r"\2"), "a1.txt")
+
+    def test_nested_quantifiers_are_refused(self):
+        for pattern in [r"(a+)+$", r"(\w+_)*x", r"(?:a|b+)*c"]:
+            with self.assertRaises(RegexRuleError):
+                RegexRule(pattern, "")
+        RegexRule(r"(\d{4})+_(\w+)", "")
+        # Inner repeats that must stop at a delimiter are linear
+        for pattern in [r"^(\d+_)+", r"([a-z]+_)+", r"(?:[^_]+_)*x", r"(?i)([a-z]+-)+"]:
+            self.assertEqual(RegexRule(pattern, "").pattern, pattern)
+        for pattern in [r"(\d+\d)+", r"(?i)([a-z]+A)+", r"((?i:[a-z]+A))+", r"(.+_)+"]:
+            with self.assertRaisesRegex(RegexRuleError, "nests", msg=pattern):
+                RegexRule(pattern, "")
+        self.assertEqual(RegexRule(r"^(\d+_)+", "").rename("01_002_trip.jpg"), "trip.jpg")
+
+    def test_overlapping_alternatives_are_refused(self):
+        for pattern in [r"(a|aa)+$", r"(a|a)*b", r"([0-9]|\w\w)+$", r"(?i)(A|ab)+", r"(x|y?)+z"]:
+            with self.assertRaisesRegex(RegexRuleError, "overlapping", msg=pattern):
+                RegexRule(pattern, "")
+        # Alternatives that start on different characters split the text one way only
+        for pattern in [r"(foo|bar)+", r"(a|ab)+", r"(?:\d|-x)+", r"(IMG|DSC)_"]:
+            self.assertEqual(RegexRule(pattern, "").pattern, pattern)
+
+    def test_time_budget(self):
+        rule = RegexRule(r"(a|aa)+$", "", time_budget=0.0001, lint=False)
+        with self.assertRaisesRegex(RegexRuleError, "too long"):
+            list(rule.apply(["a" * 24 + "b"]))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.rename_engine import RenameEngine, SUPPORTS_DIR_FD
+from src.plan_executor import execute_moves
+
+class TestRenameEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for folder in ['a', 'b']:
+            os.makedirs(os.path.join(self.test_dir, folder))
+            with open(os.path.join(self.test_dir, folder, 'f.txt'), 'w') as f:
+                f.write(folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, *parts):
+        return os.path.join(self.test_dir, *parts)
+
+    def test_rename_with_and_without_dir_fd(self):
+        for use_dir_fd in (False, True):
+            with RenameEngine(use_dir_fd=use_dir_fd) as engine:
+                engine.rename(self.path('a', 'f.txt'), self.path('a', 'g.txt'))
+                engine.rename(self.path('a', 'g.txt'), self.path('b', 'g.txt'))
+                self.assertTrue(os.path.lexists(self.path('b', 'g.txt')))
+                self.assertFalse(os.path.lexists(self.path('a', 'g.txt')))
+                engine.rename(self.path('b', 'g.txt'), self.path('a', 'f.txt'))
+            self.assertEqual(engine._handles, {})
+        self.assertEqual(sorted(os.listdir(self.path('a'))), ['f.txt'])
+
+    @unittest.skipUnless(SUPPORTS_DIR_FD, "dir_fd is not supported on this platform")
+    def test_handles_follow_folder_renames(self):
+        with RenameEngine() as engine:
+            engine.rename(self.path('a', 'f.txt'), self.path('a', 'x.txt'))
+            # Swap the folders; the handle opened on "a" must not be reused for the new "a"
+            engine.rename(self.path('a'), self.path('tmp'))
+            engine.rename(self.path('b'), self.path('a'))
+            engine.rename(self.path('tmp'), self.path('b'))
+            engine.rename(self.path('a', 'f.txt'), self.path('a', 'y.txt'))
+            self.assertEqual(engine.opened, 3)  # the root, the old "a" and the new "a"
+        with open(self.path('a', 'y.txt')) as f:
+            self.assertEqual(f.read(), 'b')
+        self.assertEqual(os.listdir(self.path('b')), ['x.txt'])
+
+    @unittest.skipUnless(SUPPORTS_DIR_FD, "dir_fd is not supported on this platform")
+    def test_handle_limit(self):
+        folders = [self.path(f"d{i}") for i in range(5)]
+        with RenameEngine(max_open=2) as engine:
+            for folder in folders:
+                os.makedirs(folder)
+                open(os.path.join(folder, 'f'), 'w').close()
+                engine.rename(os.path.join(folder, 'f'), os.path.join(folder, 'g'))
+            self.assertLessEqual(len(engine._handles), 2)
+        self.assertTrue(all(os.listdir(folder) == ['g'] for folder in folders))
+
+    def test_failed_rename_raises(self):
+        with RenameEngine() as engine:
+            with self.assertRaises(OSError):
+                engine.rename(self.path('a', 'missing.txt'), self.path('a', 'x.txt'))
+
+    def test_executor_uses_engine(self):
+        moves = [(self.path('a', 'f.txt'), self.path('a', '1.txt')), (self.path('b', 'f.txt'), self.path('b', '2.txt'))]
+        with RenameEngine() as engine:
+            report = execute_moves(moves, engine=engine)
+            self.assertEqual(engine.renames, 2)
+        self.assertEqual(len(report.renamed), 2)
+
+if __name__ == '__main__':
+    unittest.main()
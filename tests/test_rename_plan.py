@@ -0,0 +1,174 @@
+import os
+import shutil
+import tempfile
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+from src.rename_plan import (build_plan, build_suggestion_plan, stream_entries, stream_common_prefix, export_plan, apply_plan, next_order_index,
+                             RenamePlan, STATUS_OK, STATUS_UNCHANGED, STATUS_CONFLICT, STATUS_DONE)
+from src.rename_utils import find_longest_common_prefix
+from src.scanner import scan_directory
+from src.journal import Journal
+from src import main
+
+class TestRenamePlan(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name in ['a.txt', 'b.txt', 'P_1_a.txt']:
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write('content')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def entries(self, *names):
+        return [e for e in sorted(scan_directory(self.test_dir), key=lambda e: e.name) if e.name in names]
+
+    def test_plan_is_lazy(self):
+        consumed = []
+        def source():
+            for entry in self.entries('a.txt', 'b.txt'):
+                consumed.append(entry.name)
+                yield entry
+        plan = build_plan(source(), 'X_')
+        self.assertEqual(consumed, [])
+        first = next(plan)
+        self.assertEqual((first.name, first.new_name), ('a.txt', 'X_a.txt'))
+        self.assertEqual(consumed, ['a.txt'])
+
+    def test_collisions_and_unchanged(self):
+        rows = list(build_plan(self.entries('a.txt', 'b.txt'), 'P_', use_order=True))
+        # P_1_a.txt already exists on disk
+        self.assertEqual([r.status for r in rows], [STATUS_CONFLICT, STATUS_OK])
+        rows = list(build_plan(self.entries('a.txt'), ''))
+        self.assertEqual(rows[0].status, STATUS_UNCHANGED)
+
+    def test_duplicate_targets_within_plan(self):
+        rows = list(build_plan(self.entries('a.txt', 'b.txt'), 'Y_', regex_pattern=r'^[ab]', regex_replacement='c'))
+        self.assertEqual([r.new_name for r in rows], ['Y_c.txt', 'Y_c.txt'])
+        self.assertEqual([r.status for r in rows], [STATUS_OK, STATUS_CONFLICT])
+
+    def test_incremental_skips_renamed_items_and_continues_numbering(self):
+        entries = self.entries('P_1_a.txt', 'a.txt', 'b.txt')
+        start = next_order_index((e.name for e in entries), 'P_')
+        self.assertEqual(start, 2)
+        rows = list(build_plan(entries, 'P_', use_order=True, start_index=start, incremental=True))
+        self.assertEqual([(r.new_name, r.status) for r in rows],
+                         [('P_1_a.txt', STATUS_UNCHANGED), ('P_2_a.txt', STATUS_OK), ('P_3_b.txt', STATUS_OK)])
+
+    def test_incremental_needs_a_prefix(self):
+        self.assertEqual(next_order_index(['2024_trip.jpg', 'a.jpg'], ''), 1)
+        open(os.path.join(self.test_dir, '2024_trip.txt'), 'w').close()
+        rows = list(build_plan(self.entries('2024_trip.txt', 'a.txt'), '', use_order=True, incremental=True))
+        self.assertEqual([r.new_name for r in rows], ['1_2024_trip.txt', '2_a.txt'])
+
+    def test_numbers_are_padded_to_the_count(self):
+        for i in range(10):
+            open(os.path.join(self.test_dir, f'n{i}.txt'), 'w').close()
+        rows = list(build_plan(self.entries(*[f'n{i}.txt' for i in range(10)]), 'N_', use_order=True))
+        self.assertEqual([rows[0].new_name, rows[-1].new_name], ['N_01_n0.txt', 'N_10_n9.txt'])
+
+    def test_stream_common_prefix_matches_list_version(self):
+        for names in (['IMG_001_a.jpg', 'IMG_002_b.jpg'], ['abc_1', 'abd_2'], ['solo_name.txt'], ['x', 'y']):
+            self.assertEqual(stream_common_prefix(iter(names)), find_longest_common_prefix(names))
+
+    def test_export_streams_rows(self):
+        os.makedirs(os.path.join(self.test_dir, 'out'))
+        output = os.path.join(self.test_dir, 'out', 'plan.tsv')
+        rows = build_plan(stream_entries(self.test_dir), 'Z_')
+        self.assertEqual(export_plan(rows, output), 3)
+        with open(output, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], 'path\tnew_name\tstatus')
+        self.assertEqual(len(lines), 4)
+
+class TestCompactPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name in ['a.txt', 'b.txt']:
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write('content')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_columns_round_trip(self):
+        plan = RenamePlan()
+        plan.append(os.path.join('root', 'x', 'caf\u00e9.txt'), 'new.txt', status=STATUS_CONFLICT)
+        plan.append(os.path.join('root', 'x', 'bad\udcff.txt'), 'new2.txt', is_dir=True)
+        plan.append(os.path.join('root', 'y', 'z.txt'), 'z.txt', status=STATUS_UNCHANGED)
+
+        self.assertEqual(len(plan), 3)
+        self.assertEqual(len(plan._dirs), 2)  # folder paths are stored once
+        self.assertEqual(plan.path(0), os.path.join('root', 'x', 'caf\u00e9.txt'))
+        self.assertEqual(plan.name(1), 'bad\udcff.txt')
+        self.assertTrue(plan.is_dir(1))
+        self.assertEqual(plan.new_path(2), os.path.join('root', 'y', 'z.txt'))
+        self.assertEqual([row.status for row in plan], [STATUS_CONFLICT, STATUS_OK, STATUS_UNCHANGED])
+        self.assertEqual(plan[-1].name, 'z.txt')
+        self.assertEqual(plan.count(STATUS_OK), 1)
+
+    def test_prefix_strip_renames_once_without_overwriting(self):
+        for name in ['X_1_a.txt', 'X_2_b.txt']:
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write(name)
+        entries = [e for e in sorted(scan_directory(self.test_dir), key=lambda e: e.name) if e.name.startswith('X_')]
+        plan = RenamePlan.from_rows(build_plan(entries, 'Y_', True, True, 'X_'))
+        self.assertEqual([plan.new_name(i) for i in range(len(plan))], ['Y_1_a.txt', 'Y_2_b.txt'])
+
+        journal_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, journal_dir)
+        journal = Journal(os.path.join(journal_dir, 'journal.jsonl'))
+        with journal.begin('rename') as batch:
+            self.assertEqual(apply_plan(plan, batch=batch), 2)
+        journal.close()
+        # One rename per file, and the existing a.txt/b.txt are left alone
+        self.assertEqual(len(journal.read()[0].ops), 2)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['Y_1_a.txt', 'Y_2_b.txt', 'a.txt', 'b.txt'])
+        with open(os.path.join(self.test_dir, 'a.txt')) as f:
+            self.assertEqual(f.read(), 'content')
+
+    def test_suggestion_plan(self):
+        os.makedirs(os.path.join(self.test_dir, 'folder'))
+        suggestions = [(os.path.join(self.test_dir, name), new_name)
+                       for name, new_name in [('a.txt', 'a.txt'), ('b.txt', 'c.txt'), ('folder', 'c.txt')]]
+        plan = build_suggestion_plan(suggestions)
+        self.assertEqual([row.status for row in plan], [STATUS_UNCHANGED, STATUS_OK, STATUS_CONFLICT])
+        self.assertTrue(plan.is_dir(2))
+        self.assertEqual(apply_plan(plan, skip_conflicts=True), 1)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['a.txt', 'c.txt', 'folder'])
+
+    def test_apply_plan(self):
+        entries = sorted(scan_directory(self.test_dir), key=lambda e: e.name)
+        plan = RenamePlan.from_rows(build_plan(entries, 'N_', use_order=True))
+        self.assertEqual(apply_plan(plan), 2)
+        self.assertEqual([plan.status(i) for i in range(len(plan))], [STATUS_DONE, STATUS_DONE])
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['N_1_a.txt', 'N_2_b.txt'])
+
+class TestCliPreview(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for i in range(5):
+            with open(os.path.join(self.test_dir, f'{i}.txt'), 'w') as f:
+                f.write('content')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_preview_streams_rows_into_the_plan(self):
+        rows = build_plan(stream_entries(self.test_dir), 'P_')
+        plan = RenamePlan()
+        with mock.patch.object(main, 'get_user_input', return_value='q'), redirect_stdout(io.StringIO()):
+            shown = main.preview_plan(main.collect_rows(rows, plan), self.test_dir, page_size=2)
+        # The preview stopped after one page, before the rest was planned
+        self.assertEqual(shown, 2)
+        self.assertEqual(len(plan), 3)
+        plan.extend(rows)
+        self.assertEqual(sorted(plan.new_name(i) for i in range(len(plan))), [f'P_{i}.txt' for i in range(5)])
+
+if __name__ == '__main__':
+    unittest.main()
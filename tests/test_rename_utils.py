@@ -1,5 +1,6 @@
 import unittest
-from src.rename_utils import generate_new_name, apply_prefix_format
+from src.rename_utils import (generate_new_name, generate_new_names, apply_prefix_format, parse_generated_name,
+                              split_name)
 
 class TestRenameUtils(unittest.TestCase):
 
@@ -31,5 +32,37 @@ class TestRenameUtils(unittest.TestCase):
         expected_name = "report.docx"
         self.assertEqual(apply_prefix_format(original_name, prefix_format), expected_name)
 
+    def test_parse_generated_name(self):
+        # Names produced by generate_new_name are recognized, with their order number
+        for order in (1, 7, 120):
+            name = generate_new_name("photo.jpg", "Trip_", order)
+            self.assertEqual(parse_generated_name(name, "Trip_", True), order)
+        self.assertEqual(parse_generated_name("Trip_photo.jpg", "Trip_", False), 0)
+        self.assertIsNone(parse_generated_name("Trip_photo.jpg", "Trip_", True))
+        self.assertIsNone(parse_generated_name("photo.jpg", "Trip_", False))
+        self.assertIsNone(parse_generated_name("Trip.x_1_photo.jpg", "Trip_x", True))
+        # Without a prefix an original name like 2024_trip.jpg is not mistaken for a renamed one
+        self.assertIsNone(parse_generated_name("2024_trip.jpg", "", True))
+
+    def test_generate_new_names_pads_numbers(self):
+        names = [f"f{i}.txt" for i in range(12)]
+        new_names = generate_new_names(names, "Trip_", True)
+        self.assertEqual(new_names[:2], ["Trip_01_f0.txt", "Trip_02_f1.txt"])
+        self.assertEqual(new_names[-1], "Trip_12_f11.txt")
+        self.assertEqual(sorted(new_names), new_names)
+        self.assertEqual(generate_new_names(["a.txt"], "", True, start_index=98, pad_width=4), ["0098_a.txt"])
+        # Without ordering the batch matches generate_new_name
+        self.assertEqual(generate_new_names(["a.txt", ".env"], "P_"), [generate_new_name("a.txt", "P_"), "P_.env"])
+        self.assertEqual(parse_generated_name(new_names[0], "Trip_", True), 1)
+
+    def test_split_name(self):
+        self.assertEqual(split_name("photo.jpg"), ("photo", ".jpg"))
+        self.assertEqual(split_name("backup.2024.tar.gz"), ("backup.2024", ".tar.gz"))
+        self.assertEqual(split_name("data.TAR.BZ2"), ("data", ".TAR.BZ2"))
+        self.assertEqual(split_name(".bashrc"), (".bashrc", ""))
+        self.assertEqual(split_name(".config.json"), (".config", ".json"))
+        self.assertEqual(split_name("README"), ("README", ""))
+        self.assertEqual(split_name("trailing."), ("trailing.", ""))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
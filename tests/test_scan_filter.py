@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from unittest import mock
+from src.config_manager import DEFAULT_OPTIONS_FILE
+from src.scan_filter import ScanFilter
+from src.scanner import ScanEntry, scan_directory
+
+class TestScanFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        files = {'photo.JPG': 10, 'notes.txt': 200, 'draft_notes.txt': 5, '.hidden.txt': 1, 'archive.tar.gz': 50}
+        for name, size in files.items():
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write('x' * size)
+        os.makedirs(os.path.join(self.test_dir, 'folder'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def scan(self, scan_filter, include_folders=False):
+        entries = scan_directory(self.test_dir, include_folders=include_folders, entry_filter=scan_filter)
+        return sorted(entry.name for entry in entries)
+
+    def test_extensions_are_case_insensitive(self):
+        self.assertEqual(self.scan(ScanFilter(extensions=['jpg', '.tar.gz'])), ['archive.tar.gz', 'photo.JPG'])
+
+    def test_skip_hidden(self):
+        self.assertNotIn('.hidden.txt', self.scan(ScanFilter(skip_hidden=True)))
+
+    def test_globs_and_regex(self):
+        scan_filter = ScanFilter(include_globs=['*.txt'], exclude_globs=['draft_*'], exclude_regex=r'^\.')
+        self.assertEqual(self.scan(scan_filter), ['notes.txt'])
+        self.assertEqual(self.scan(ScanFilter(include_regex=r'notes')), ['draft_notes.txt', 'notes.txt'])
+
+    def test_size_limits(self):
+        self.assertEqual(self.scan(ScanFilter(min_size=10, max_size=100)), ['archive.tar.gz', 'photo.JPG'])
+
+    def test_include_rules_do_not_drop_folders(self):
+        self.assertIn('folder', self.scan(ScanFilter(extensions=['.txt']), include_folders=True))
+
+    def test_hidden_attribute_is_checked_after_names(self):
+        stat_calls = []
+
+        class CatalogEntry(ScanEntry):
+            __slots__ = ()
+
+            def stat(self):
+                stat_calls.append(self.name)
+                return mock.Mock(st_file_attributes=stat.FILE_ATTRIBUTE_HIDDEN if self.name == 'h.jpg' else 0)
+
+        with mock.patch('src.scan_filter._IS_WINDOWS', True):
+            scan_filter = ScanFilter(extensions=['.jpg'], exclude_globs=['skip_*'], skip_hidden=True)
+        entries = [CatalogEntry(name, name, False) for name in ['a.txt', 'skip_b.jpg', 'c.jpg', 'h.jpg']]
+        self.assertEqual([entry.name for entry in entries if scan_filter(entry)], ['c.jpg'])
+        self.assertEqual(stat_calls, ['c.jpg', 'h.jpg'])
+
+    def test_empty_filter(self):
+        self.assertTrue(ScanFilter().is_empty)
+        self.assertFalse(ScanFilter(skip_hidden=True).is_empty)
+
+    def test_bundled_defaults_keep_hidden_files(self):
+        with open(DEFAULT_OPTIONS_FILE) as f:
+            options = json.load(f)
+        scan_filter = ScanFilter.from_options(options["scan_filters"])
+        self.assertTrue(scan_filter.is_empty)
+        self.assertIn('.hidden.txt', self.scan(scan_filter))
+
+if __name__ == '__main__':
+    unittest.main()
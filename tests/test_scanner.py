@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src import scanner
+from src.scanner import scan_directory, scan_tree, walk_tree, list_item_paths, list_subfolders
+
+class TestScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name in ['a.txt', 'b.jpg']:
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write('content')
+        os.makedirs(os.path.join(self.test_dir, 'sub'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_files_only_by_default(self):
+        names = sorted(entry.name for entry in scan_directory(self.test_dir))
+        self.assertEqual(names, ['a.txt', 'b.jpg'])
+
+    def test_include_folders(self):
+        entries = {entry.name: entry for entry in scan_directory(self.test_dir, include_folders=True)}
+        self.assertEqual(sorted(entries), ['a.txt', 'b.jpg', 'sub'])
+        self.assertTrue(entries['sub'].is_dir)
+        self.assertFalse(entries['a.txt'].is_dir)
+        self.assertEqual(entries['a.txt'].path, os.path.join(self.test_dir, 'a.txt'))
+
+    def test_stat_on_request(self):
+        entry = next(e for e in scan_directory(self.test_dir) if e.name == 'a.txt')
+        self.assertEqual(entry.stat().st_size, len('content'))
+
+    def test_paths_and_subfolders(self):
+        self.assertEqual(sorted(list_item_paths(self.test_dir)),
+                         sorted(os.path.join(self.test_dir, n) for n in ['a.txt', 'b.jpg']))
+        self.assertEqual([e.name for e in list_subfolders(self.test_dir)], ['sub'])
+
+    def test_missing_directory(self):
+        self.assertEqual(scan_directory(os.path.join(self.test_dir, 'missing')), [])
+
+class TestTreeScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for rel in ['top.txt', 'a/one.txt', 'a/b/two.txt', 'a/b/c/three.txt', 'skip/hidden.txt']:
+            path = os.path.join(self.test_dir, *rel.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('content')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def names(self, entries):
+        return sorted(entry.name for entry in entries)
+
+    def test_recursive_files(self):
+        names = self.names(scan_tree(self.test_dir))
+        self.assertEqual(names, ['hidden.txt', 'one.txt', 'three.txt', 'top.txt', 'two.txt'])
+
+    def test_max_depth(self):
+        self.assertEqual(self.names(scan_tree(self.test_dir, max_depth=1)), ['top.txt'])
+        self.assertEqual(self.names(scan_tree(self.test_dir, max_depth=2)), ['hidden.txt', 'one.txt', 'top.txt'])
+
+    def test_exclude_dirs(self):
+        names = self.names(scan_tree(self.test_dir, exclude_dirs=['skip', 'a/b/c']))
+        self.assertEqual(names, ['one.txt', 'top.txt', 'two.txt'])
+
+    def test_ordered_output_is_deterministic(self):
+        first = [e.path for e in scan_tree(self.test_dir, include_folders=True, ordered=True, max_workers=4)]
+        second = [e.path for e in scan_tree(self.test_dir, include_folders=True, ordered=True, max_workers=1)]
+        self.assertEqual(first, second)
+        # Breadth-first: the root listing comes before anything nested
+        self.assertEqual(first[:3], [os.path.join(self.test_dir, n) for n in ['a', 'skip', 'top.txt']])
+
+    def test_walk_tree_yields_every_folder(self):
+        folders = sorted(os.path.relpath(path, self.test_dir) for path, _, _ in walk_tree(self.test_dir))
+        self.assertEqual(folders, sorted(['.', 'a', os.path.join('a', 'b'), os.path.join('a', 'b', 'c'), 'skip']))
+
+    def test_listings_stay_bounded_ahead_of_the_consumer(self):
+        for i in range(20):
+            os.makedirs(os.path.join(self.test_dir, 'wide', f'd{i:02d}'))
+        listed = []
+        real_list_children = scanner._list_children
+
+        def list_children(dir_path, *args):
+            listed.append(dir_path)
+            return real_list_children(dir_path, *args)
+
+        for ordered in (True, False):
+            del listed[:]
+            with mock.patch('src.scanner._list_children', list_children):
+                walk = walk_tree(os.path.join(self.test_dir, 'wide'), max_workers=1, ordered=ordered)
+                next(walk)
+                next(walk)
+                self.assertLessEqual(len(listed), 2 + scanner.SCAN_LOOKAHEAD)
+                self.assertEqual(len(list(walk)), 19)
+            self.assertEqual(len(listed), 21)
+
+    def test_rejected_entries_are_dropped_while_listing(self):
+        def accept(entry):
+            return entry.name not in ('a', 'top.txt')
+
+        listings = dict((os.path.relpath(path, self.test_dir), [e.name for e in dirs + files])
+                        for path, dirs, files in walk_tree(self.test_dir, entry_filter=accept))
+        self.assertEqual(sorted(listings['.']), ['skip'])
+        # A rejected folder is still descended into
+        self.assertEqual(sorted(listings['a']), ['b', 'one.txt'])
+        names = self.names(scan_tree(self.test_dir, include_folders=True, entry_filter=accept))
+        self.assertNotIn('a', names)
+        self.assertIn('one.txt', names)
+
+    def test_recursive_item_paths(self):
+        paths = list_item_paths(self.test_dir, recursive=True)
+        self.assertIn(os.path.join(self.test_dir, 'a', 'b', 'c', 'three.txt'), paths)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.stat_cache import StatCache
+from src.file_operations import rename_files
+
+class TestStatCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.files = []
+        for i in range(5):
+            path = os.path.join(self.test_dir, f'file{i}.txt')
+            with open(path, 'w') as f:
+                f.write('content')
+            self.files.append(path)
+        os.makedirs(os.path.join(self.test_dir, 'sub'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_lookups_in_one_folder_list_it_once(self):
+        cache = StatCache()
+        for path in self.files:
+            self.assertTrue(cache.exists(path))
+        self.assertFalse(cache.exists(os.path.join(self.test_dir, 'missing.txt')))
+        self.assertTrue(cache.isdir(os.path.join(self.test_dir, 'sub')))
+        self.assertTrue(cache.isfile(self.files[0]))
+        self.assertEqual(cache.counters(), {"hits": 7, "misses": 1})
+
+    def test_record_rename_updates_cached_state(self):
+        cache = StatCache()
+        src = self.files[0]
+        dst = os.path.join(self.test_dir, 'renamed.txt')
+        self.assertFalse(cache.exists(dst))
+        os.rename(src, dst)
+        cache.record_rename(src, dst)
+        self.assertFalse(cache.exists(src))
+        self.assertTrue(cache.isfile(dst))
+        self.assertEqual(cache.misses, 1)
+
+    def test_folder_rename_drops_cached_children(self):
+        cache = StatCache()
+        sub = os.path.join(self.test_dir, 'sub')
+        self.assertFalse(cache.exists(os.path.join(sub, 'inner.txt')))
+        moved = os.path.join(self.test_dir, 'moved')
+        os.rename(sub, moved)
+        cache.record_rename(sub, moved)
+        with open(os.path.join(moved, 'inner.txt'), 'w') as f:
+            f.write('content')
+        self.assertTrue(cache.exists(os.path.join(moved, 'inner.txt')))
+        self.assertFalse(cache.exists(os.path.join(sub, 'inner.txt')))
+
+    def test_rename_files_uses_one_listing(self):
+        cache = StatCache()
+        renamed = rename_files(self.files, 'new_', stat_cache=cache)
+        self.assertTrue(all(os.path.exists(path) for path in renamed))
+        self.assertEqual(cache.misses, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from src.watcher import FolderWatcher, InotifyBackend, PollingBackend
+
+class TestFolderWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.write('existing.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, content='content'):
+        with open(os.path.join(self.test_dir, name), 'w') as f:
+            f.write(content)
+
+    def test_numbering_continues_across_batches(self):
+        watcher = FolderWatcher(self.test_dir, 'Batch_', start_index=1)
+        self.write('b.txt')
+        self.write('a.txt')
+        first = watcher.process_batch(['b.txt', 'a.txt'])
+        self.write('c.txt')
+        second = watcher.process_batch(['c.txt'])
+
+        self.assertEqual([os.path.basename(new) for _, new in first], ['Batch_1_a.txt', 'Batch_2_b.txt'])
+        self.assertEqual([os.path.basename(new) for _, new in second], ['Batch_3_c.txt'])
+        self.assertEqual(watcher.next_index, 4)
+
+    def test_regex_applied_before_prefix(self):
+        watcher = FolderWatcher(self.test_dir, 'P_', use_order=False, regex_pattern=r'^raw-', regex_replacement='')
+        self.write('raw-scan.pdf')
+        renamed = watcher.process_batch(['raw-scan.pdf'])
+        self.assertEqual(os.path.basename(renamed[0][1]), 'P_scan.pdf')
+
+    def test_growing_file_waits(self):
+        watcher = FolderWatcher(self.test_dir, 'P_', debounce=0, poll_interval=0)
+        self.write('growing.bin', 'x')
+        watcher._pending['growing.bin'] = None
+        self.assertEqual(watcher._check_stable(1.0), [])
+        self.write('growing.bin', 'xx')
+        self.assertEqual(watcher._check_stable(2.0), [])
+        self.assertEqual(watcher._check_stable(3.0), ['growing.bin'])
+
+    def run_watch(self, use_inotify):
+        watcher = FolderWatcher(self.test_dir, 'New_', debounce=0.1, poll_interval=0.05, use_inotify=use_inotify)
+        batches = []
+        stop = threading.Event()
+        thread = threading.Thread(target=watcher.run, kwargs={
+            'stop_event': stop, 'on_batch': batches.append, 'max_batches': 1})
+        thread.start()
+        try:
+            threading.Event().wait(0.2)
+            self.write('arrived.txt')
+            thread.join(5)
+        finally:
+            stop.set()
+            thread.join(5)
+        return batches
+
+    def test_polling_watch_renames_only_new_files(self):
+        batches = self.run_watch(use_inotify=False)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['New_1_arrived.txt', 'existing.txt'])
+
+    @unittest.skipUnless(os.name == 'posix' and os.uname().sysname == 'Linux', "inotify is Linux only")
+    def test_inotify_watch_renames_only_new_files(self):
+        backend = InotifyBackend(self.test_dir)
+        backend.close()
+        batches = self.run_watch(use_inotify=True)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['New_1_arrived.txt', 'existing.txt'])
+
+    def test_polling_backend_reports_changes(self):
+        backend = PollingBackend(self.test_dir)
+        self.write('new.txt')
+        os.remove(os.path.join(self.test_dir, 'existing.txt'))
+        self.assertEqual(backend.wait(0), ({'new.txt'}, {'existing.txt'}))
+
+if __name__ == '__main__':
+    unittest.main()